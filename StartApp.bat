@@ -39,6 +39,14 @@ if errorlevel 1 (
     pip install -q -r requirements.txt
 )
 
+echo Applying database migrations...
+python migrate.py
+if errorlevel 1 (
+    echo [ERROR] Database migration failed!
+    pause
+    exit /b 1
+)
+
 echo Starting Backend...
 start "Backend Server" cmd /k "cd /d "%BACKEND_DIR%" && call venv\Scripts\activate.bat && uvicorn main:app --reload --port 8000"
 
@@ -0,0 +1,163 @@
+"""
+Stale-project alert scan.
+
+Project.last_update_at (crud.create_contractor_update maintain karta hai) pe
+ek hi indexed range query se woh ongoing projects milte hain jinka contractor
+30+ din se chup hai. Scan ek background scheduler thread pe chalta hai aur
+latest result memory me rakhta hai, /ai/alerts bas wahi return karta hai.
+ALERT_SCAN_INTERVAL_SECONDS=0 (thread band) pe har call inline scan karta hai.
+SMS yahan se nahi jaate: alerts ai/dispatch.py ke outbox me queue hote hain.
+"""
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from models import Project, ContractorUpdate
+from ai import dispatch, risk
+import contractor_stats
+
+STALE_DAYS = 30
+SCAN_INTERVAL_SECONDS = int(os.getenv("ALERT_SCAN_INTERVAL_SECONDS", "900"))
+
+
+def backfill_last_update(db: Session):
+    """One-time fill of last_update_at for projects that already had updates."""
+    latest_ids = (
+        db.query(func.max(ContractorUpdate.id))
+        .join(Project, ContractorUpdate.project_id == Project.id)
+        .filter(Project.last_update_at == None)
+        .group_by(ContractorUpdate.project_id)
+    )
+    rows = (
+        db.query(ContractorUpdate.project_id, ContractorUpdate.submission_date)
+        .filter(ContractorUpdate.id.in_(latest_ids.scalar_subquery()))
+        .all()
+    )
+    filled = 0
+    for project_id, submitted in rows:
+        try:
+            ts = datetime.strptime(submitted, "%Y-%m-%d %H:%M")
+        except (TypeError, ValueError):
+            continue
+        db.query(Project).filter(Project.id == project_id).update(
+            {"last_update_at": ts}, synchronize_session=False
+        )
+        filled += 1
+    db.commit()
+    return filled
+
+
+def scan(db: Session, now: datetime = None):
+    """
+    Identify contractors who haven't submitted updates for > 30 days
+    and queue one alert per project (deduplicated, caller commits).
+    """
+    now = now or datetime.now()
+    # (now - last_update).days > STALE_DAYS, i.e. at least STALE_DAYS + 1 full days
+    cutoff = now - timedelta(days=STALE_DAYS + 1)
+
+    projects = (
+        db.query(Project)
+        .filter(Project.status == "ongoing", Project.contractor_id != None)
+        .filter(or_(Project.last_update_at <= cutoff, Project.last_update_at == None))
+        .order_by(Project.id)
+        .all()
+    )
+
+    alerts = []
+    for p in projects:
+        contractor_name = p.contractor.name if p.contractor else "Unknown"
+        contractor_phone = p.contractor.phone if p.contractor else None
+
+        if p.last_update_at is None:
+            # Check project start date if no updates... simplified logic
+            msg, days = "No updates submitted yet.", "N/A"
+        else:
+            days = (now - p.last_update_at).days
+            msg = f"Last update was {days} days ago."
+
+        sms_status = dispatch.enqueue(
+            db,
+            contractor_phone,
+            f"URGENT: {msg} for Project {p.name}",
+            project_id=p.id,
+            dedupe_key=f"stale:{p.id}",
+        )
+        alerts.append({
+            "contractor": contractor_name,
+            "project": p.name,
+            "message": msg,
+            "days_overdue": days,
+            "sms_status": sms_status
+        })
+    return alerts
+
+
+# ----------------------------
+# Scheduler
+# ----------------------------
+class AlertScheduler:
+    """Runs scan() every `interval` seconds on a daemon thread and keeps the last result."""
+
+    def __init__(self, session_factory, interval: int = SCAN_INTERVAL_SECONDS, dispatcher=None):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.dispatcher = dispatcher
+        self.alerts = None
+        self.generated_at = None
+        self.risk_day = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        db = self.session_factory()
+        try:
+            alerts = scan(db)
+            if self.risk_day != date.today():
+                # Writes keep risk current; schedule slip also grows with the calendar
+                risk.rescore(db)
+                contractor_stats.refresh(db)
+                self.risk_day = date.today()
+            db.commit()
+        finally:
+            db.close()
+        if self.dispatcher:
+            self.dispatcher.notify()
+        with self._lock:
+            self.alerts, self.generated_at = alerts, datetime.now()
+        self._ready.set()
+        return alerts
+
+    def latest(self):
+        if not (self._thread and self._thread.is_alive()):
+            # Scheduler disabled (interval 0) or stopped => nothing refreshes the cache, scan inline
+            return self.run_once()
+        if self.alerts is None:
+            # Startup scan already running on the thread
+            self._ready.wait(timeout=30)
+        if self.alerts is None:
+            return self.run_once()
+        return self.alerts
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Alert scan failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="alert-scan", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,280 @@
+"""
+Alert dispatch: outbox table + background worker.
+
+Alert generation (ai/alerts.scan) sirf alert_outbox me row daalta hai, kabhi
+delivery ka wait nahi karta. DispatchWorker thread due rows claim karta hai,
+ek phone ke saare alerts ek message me merge karta hai, sink ka rate limit
+follow karta hai aur fail hone pe exponential backoff se retry karta hai.
+
+Dedupe: har worker ka scheduler scan chalata hai, isliye enqueue ka window
+check akela race kar sakta hai. (dedupe_key, dedupe_bucket) pe unique index
+hai (bucket = ALERT_DEDUPE_HOURS ka time slot), to ek slot me ek hi row
+insert hoti hai; doosra insert IntegrityError pe "Deduplicated" ho jaata
+hai. Failed row ka bucket NULL kar dete hain taaki woh dobara queue ho sake.
+
+Config (env):
+    ALERT_SINK                 "stdout" (default) or "file:<path>"
+    ALERT_DEDUPE_HOURS         same dedupe_key re-queued within this window is dropped (24)
+    ALERT_RATE_PER_MINUTE      messages per minute per sink (60)
+    ALERT_MAX_ATTEMPTS         give up (status=failed) after this many tries (5)
+    ALERT_RETRY_BASE_SECONDS   first retry delay, doubled each attempt (30)
+    ALERT_DISPATCH_POLL_SECONDS  worker poll interval, 0 disables the worker (5)
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import AlertOutbox
+
+DEDUPE_WINDOW = timedelta(hours=float(os.getenv("ALERT_DEDUPE_HOURS", "24")))
+RATE_PER_MINUTE = float(os.getenv("ALERT_RATE_PER_MINUTE", "60"))
+MAX_ATTEMPTS = int(os.getenv("ALERT_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = float(os.getenv("ALERT_RETRY_BASE_SECONDS", "30"))
+POLL_SECONDS = float(os.getenv("ALERT_DISPATCH_POLL_SECONDS", "5"))
+BATCH_SIZE = 500
+STALE_CLAIM = timedelta(minutes=10)
+
+
+# ----------------------------
+# Sinks
+# ----------------------------
+class AlertSink(ABC):
+    """Delivery backend. send() raises on failure; the worker retries."""
+    name = "base"
+
+    @abstractmethod
+    def send(self, phone: str, message: str):
+        ...
+
+
+class StdoutSink(AlertSink):
+    """Simulated SMS (prints). In production swap in Twilio/SNS/Fast2SMS."""
+    name = "stdout"
+
+    def send(self, phone: str, message: str):
+        print(f"--------[SMS ALERT]--------")
+        print(f"To: {phone}")
+        print(f"Message: {message}")
+        print(f"---------------------------")
+
+
+class FileSink(AlertSink):
+    """Appends one JSON line per delivered message; handy for tests and audits."""
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, phone: str, message: str):
+        line = json.dumps({"to": phone, "message": message, "sent_at": datetime.now().isoformat()})
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+SINKS = {
+    "stdout": lambda arg: StdoutSink(),
+    "file": lambda arg: FileSink(arg or "alerts_outbox.log"),
+}
+
+
+def register_sink(name: str, factory):
+    """factory(arg: str | None) -> AlertSink, selected with ALERT_SINK=name[:arg]."""
+    SINKS[name] = factory
+
+
+def make_sink(spec: str = None) -> AlertSink:
+    spec = spec or os.getenv("ALERT_SINK", "stdout")
+    name, _, arg = spec.partition(":")
+    if name not in SINKS:
+        raise ValueError(f"Unknown ALERT_SINK '{name}' (known: {', '.join(SINKS)})")
+    return SINKS[name](arg or None)
+
+
+class RateLimiter:
+    """Token bucket: `rate_per_minute` sustained, bursts up to the same amount."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(rate_per_minute, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        if self.rate <= 0:
+            return True  # unlimited
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+# ----------------------------
+# Producer side (caller commits)
+# ----------------------------
+def dedupe_bucket(now: datetime):
+    window = DEDUPE_WINDOW.total_seconds()
+    return int(now.timestamp() // window) if window > 0 else None
+
+
+def enqueue(db: Session, phone: str, message: str, project_id: int = None, dedupe_key: str = None):
+    """Queue one alert. Returns a short status string for the API response."""
+    if not phone:
+        return "No phone number linked."
+    now = datetime.now()
+    bucket = None
+    if dedupe_key:
+        bucket = dedupe_bucket(now)
+        recent = (
+            db.query(AlertOutbox.id)
+            .filter(AlertOutbox.dedupe_key == dedupe_key)
+            .filter(AlertOutbox.created_at >= now - DEDUPE_WINDOW)
+            .filter(AlertOutbox.status != "failed")
+            .first()
+        )
+        if recent:
+            return "Deduplicated"
+    try:
+        # Savepoint: a concurrent scheduler may insert the same (dedupe_key, bucket) first
+        with db.begin_nested():
+            db.add(AlertOutbox(
+                phone=phone,
+                project_id=project_id,
+                message=message,
+                dedupe_key=dedupe_key,
+                dedupe_bucket=bucket,
+                status="pending",
+                attempts=0,
+                next_attempt_at=now,
+                created_at=now,
+            ))
+    except IntegrityError:
+        return "Deduplicated"
+    return "Queued"
+
+
+def merge_messages(messages):
+    if len(messages) == 1:
+        return messages[0]
+    lines = "\n".join(f"- {m}" for m in messages)
+    return f"{len(messages)} alerts:\n{lines}"
+
+
+# ----------------------------
+# Consumer side
+# ----------------------------
+class DispatchWorker:
+    def __init__(self, session_factory, sink: AlertSink = None, poll_seconds: float = POLL_SECONDS):
+        self.session_factory = session_factory
+        self.sink = sink
+        self.poll_seconds = poll_seconds
+        self.limiter = RateLimiter(RATE_PER_MINUTE)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _claim(self, db: Session, now: datetime):
+        token = uuid.uuid4().hex
+        due_ids = (
+            db.query(AlertOutbox.id)
+            .filter(AlertOutbox.status == "pending", AlertOutbox.next_attempt_at <= now)
+            .order_by(AlertOutbox.id)
+            .limit(BATCH_SIZE)
+            .scalar_subquery()
+        )
+        # Claim via conditional UPDATE so parallel workers never send the same row twice
+        db.execute(
+            update(AlertOutbox)
+            .where(AlertOutbox.id.in_(due_ids), AlertOutbox.status == "pending")
+            .values(status="sending", claim_token=token, next_attempt_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return db.query(AlertOutbox).filter(AlertOutbox.claim_token == token).order_by(AlertOutbox.id).all()
+
+    def _release_stale_claims(self, db: Session, now: datetime):
+        # Worker crash ke baad "sending" me atke rows wapas queue me (claim sets next_attempt_at = claim time)
+        db.query(AlertOutbox).filter(
+            AlertOutbox.status == "sending", AlertOutbox.next_attempt_at < now - STALE_CLAIM
+        ).update({"status": "pending", "claim_token": None}, synchronize_session=False)
+        db.commit()
+
+    def run_once(self) -> int:
+        """Deliver everything due right now. Returns number of messages sent."""
+        sink = self.sink = self.sink or make_sink()
+        db = self.session_factory()
+        sent = 0
+        try:
+            now = datetime.now()
+            self._release_stale_claims(db, now)
+            rows = self._claim(db, now)
+
+            by_phone = OrderedDict()
+            for row in rows:
+                by_phone.setdefault(row.phone, []).append(row)
+
+            for phone, group in by_phone.items():
+                if not self.limiter.try_acquire():
+                    # Rate limit hit: baaki rows agle poll me
+                    for row in group:
+                        row.status, row.claim_token = "pending", None
+                    continue
+                try:
+                    sink.send(phone, merge_messages([r.message for r in group]))
+                except Exception as e:
+                    for row in group:
+                        row.attempts += 1
+                        row.last_error = str(e)[:500]
+                        row.claim_token = None
+                        if row.attempts >= MAX_ATTEMPTS:
+                            row.status = "failed"
+                            row.dedupe_bucket = None  # free the slot, like the window check
+                        else:
+                            row.status = "pending"
+                            row.next_attempt_at = now + timedelta(
+                                seconds=RETRY_BASE_SECONDS * (2 ** (row.attempts - 1))
+                            )
+                    continue
+                sent += 1
+                for row in group:
+                    row.status, row.sent_at, row.claim_token = "sent", datetime.now(), None
+            db.commit()
+        finally:
+            db.close()
+        return sent
+
+    def notify(self):
+        """Producers call this after committing new rows to skip the poll wait."""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Alert dispatch failed: {e}")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def start(self):
+        if self.poll_seconds <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="alert-dispatch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
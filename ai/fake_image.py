@@ -0,0 +1,48 @@
+"""
+Fake / edited photo heuristics (EXIF, dimensions, editing software).
+
+Alag module isliye ki imaging ke spawn workers ise import karte hain: yahan
+sirf PIL hai, routers / DB engines / schedulers import nahi hote.
+"""
+
+
+def analyze_fake_image(image_path: str):
+    """
+    Heuristic check for potential manipulation.
+    """
+    from PIL import Image, ExifTags
+    import os
+
+    flags = []
+    
+    try:
+        img = Image.open(image_path)
+        
+        # 1. Metadata Strip Check
+        # Most modern phones leave EXIF data. AI/Edited images often strip it.
+        exif_data = img._getexif()
+        if not exif_data:
+            flags.append("Missing EXIF Metadata (Possible Edit/AI)")
+        
+        # 2. Dimensions Check
+        # AI generators often use standard squares (1024x1024, 512x512)
+        w, h = img.size
+        if w == h and w in [512, 1024]:
+             flags.append(f"Suspicious Dimensions ({w}x{h})")
+
+        # 3. Software Signature
+        if exif_data:
+            for tag_id, value in exif_data.items():
+                tag = ExifTags.TAGS.get(tag_id, tag_id)
+                if tag == "Software":
+                    if "adobe" in str(value).lower() or "gimp" in str(value).lower():
+                        flags.append(f"Edited with {value}")
+
+        if flags:
+            return True, ", ".join(flags)
+        
+        return False, None
+
+    except Exception as e:
+        print(f"AI Check Failed: {e}")
+        return False, None
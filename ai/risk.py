@@ -0,0 +1,336 @@
+"""
+Project risk engine: single, batch and incremental.
+
+Score = spend rules (jo POST /ai/risk hamesha se use karta hai) + evidence:
+    schedule slip   start_year + duration_months se expected progress vs actual
+    negative feedback   rating <= 2 wale feedback
+    flagged images      is_flagged feedback (duplicate / fake / geofence)
+
+project_score() ek project ke liye, score_many() wahi rules NumPy arrays pe.
+rescore() poore scope (state / district / block / village) ko arrays me load
+karke score karta hai aur sirf badle hue rows ek executemany UPDATE se likhta
+hai. Bina budget wale projects score nahi hote (POST /ai/risk unhe 400 deta
+hai), unka stored risk jaisa hai waisa rehta hai.
+
+Incremental: Session hooks (neeche) har flush me dekhte hain kaunse projects
+ke risk inputs badle (project edit, naya feedback, contractor update) aur
+commit se theek pehle sirf unhi projects ka score usi transaction me
+recompute karte hain, isliye stored risk_score / risk_level hamesha current
+rehte hain. Sirf calendar aage badhne se jo slip badhta hai, woh
+ai/alerts.AlertScheduler din me ek baar rescore() chala ke pakadta hai.
+
+Usage:
+    python -m ai.risk [state_id]   # rescore (all projects if no state given)
+    python -m ai.risk bench [n]    # scoring throughput on n synthetic rows (1,000,000)
+"""
+import time
+from datetime import date
+
+from sqlalchemy import bindparam, case, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from models import Project, Feedback, ContractorUpdate
+import response_cache
+import rollups
+
+LEVELS = ("Low", "Medium", "High")
+NEGATIVE_RATING = 2  # rating <= 2 counts as negative feedback
+
+# Columns of Project that feed the score
+RISK_INPUTS = ("budget", "spent", "progress_percent", "status", "start_year", "duration_months")
+
+
+def level_for(score: float) -> str:
+    return "Low" if score <= 40 else "Medium" if score <= 70 else "High"
+
+
+def score(budget: float, spent: float, progress: float):
+    """Spend rules only: (risk_score, risk_level, spent_ratio). budget must be > 0."""
+    spent_ratio = spent / budget
+    risk_score = 50
+
+    if spent_ratio > (progress / 100) + 0.1:
+        risk_score += 25  # overspending > 10% deviation
+
+    if progress < 50 and spent_ratio > 0.8:
+        risk_score += 25  # heavy risk
+
+    # Reward for efficiency (Low Risk)
+    if spent_ratio < (progress / 100) - 0.05:
+        risk_score -= 20  # Under budget / efficient
+
+    risk_score = min(max(risk_score, 0), 100)
+    return risk_score, level_for(risk_score), spent_ratio
+
+
+def months_elapsed(start_year: int, today: date = None) -> int:
+    # Only the year is known => counted from January of start_year
+    today = today or date.today()
+    return (today.year - start_year) * 12 + today.month - 1
+
+
+def evidence_points(progress: float, start_year=None, duration_months=None, completed=False,
+                    negative_feedback: int = 0, flagged_images: int = 0, today: date = None):
+    """(points, reasons) added on top of the spend rules."""
+    points, reasons = 0, []
+
+    if start_year and duration_months and not completed:
+        elapsed = months_elapsed(start_year, today)
+        if elapsed > duration_months:
+            points += 20
+            reasons.append(f"Overdue by {elapsed - duration_months} months")
+        elif elapsed >= 0 and elapsed / duration_months * 100 - progress > 25:
+            points += 10
+            reasons.append("Behind schedule")
+
+    if negative_feedback >= 3:
+        points += 25
+    elif negative_feedback > 0:
+        points += 15
+    if negative_feedback:
+        reasons.append(f"{negative_feedback} negative feedback")
+
+    if flagged_images >= 3:
+        points += 20
+    elif flagged_images > 0:
+        points += 10
+    if flagged_images:
+        reasons.append(f"{flagged_images} flagged photos")
+
+    return points, reasons
+
+
+def project_score(budget, spent, progress, start_year=None, duration_months=None, completed=False,
+                  negative_feedback: int = 0, flagged_images: int = 0, today: date = None):
+    """Combined (risk_score, risk_level, reasons). budget must be > 0."""
+    progress = progress or 0
+    base = score(budget, spent or 0, progress)[0]
+    points, reasons = evidence_points(
+        progress, start_year, duration_months, completed, negative_feedback, flagged_images, today
+    )
+    risk_score = float(min(max(base + points, 0), 100))
+    return risk_score, level_for(risk_score), reasons
+
+
+def score_many(budget, spent, progress, start_year=None, duration_months=None, completed=None,
+               negative_feedback=None, flagged_images=None, today: date = None):
+    """Array version of project_score(): (scores float64[], levels object[]). budget must be > 0."""
+    import numpy as np
+
+    ratio = spent / budget
+    done = progress / 100
+    scores = (
+        50.0
+        + 25 * (ratio > done + 0.1)
+        + 25 * ((progress < 50) & (ratio > 0.8))
+        - 20 * (ratio < done - 0.05)
+    )
+    np.clip(scores, 0, 100, out=scores)
+
+    if start_year is not None and duration_months is not None:
+        today = today or date.today()
+        elapsed = (today.year - start_year) * 12 + today.month - 1
+        active = (start_year > 0) & (duration_months > 0)
+        if completed is not None:
+            active &= ~completed
+        safe = np.where(active, duration_months, 1)
+        overdue = active & (elapsed > duration_months)
+        behind = active & ~overdue & (elapsed >= 0) & (elapsed / safe * 100 - progress > 25)
+        scores += 20 * overdue + 10 * behind
+
+    if negative_feedback is not None:
+        scores += np.where(negative_feedback >= 3, 25, np.where(negative_feedback > 0, 15, 0))
+    if flagged_images is not None:
+        scores += np.where(flagged_images >= 3, 20, np.where(flagged_images > 0, 10, 0))
+
+    np.clip(scores, 0, 100, out=scores)
+    levels = np.asarray(LEVELS, dtype=object)[(scores > 40).astype(np.int8) + (scores > 70)]
+    return scores, levels
+
+
+def _evidence_query():
+    negative = func.sum(case((Feedback.rating <= NEGATIVE_RATING, 1), else_=0))
+    flagged = func.sum(case((Feedback.is_flagged == 1, 1), else_=0))
+    return (
+        select(Feedback.project_id, negative, flagged)
+        .join(Project, Feedback.project_id == Project.id)
+        .group_by(Feedback.project_id)
+    )
+
+
+def _project_query():
+    return select(
+        Project.id, Project.budget, Project.spent, Project.progress_percent, Project.status,
+        Project.start_year, Project.duration_months, Project.risk_score, Project.risk_level,
+    )
+
+
+def _write(db: Session, params):
+    if params:
+        # One Core executemany (~2.5x faster than the ORM bulk-by-PK path)
+        table = Project.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(risk_score=bindparam("_score"), risk_level=bindparam("_level")),
+            params,
+        )
+
+
+def refresh(db: Session, project_ids):
+    """Recompute and store the score of just these projects (caller commits)."""
+    ids = sorted(set(project_ids))
+    if not ids:
+        return 0
+    evidence = {
+        pid: (int(neg or 0), int(flag or 0))
+        for pid, neg, flag in db.execute(_evidence_query().where(Feedback.project_id.in_(ids)))
+    }
+    params = []
+    for pid, budget, spent, progress, status, start_year, months, old_score, old_level in db.execute(
+        _project_query().where(Project.id.in_(ids))
+    ):
+        if not budget or budget <= 0:
+            continue  # no score without a budget, as in /ai/risk
+        new_score, new_level, _ = project_score(
+            budget, spent, progress, start_year, months, rollups.is_completed(status),
+            *evidence.get(pid, (0, 0)),
+        )
+        if new_score != old_score or new_level != old_level:
+            params.append({"_id": pid, "_score": new_score, "_level": new_level})
+    _write(db, params)
+    return len(params)
+
+
+def rescore(db: Session, state_id=None, district_id=None, block_id=None, village_id=None):
+    """Score every project in scope and store risk_score / risk_level (caller commits)."""
+    import numpy as np
+
+    scope = (state_id, district_id, block_id, village_id)
+    t0 = time.perf_counter()
+    rows = db.execute(rollups.scope_projects(_project_query(), *scope)).all()
+    evidence = {
+        pid: (neg, flag)
+        for pid, neg, flag in db.execute(rollups.scope_projects(_evidence_query(), *scope))
+    }
+    n = len(rows)
+
+    def column(i, default=0, dtype=np.float64):
+        return np.fromiter((default if r[i] is None else r[i] for r in rows), dtype=dtype, count=n)
+
+    ids = column(0, dtype=np.int64)
+    budget, spent, progress = column(1), column(2), column(3)
+    completed = np.fromiter((rollups.is_completed(r[4]) for r in rows), dtype=bool, count=n)
+    start_year, months = column(5, dtype=np.int64), column(6, dtype=np.int64)
+    old_score = column(7, default=np.nan)
+    old_level = np.asarray([r[8] for r in rows], dtype=object)
+    negative = np.fromiter((evidence.get(r[0], (0, 0))[0] or 0 for r in rows), dtype=np.int64, count=n)
+    flagged = np.fromiter((evidence.get(r[0], (0, 0))[1] or 0 for r in rows), dtype=np.int64, count=n)
+    t1 = time.perf_counter()
+
+    valid = budget > 0  # same rule as /ai/risk: no score without a budget
+    scores, levels = score_many(
+        budget[valid], spent[valid], progress[valid], start_year[valid], months[valid],
+        completed[valid], negative[valid], flagged[valid],
+    )
+    t2 = time.perf_counter()
+
+    changed = (scores != old_score[valid]) | (levels != old_level[valid])
+    params = [
+        {"_id": int(i), "_score": float(s), "_level": lv}
+        for i, s, lv in zip(ids[valid][changed], scores[changed], levels[changed])
+    ]
+    _write(db, params)
+    if params:
+        response_cache.invalidate_all_on_commit(db)  # risk levels show in the cached project lists
+    t3 = time.perf_counter()
+
+    per_million = (lambda secs: round(secs * 1_000_000 / n, 3) if n else 0.0)
+    return {
+        "scored": int(valid.sum()),
+        "updated": len(params),
+        "skipped": int(n - valid.sum()),
+        "levels": {lv: int((levels == lv).sum()) for lv in LEVELS},
+        "seconds": {"load": round(t1 - t0, 4), "score": round(t2 - t1, 4), "write": round(t3 - t2, 4)},
+        "seconds_per_million": {
+            "load": per_million(t1 - t0), "score": per_million(t2 - t1), "write": per_million(t3 - t2),
+            "total": per_million(t3 - t0),
+        },
+    }
+
+
+def bench(n: int = 1_000_000, seed: int = 0):
+    """Seconds score_many() takes on n synthetic projects."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    budget = rng.uniform(1e5, 1e7, n)
+    spent = budget * rng.uniform(0, 1.3, n)
+    progress = rng.uniform(0, 100, n)
+    start_year = rng.integers(2018, 2027, n)
+    months = rng.integers(6, 60, n)
+    completed = rng.random(n) < 0.3
+    negative = rng.poisson(0.5, n)
+    flagged = rng.poisson(0.2, n)
+    t0 = time.perf_counter()
+    score_many(budget, spent, progress, start_year, months, completed, negative, flagged)
+    return time.perf_counter() - t0
+
+
+# ----------------------------
+# Change hooks (incremental recompute)
+# ----------------------------
+@event.listens_for(Session, "after_flush")
+def _collect_risk_changes(session, flush_context):
+    touched = session.info.setdefault("risk_dirty", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Project):
+            if obj in session.deleted:
+                continue
+            state = inspect(obj)
+            if obj in session.new or any(state.attrs[a].history.has_changes() for a in RISK_INPUTS):
+                touched.add(obj.id)
+        elif isinstance(obj, (Feedback, ContractorUpdate)):
+            if obj.project_id:
+                touched.add(obj.project_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_risk(session):
+    if session.new or session.dirty or session.deleted:
+        session.flush()  # collect this transaction's last changes too
+    touched = session.info.pop("risk_dirty", None)
+    if touched:
+        refresh(session, touched)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_risk_changes(session, previous_transaction):
+    # Only a root rollback discards the work; a savepoint rollback keeps the rest
+    if previous_transaction.parent is None:
+        session.info.pop("risk_dirty", None)
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+
+    args = sys.argv[1:]
+    if args[:1] == ["bench"]:
+        n = int(args[1]) if len(args) > 1 else 1_000_000
+        secs = bench(n)
+        print(f"✔ Scored {n} projects in {secs:.3f}s ({secs * 1_000_000 / n:.3f}s per million)")
+        sys.exit(0)
+    if args and not args[0].isdigit():
+        print(__doc__)
+        sys.exit(2)
+
+    db = SessionLocal()
+    try:
+        result = rescore(db, state_id=int(args[0]) if args else None)
+        db.commit()
+        print(f"✔ Scored {result['scored']} projects, updated {result['updated']}, skipped {result['skipped']} (no budget)")
+        print(f"  {result['levels']}")
+        print(f"  seconds per million: {result['seconds_per_million']}")
+    finally:
+        db.close()
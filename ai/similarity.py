@@ -0,0 +1,196 @@
+"""
+Near-duplicate photo detection.
+
+sha256 sirf byte-exact copy pakadta hai; WhatsApp re-compress / crop /
+re-upload usse bach jaata hai. Yahan har image ka 64-bit dHash nikalta hai
+(Feedback.image_phash me hex) aur ek in-memory hamming index me rakha jaata hai,
+jo "hamming distance <= k wali koi image?" ka jawab poori list scan kiye
+bina deta hai (multi-index hashing, HammingIndex). models sirf DB wale
+functions ke andar import hota hai, taaki imaging ke spawn workers dhash()
+ke liye DB engines na banayein.
+
+Usage:
+    python -m ai.similarity backfill   # compute image_phash for old feedback photos
+"""
+import os
+import threading
+from array import array
+
+from sqlalchemy.orm import Session
+
+MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "6"))
+
+
+def dhash(image, size: int = 8) -> int:
+    """64-bit difference hash. `image` is a path or a PIL image."""
+    from PIL import Image
+
+    img = Image.open(image) if isinstance(image, str) else image
+    small = img.convert("L").resize((size + 1, size), Image.LANCZOS)
+    px = list(small.getdata())
+    value = 0
+    for row in range(size):
+        base = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (px[base + col] > px[base + col + 1])
+    return value
+
+
+def to_hex(value: int) -> str:
+    return f"{value:016x}"
+
+
+def from_hex(text: str) -> int:
+    return int(text, 16)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class HammingIndex:
+    """
+    Multi-index hashing over 64-bit hashes.
+
+    Hash ko 4 x 16-bit chunks me todte hain, har chunk ki apni dict hoti hai.
+    Pigeonhole: distance <= k ho to kam se kam ek chunk distance <= k // 4 pe
+    hoga, isliye sirf un chunk values ke buckets dekhne padte hain (radius 1
+    pe 17 per chunk), poori list nahi.
+    """
+    CHUNKS = 4
+    BITS = 16
+
+    def __init__(self):
+        self.hashes = array("Q")
+        self.payloads = []
+        self.tables = [dict() for _ in range(self.CHUNKS)]
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _chunks(self, value: int):
+        mask = (1 << self.BITS) - 1
+        return [(value >> (i * self.BITS)) & mask for i in range(self.CHUNKS)]
+
+    def add(self, value: int, payload):
+        pos = len(self.hashes)
+        self.hashes.append(value)
+        self.payloads.append(payload)
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            table.setdefault(chunk, []).append(pos)
+
+    def _neighbours(self, chunk: int, radius: int):
+        # All chunk values within `radius` bit flips (radius is 0-1 for the usual k <= 7)
+        out = [chunk]
+        frontier = [chunk]
+        for _ in range(radius):
+            frontier = [c ^ (1 << b) for c in frontier for b in range(self.BITS)]
+            out.extend(frontier)
+        return set(out)
+
+    def search(self, value: int, k: int):
+        """[(distance, payload), ...] for every stored hash within distance k."""
+        radius = k // self.CHUNKS
+        seen = set()
+        found = []
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            for candidate in self._neighbours(chunk, radius):
+                for pos in table.get(candidate, ()):
+                    if pos in seen:
+                        continue
+                    seen.add(pos)
+                    d = hamming(value, self.hashes[pos])
+                    if d <= k:
+                        found.append((d, self.payloads[pos]))
+        return found
+
+
+class PhashIndex:
+    """
+    Process-wide HammingIndex of (feedback_id, project_id) by image_phash.
+    sync() pulls rows with id > last synced, so inserts from other workers show up too.
+    add() does not move that mark: another worker's lower id may not be synced yet.
+    """
+
+    def __init__(self):
+        self.tree = HammingIndex()
+        self.last_id = 0
+        self.added = set()  # ids add()-ed above last_id, skipped by sync()
+        self._lock = threading.Lock()
+
+    def pending(self, db: Session):
+        """Rows not synced yet (SQL only; feed them to load(), e.g. from the threadpool)."""
+        from models import Feedback
+
+        return (
+            db.query(Feedback.id, Feedback.project_id, Feedback.image_phash)
+            .filter(Feedback.id > self.last_id, Feedback.image_phash != None)
+            .order_by(Feedback.id)
+            .all()
+        )
+
+    def sync(self, db: Session):
+        return self.load(self.pending(db))
+
+    def load(self, rows):
+        with self._lock:
+            for fb_id, project_id, phash in rows:
+                if fb_id <= self.last_id:
+                    continue
+                if fb_id in self.added:
+                    self.added.discard(fb_id)
+                else:
+                    self.tree.add(from_hex(phash), (fb_id, project_id))
+                self.last_id = fb_id
+        return len(rows)
+
+    def add(self, feedback_id: int, project_id: int, phash: str):
+        with self._lock:
+            if feedback_id <= self.last_id or feedback_id in self.added:
+                return  # already loaded by sync()
+            self.tree.add(from_hex(phash), (feedback_id, project_id))
+            self.added.add(feedback_id)
+
+    def closest(self, phash: str, k: int = MAX_DISTANCE):
+        """Best earlier match as {"feedback_id", "project_id", "distance"}, or None."""
+        with self._lock:
+            hits = self.tree.search(from_hex(phash), k)
+        if not hits:
+            return None
+        distance, (fb_id, project_id) = min(hits, key=lambda h: (h[0], h[1][0]))
+        return {"feedback_id": fb_id, "project_id": project_id, "distance": distance}
+
+
+index = PhashIndex()
+
+
+def backfill(db: Session):
+    """Compute image_phash for feedback photos saved before it existed."""
+    import blobstore
+    from models import Feedback
+
+    done = 0
+    rows = db.query(Feedback).filter(Feedback.image_path != None, Feedback.image_phash == None).all()
+    for fb in rows:
+        path = blobstore.resolve(fb.image_path)
+        try:
+            fb.image_phash = to_hex(dhash(path))
+            done += 1
+        except Exception as e:
+            print(f"Skip feedback #{fb.id}: {e}")
+    db.commit()
+    return done
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+
+    if sys.argv[1:] != ["backfill"]:
+        print(__doc__)
+        sys.exit(2)
+    db = SessionLocal()
+    try:
+        print(f"✔ image_phash filled for {backfill(db)} feedback row(s)")
+    finally:
+        db.close()
@@ -0,0 +1,253 @@
+"""
+Streaming audit extracts: projects, contractor updates and feedback for a
+hierarchy scope, as NDJSON, CSV or Parquet.
+
+Rows DB se server-side cursor + yield_per batches me aate hain (PostgreSQL pe
+stream_results, SQLite cursor waise bhi lazy hai) aur har batch turant
+encode hokar nikal jaata hai, isliye memory rows ki ginti se nahi badhti.
+Har row ke saath uski hierarchy (village / block / district / state ids)
+bhi jaati hai. Rows index order me aate hain (ORDER BY nahi, warna poora
+scope sort ke liye memory me jama hota).
+
+Parquet ke liye pyarrow chahiye (pip install pyarrow); har batch ek row group.
+
+Endpoint: GET /export/{dataset}?format=ndjson&state_id=1 (routers/export.py)
+Usage:
+    python audit_export.py projects --format csv --state 1 -o up_projects.csv
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from sqlalchemy import DateTime, Float, Integer, select
+
+from database import engine
+from models import Block, Contractor, ContractorUpdate, District, Feedback, Project, Village
+import rollups
+
+try:
+    import orjson
+except ImportError:  # optional, plain json works too
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export only
+    pa = pq = None
+
+BATCH = 5000
+DATASETS = ("projects", "updates", "feedback")
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+HIERARCHY = (
+    Project.village_id,
+    Village.name.label("village_name"),
+    Village.block_id,
+    Block.district_id,
+    District.state_id,
+)
+
+
+def _with_hierarchy(stmt):
+    return (
+        stmt.outerjoin(Village, Project.village_id == Village.id)
+        .outerjoin(Block, Village.block_id == Block.id)
+        .outerjoin(District, Block.district_id == District.id)
+    )
+
+
+def statement(dataset: str):
+    """SELECT for one dataset, hierarchy columns included, unscoped."""
+    if dataset == "projects":
+        stmt = select(
+            Project.id, Project.name, Project.status, Project.budget, Project.spent,
+            Project.progress_percent, Project.risk_score, Project.risk_level,
+            Project.start_year, Project.duration_months, Project.last_update_at,
+            Project.contractor_id, Contractor.name.label("contractor_name"),
+            *HIERARCHY,
+        ).select_from(Project).outerjoin(Contractor, Project.contractor_id == Contractor.id)
+    elif dataset == "updates":
+        stmt = select(
+            ContractorUpdate.id, ContractorUpdate.project_id, ContractorUpdate.contractor_id,
+            ContractorUpdate.amount_spent, ContractorUpdate.description,
+            ContractorUpdate.submission_date, ContractorUpdate.expected_completion_date,
+            ContractorUpdate.bill_image_path, ContractorUpdate.work_image_path,
+            *HIERARCHY,
+        ).select_from(ContractorUpdate).outerjoin(Project, ContractorUpdate.project_id == Project.id)
+    elif dataset == "feedback":
+        stmt = select(
+            Feedback.id, Feedback.project_id, Feedback.rating, Feedback.comment,
+            Feedback.is_flagged, Feedback.flag_reason, Feedback.latitude, Feedback.longitude,
+            Feedback.image_path, Feedback.image_hash,
+            *HIERARCHY,
+        ).select_from(Feedback).outerjoin(Project, Feedback.project_id == Project.id)
+    else:
+        raise ValueError(f"Unknown dataset {dataset!r} (use one of {', '.join(DATASETS)})")
+    return _with_hierarchy(stmt)
+
+
+def scoped(stmt, state_id=None, district_id=None, block_id=None, village_id=None):
+    """Filter on the already-joined hierarchy columns (cf. rollups.scope_projects)."""
+    level, entity_id = rollups.scope_key(state_id, district_id, block_id, village_id)
+    column = {
+        "village": Project.village_id,
+        "block": Village.block_id,
+        "district": Block.district_id,
+        "state": District.state_id,
+    }.get(level)
+    return stmt if column is None else stmt.where(column == entity_id)
+
+
+def _batches(dataset: str, scope: dict, bind, batch: int):
+    """(statement, column names, iterator of row lists); the connection stays open until the iterator ends."""
+    stmt = scoped(statement(dataset), **scope)
+    names = [c.name for c in stmt.selected_columns]
+
+    def rows():
+        with (bind or engine).connect() as conn:
+            # yield_per => stream_results (server-side cursor) + fetchmany(batch)
+            result = conn.execution_options(yield_per=batch).execute(stmt)
+            for part in result.partitions():
+                yield part
+
+    return stmt, names, rows()
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _ndjson(names, parts):
+    for part in parts:
+        if orjson is not None:
+            yield b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in part)
+        else:
+            yield "".join(
+                json.dumps({k: _plain(v) for k, v in zip(names, row)}, ensure_ascii=False) + "\n" for row in part
+            ).encode("utf-8")
+
+
+def _csv(names, parts):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(names)
+    for part in parts:
+        writer.writerows([_plain(v) for v in row] for row in part)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")  # header of an empty export
+
+
+class _ChunkSink:
+    """Write-only file object for pyarrow; drain() hands over what was written since the last call."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_type(sql_type):
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, Float):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _parquet(stmt, names, parts):
+    schema = pa.schema([(c.name, _arrow_type(c.type)) for c in stmt.selected_columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for part in parts:
+            columns = list(zip(*part))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+            ))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()  # footer
+
+
+def stream(dataset: str, fmt: str = "ndjson", bind=None, batch: int = BATCH, **scope):
+    """
+    Iterator of encoded byte chunks, one per batch of rows.
+    scope: state_id / district_id / block_id / village_id (most specific wins).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (use one of {', '.join(FORMATS)})")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+    stmt, names, parts = _batches(dataset, scope, bind, batch)
+    if fmt == "ndjson":
+        return _ndjson(names, parts)
+    if fmt == "csv":
+        return _csv(names, parts)
+    return _parquet(stmt, names, parts)
+
+
+def filename(dataset: str, fmt: str, **scope) -> str:
+    level, entity_id = rollups.scope_key(**scope)
+    suffix = "" if level == "all" else f"_{level}{entity_id}"
+    return f"{dataset}{suffix}.{FORMATS[fmt][1]}"
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=DATASETS)
+    parser.add_argument("--format", choices=list(FORMATS), default="ndjson")
+    parser.add_argument("--state", type=int)
+    parser.add_argument("--district", type=int)
+    parser.add_argument("--block", type=int)
+    parser.add_argument("--village", type=int)
+    parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    scope = {"state_id": args.state, "district_id": args.district, "block_id": args.block, "village_id": args.village}
+    try:
+        chunks = stream(args.dataset, args.format, **scope)
+    except ValueError as e:
+        parser.error(str(e))
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
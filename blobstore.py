@@ -0,0 +1,228 @@
+"""
+Content-addressed upload store.
+
+Har file uske sha256 se pehchani jaati hai: key = "<sha256><.ext>", aur file
+BLOB_ROOT/ab/cd/<key> pe rehti hai (do level fan-out, taaki ek directory me
+millions files na hon). Same content dobara aaye to sirf refcount badhta hai,
+naam takrane se koi evidence overwrite nahi hota. Feedback photos ki key
+original upload ke sha256 se banti hai (metadata overlay se pehle), isliye
+wahi photo dobara aaye to bhi ek hi blob rehta hai. Feedback.image_path aur
+ContractorUpdate.bill_image_path / work_image_path me yahi key store hoti hai.
+
+Purani flat uploads/<filename> files bhi resolve() se serve hoti rehti hain.
+
+Async routes store() / store_file() use karein: refcount wala SQL async
+session pe, hashing aur file move threadpool me.
+"""
+import hashlib
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import delete, event, exists, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from models import Blob
+from imaging import DERIVATIVES
+import uploads
+
+UPLOAD_DIR = "uploads"
+BLOB_ROOT = os.getenv("BLOB_ROOT", os.path.join(UPLOAD_DIR, "blobs"))
+TMP_DIR = os.path.join(BLOB_ROOT, "tmp")  # same filesystem => os.replace is atomic
+DERIVED_ROOT = os.getenv("DERIVED_ROOT", os.path.join(UPLOAD_DIR, "derived"))
+
+DERIVED_SIZES = tuple(DERIVATIVES)
+
+KEY_RE = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,5})?$")
+
+
+def extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,5}", ext) else ""
+
+
+def make_key(sha256: str, filename: str) -> str:
+    return f"{sha256}{extension(filename)}"
+
+
+def is_key(key: str) -> bool:
+    return bool(key and KEY_RE.match(key))
+
+
+def blob_path(key: str) -> str:
+    return os.path.join(BLOB_ROOT, key[0:2], key[2:4], key)
+
+
+def resolve(key: str):
+    """Filesystem path for a stored key (or a legacy flat upload name), else None."""
+    if not key:
+        return None
+    if is_key(key):
+        path = blob_path(key)
+    else:
+        # Legacy: uploads/<filename> from before the blob store
+        path = os.path.join(UPLOAD_DIR, uploads.safe_name(key))
+    return path if os.path.isfile(path) else None
+
+
+def derivative_path(key: str, size: str) -> str:
+    """On-disk cache location of a resized WebP copy (see imaging.make_derivative)."""
+    if is_key(key):
+        return os.path.join(DERIVED_ROOT, size, key[0:2], key[2:4], key + ".webp")
+    return os.path.join(DERIVED_ROOT, size, "legacy", uploads.safe_name(key) + ".webp")
+
+
+def derivative_paths(key: str, sizes) -> dict:
+    return {size: derivative_path(key, size) for size in sizes}
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(uploads.CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ----------------------------
+# Writes (caller commits)
+# ----------------------------
+def _add_ref(db: Session, key: str, size: int) -> bool:
+    """refcount += 1, creating the row if needed. True if the row is new."""
+    stmt = (
+        update(Blob)
+        .where(Blob.key == key)
+        .values(refcount=Blob.refcount + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(stmt).rowcount:
+        return False
+    try:
+        with db.begin_nested():
+            db.add(Blob(key=key, size=size, refcount=1, created_at=datetime.now()))
+        return True
+    except IntegrityError:
+        db.execute(stmt)
+        return False
+
+
+def add_ref(db: Session, key: str, size: int) -> bool:
+    """SQL half of put_file(); True if the row is new (place() must move the file in)."""
+    is_new = _add_ref(db, key, size)
+    # A rollback re-checks these keys and removes files no committed row holds
+    db.info.setdefault("blob_placed", set()).add(key)
+    return is_new
+
+
+def place(temp_path: str, key: str, is_new: bool):
+    """File half of put_file(): move the temp file to its blob path, or drop it if already there."""
+    dest = blob_path(key)
+    if is_new or not os.path.isfile(dest):
+        # New row: always place our copy, dest may be a file a released row is about to unlink
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(temp_path, dest)
+    else:
+        os.unlink(temp_path)  # identical content already stored once
+
+
+def _describe(temp_path: str, sha256: str = None):
+    return sha256 or file_sha256(temp_path), os.path.getsize(temp_path)
+
+
+def put_file(db: Session, temp_path: str, filename: str, sha256: str = None) -> str:
+    """
+    Store a finished temp file (consumed) and return its key.
+    Pass sha256 when it is already known for exactly these bytes.
+    """
+    sha256, size = _describe(temp_path, sha256)
+    key = make_key(sha256, filename)
+    place(temp_path, key, add_ref(db, key, size))
+    return key
+
+
+def put(db: Session, ingested: "uploads.IngestedFile") -> str:
+    """Store an untouched upload from uploads.ingest() (its sha256 is already known)."""
+    return put_file(db, ingested.temp_path, ingested.filename, ingested.sha256)
+
+
+async def store_file(db: AsyncSession, temp_path: str, filename: str, sha256: str = None) -> str:
+    """put_file() for async routes: only add_ref() runs on the session."""
+    sha256, size = await run_in_threadpool(_describe, temp_path, sha256)
+    key = make_key(sha256, filename)
+    is_new = await db.run_sync(add_ref, key, size)
+    await run_in_threadpool(place, temp_path, key, is_new)
+    return key
+
+
+async def store(db: AsyncSession, ingested: "uploads.IngestedFile") -> str:
+    """put() for async routes."""
+    return await store_file(db, ingested.temp_path, ingested.filename, ingested.sha256)
+
+
+def release(db: Session, key: str):
+    """Drop one reference; the row and file are reaped after commit once nobody uses it."""
+    if not is_key(key):
+        return
+    db.execute(
+        update(Blob)
+        .where(Blob.key == key)
+        .values(refcount=Blob.refcount - 1)
+        .execution_options(synchronize_session=False)
+    )
+    blob = db.get(Blob, key, populate_existing=True)
+    if blob is not None and blob.refcount <= 0:
+        # Row stays at 0 until _reap(): deleting it here would let a new upload insert the
+        # key before our unlink runs
+        db.info.setdefault("blob_unlink", set()).add(key)
+
+
+def _unlink(key: str):
+    for path in (blob_path(key), *derivative_paths(key, DERIVED_SIZES).values()):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _reap(session: Session, keys):
+    """
+    Delete the unreferenced rows of `keys` and their files, one short transaction per key.
+    The delete (or the tombstone insert for a key with no row) waits on a concurrent
+    add_ref() of the same key, and the unlink happens before our commit, so a file is
+    never removed under an upload that is still placing it.
+    """
+    if not keys:
+        return
+    table = Blob.__table__
+    # The session cannot emit SQL here (after commit / rollback), so use a fresh connection
+    with session.get_bind().connect() as conn:
+        for key in keys:
+            try:
+                with conn.begin():
+                    # Key with no row (our insert rolled back): claim it with a refcount-0 tombstone
+                    conn.execute(insert(table).from_select(
+                        ["key", "size", "refcount", "created_at"],
+                        select(literal(key), literal(0), literal(0), literal(datetime.now()))
+                        .where(~exists().where(table.c.key == key)),
+                    ))
+                    if conn.execute(delete(table).where(table.c.key == key, table.c.refcount <= 0)).rowcount:
+                        _unlink(key)
+            except IntegrityError:
+                pass  # another upload committed this key meanwhile: it is referenced
+
+
+@event.listens_for(Session, "after_commit")
+def _unlink_released(session):
+    session.info.pop("blob_placed", None)
+    _reap(session, session.info.pop("blob_unlink", None))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_placed(session, previous_transaction):
+    # Only a root rollback discards the rows; a savepoint rollback keeps the rest
+    if previous_transaction.parent is None:
+        session.info.pop("blob_unlink", None)
+        _reap(session, session.info.pop("blob_placed", None))
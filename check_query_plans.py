@@ -0,0 +1,102 @@
+"""
+Query-plan check for the hot crud queries.
+
+Fresh SQLite DB pe migrations chalata hai, har hot read path ko sample
+arguments se call karta hai, jo SQL chala use capture karke EXPLAIN QUERY
+PLAN leta hai. Kisi indexed table ka full scan ("SCAN projects", bina
+index ke) mile to woh query print hoti hai aur exit code 1.
+
+Usage:
+    python check_query_plans.py        # migrate.py ke baad, CI/deploy me
+"""
+import os
+import sys
+import tempfile
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import migrate
+import pagination
+from database import make_engine
+from routers.feedback import _find_duplicate
+
+# Tables that must only be reached through an index (states is a handful of rows)
+INDEXED_TABLES = {"districts", "blocks", "villages", "projects", "feedbacks", "contractor_updates", "contractors"}
+
+CURSOR = pagination.encode_cursor([10])
+
+HOT_QUERIES = [
+    ("districts by state", lambda db: crud.get_districts_by_state(db, 1)),
+    ("blocks by district", lambda db: crud.get_blocks_by_district(db, 1)),
+    ("villages by block", lambda db: crud.get_villages_by_block(db, 1)),
+    ("projects by village", lambda db: crud.get_projects_by_village(db, 1)),
+    ("projects by village, next page", lambda db: crud.get_projects_by_village(db, 1, cursor=CURSOR)),
+    ("project", lambda db: crud.get_project(db, 1)),
+    ("feedback of project", lambda db: crud.list_feedback(db, 1)),
+    ("problematic feedback", lambda db: crud.list_problematic_feedback(db, 1)),
+    ("problematic feedback, next page", lambda db: crud.list_problematic_feedback(db, 1, cursor=CURSOR)),
+    ("duplicate photo", lambda db: _find_duplicate(db, "0" * 64)),
+    ("village dashboard", lambda db: crud.get_village_dashboard(db, 1)),
+    ("contractor projects", lambda db: crud.get_contractor_projects(db, 1)),
+    ("updates of project", lambda db: crud.get_contractor_updates(db, 1)),
+    ("updates in village", lambda db: crud.get_all_contractor_updates(db, village_id=1)),
+    ("updates in block", lambda db: crud.get_all_contractor_updates(db, block_id=1)),
+    ("updates in district", lambda db: crud.get_all_contractor_updates(db, district_id=1)),
+]
+
+
+def full_scans(plan_rows) -> list:
+    """Plan details that read a whole INDEXED_TABLES table ("SCAN t", not via an index)."""
+    bad = []
+    for row in plan_rows:
+        detail = row[-1]
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] in INDEXED_TABLES and "INDEX" not in detail:
+            bad.append(detail)
+    return bad
+
+
+def check(engine) -> list:
+    """[(label, sql, [full scan details])] for every hot query that scans."""
+    Session = sessionmaker(bind=engine, autoflush=False)
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    failures = []
+    try:
+        for label, run in HOT_QUERIES:
+            del statements[:]
+            with Session() as db:
+                run(db)
+            captured = list(statements)
+            with engine.connect() as conn:
+                for sql, params in captured:
+                    plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+                    scans = full_scans(plan)
+                    if scans:
+                        failures.append((label, sql, scans))
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    return failures
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}", "sqlite")
+        try:
+            migrate.upgrade(engine)
+            failures = check(engine)
+        finally:
+            engine.dispose()
+
+    for label, sql, scans in failures:
+        print(f"✘ {label}: {', '.join(scans)}\n    {' '.join(sql.split())}")
+    if failures:
+        sys.exit(1)
+    print(f"✔ All {len(HOT_QUERIES)} hot queries use indexes")
@@ -0,0 +1,433 @@
+"""
+Contractor performance aggregates.
+
+contractor_stats me har contractor ke liye precomputed numbers rehte hain:
+projects delivered, average overspend, average delay, complaint rate aur
+update cadence; inse 0-5 ka Contractor.performance banta hai. Leaderboard
+sirf yeh table padhta hai, har request pe projects/updates/feedback ka join
+nahi.
+
+Incremental: Session hooks (ai/risk.py ki tarah) har flush me likhe gaye
+rows collect karte hain aur commit se pehle usi transaction me sirf unka
+delta stored row pe lagate hain (apply_deltas): naya feedback / contractor
+update ek counter, project edit us project ka purana hissa minus naya hissa.
+Isliye averages ke saath exact sums / counts bhi stored hain. Jahan delta
+nahi nikal sakta (project re-assign / delete, feedback edit, purana row jisme
+sums NULL hain) wahan us contractor ka poora refresh() hota hai. Delay
+calendar ke saath bhi badhta hai: deltas computed_at ke hisaab se lagte hain
+aur ai/alerts.AlertScheduler din me ek baar refresh() (sab contractors)
+chalata hai.
+
+Usage:
+    python contractor_stats.py rebuild
+"""
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, delete, event, func, inspect, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from models import Contractor, ContractorStats, ContractorUpdate, Feedback, Project
+from ai.risk import months_elapsed
+import rollups
+
+# Columns of Project that feed the aggregates
+STATS_INPUTS = ("contractor_id", "budget", "spent", "status", "start_year", "duration_months", "last_update_at")
+# _project_part() arguments, in order
+PART_INPUTS = ("status", "budget", "spent", "start_year", "duration_months", "last_update_at")
+
+OVERSPEND_CAP = 0.5     # 50% over budget => budget component 0
+DELAY_CAP_MONTHS = 12   # a year late => time component 0
+GAP_OK_DAYS = 15        # updates at least this often => full cadence marks
+GAP_BAD_DAYS = 60
+WEIGHTS = {"budget": 0.3, "time": 0.3, "quality": 0.25, "cadence": 0.15}
+
+
+def performance(stats: dict, has_ongoing: bool, now: datetime) -> float:
+    """0-5 from the aggregates (weighted budget / time / quality / cadence components)."""
+    if not stats["projects_total"]:
+        return 0.0
+    budget = 1 - min(stats["avg_overspend"] / OVERSPEND_CAP, 1)
+    timeliness = 1 - min(stats["avg_delay_months"] / DELAY_CAP_MONTHS, 1)
+    quality = 1 - stats["complaint_rate"]
+
+    cadence = 1.0
+    if has_ongoing:
+        # Work in progress with no recent update counts against the contractor
+        last = stats["last_update_at"]
+        gap = stats["avg_update_gap_days"] or 0
+        if last is None:
+            gap = GAP_BAD_DAYS
+        else:
+            gap = max(gap, (now - last).total_seconds() / 86400)
+        cadence = 1 - min(max(gap - GAP_OK_DAYS, 0) / (GAP_BAD_DAYS - GAP_OK_DAYS), 1)
+
+    parts = {"budget": budget, "time": timeliness, "quality": quality, "cadence": cadence}
+    return round(5 * sum(WEIGHTS[k] * v for k, v in parts.items()), 2)
+
+
+def _parse_submission(text):
+    # ContractorUpdate.submission_date is "%Y-%m-%d %H:%M" text
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M") if text else None
+    except ValueError:
+        return None
+
+
+def _delay_months(status, start_year, duration_months, last_update_at, now: datetime):
+    """Months past the planned end (0 if on time), or None when it cannot be told."""
+    if not start_year or not duration_months:
+        return None
+    if rollups.is_completed(status):
+        # No completion date is stored: the last contractor update stands in for it
+        if last_update_at is None:
+            return None
+        end = last_update_at
+    else:
+        end = now
+    return max(months_elapsed(start_year, end.date()) - duration_months, 0)
+
+
+def _project_part(status, budget, spent, start_year, months, last_update_at, now: datetime):
+    """(completed, overspend or None, delay or None): what one project adds to its contractor."""
+    over = max((spent or 0) / budget - 1, 0) if budget and budget > 0 else None
+    delay = _delay_months(status, start_year, months, last_update_at, now)
+    return rollups.is_completed(status), over, delay
+
+
+def _averages(row: dict) -> dict:
+    """Fill the derived columns of a stats row from its counters and sums."""
+    row["avg_overspend"] = round(row["overspend_sum"] / row["overspend_count"], 4) if row["overspend_count"] else 0.0
+    row["avg_delay_months"] = round(row["delay_sum"] / row["delay_count"], 2) if row["delay_count"] else 0.0
+    row["complaint_rate"] = round(row["complaints"] / row["feedback_total"], 4) if row["feedback_total"] else 0.0
+    n, first, last = row["updates_total"], row["first_update_at"], row["last_update_at"]
+    gap = (last - first).total_seconds() / 86400 / (n - 1) if n > 1 and first and last else None
+    row["avg_update_gap_days"] = round(gap, 2) if gap is not None else None
+    return row
+
+
+def compute(db: Session, contractor_ids=None, now: datetime = None):
+    """({contractor_id: stats row dict}, {contractor_id: performance}) for existing contractors."""
+    now = now or datetime.now()
+
+    def only(stmt, column):
+        return stmt if contractor_ids is None else stmt.where(column.in_(contractor_ids))
+
+    ids = list(db.scalars(only(select(Contractor.id), Contractor.id)))
+    acc = {
+        cid: {"total": 0, "completed": 0, "ongoing": False, "over": [], "delay": []}
+        for cid in ids
+    }
+
+    for cid, budget, spent, status, start_year, months, last_update_at in db.execute(only(
+        select(Project.contractor_id, Project.budget, Project.spent, Project.status,
+               Project.start_year, Project.duration_months, Project.last_update_at),
+        Project.contractor_id,
+    )):
+        a = acc.get(cid)
+        if a is None:
+            continue
+        completed, over, delay = _project_part(status, budget, spent, start_year, months, last_update_at, now)
+        a["total"] += 1
+        if completed:
+            a["completed"] += 1
+        else:
+            a["ongoing"] = True
+        if over is not None:
+            a["over"].append(over)
+        if delay is not None:
+            a["delay"].append(delay)
+
+    complaint = case((or_(Feedback.rating <= 3, Feedback.is_flagged == 1), 1), else_=0)
+    feedback = {
+        cid: (total, int(bad or 0))
+        for cid, total, bad in db.execute(only(
+            select(Project.contractor_id, func.count(Feedback.id), func.sum(complaint))
+            .join(Project, Feedback.project_id == Project.id)
+            .group_by(Project.contractor_id),
+            Project.contractor_id,
+        ))
+    }
+    updates = {
+        cid: (n, _parse_submission(first), _parse_submission(last))
+        for cid, n, first, last in db.execute(only(
+            select(ContractorUpdate.contractor_id, func.count(ContractorUpdate.id),
+                   func.min(ContractorUpdate.submission_date), func.max(ContractorUpdate.submission_date))
+            .group_by(ContractorUpdate.contractor_id),
+            ContractorUpdate.contractor_id,
+        ))
+    }
+
+    rows, scores = {}, {}
+    for cid, a in acc.items():
+        fb_total, complaints = feedback.get(cid, (0, 0))
+        n_updates, first, last = updates.get(cid, (0, None, None))
+        row = _averages({
+            "contractor_id": cid,
+            "projects_total": a["total"],
+            "projects_completed": a["completed"],
+            "overspend_sum": float(sum(a["over"])),
+            "overspend_count": len(a["over"]),
+            "delay_sum": float(sum(a["delay"])),
+            "delay_count": len(a["delay"]),
+            "feedback_total": fb_total,
+            "complaints": complaints,
+            "updates_total": n_updates,
+            "first_update_at": first,
+            "last_update_at": last,
+            "computed_at": now,
+        })
+        rows[cid] = row
+        scores[cid] = performance(row, a["ongoing"], now)
+    return rows, scores
+
+
+def refresh(db: Session, contractor_ids=None, now: datetime = None) -> int:
+    """Recompute and store these contractors (all when None). Caller commits."""
+    if contractor_ids is not None:
+        contractor_ids = sorted(set(contractor_ids))
+        if not contractor_ids:
+            return 0
+    rows, scores = compute(db, contractor_ids, now)
+
+    stale = delete(ContractorStats)
+    if contractor_ids is not None:
+        stale = stale.where(ContractorStats.contractor_id.in_(contractor_ids))
+    db.execute(stale)  # also drops rows of deleted contractors
+    if rows:
+        db.execute(insert(ContractorStats), list(rows.values()))
+        table = Contractor.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("_id")).values(performance=bindparam("_perf")),
+            [{"_id": cid, "_perf": perf} for cid, perf in scores.items()],
+        )
+    return len(rows)
+
+
+# Stored columns a delta rewrites (computed_at stays: delays are as of that moment)
+DELTA_COLUMNS = (
+    "projects_total", "projects_completed", "overspend_sum", "overspend_count", "delay_sum", "delay_count",
+    "avg_overspend", "avg_delay_months", "feedback_total", "complaints", "complaint_rate",
+    "updates_total", "first_update_at", "last_update_at", "avg_update_gap_days",
+)
+
+
+def _new_change():
+    return {"projects": [], "feedback": 0, "complaints": 0, "updates": []}
+
+
+def apply_deltas(db: Session, changes: dict, now: datetime = None) -> set:
+    """
+    Add {contractor_id: change} (see _new_change) to the stored rows and performance.
+    Returns the contractor ids with no usable row (missing, or sums not filled yet):
+    those need refresh() instead. Caller commits.
+    """
+    if not changes:
+        return set()
+    now = now or datetime.now()
+    table = ContractorStats.__table__
+    stored = {
+        row.contractor_id: dict(row._mapping)
+        for row in db.execute(select(table).where(table.c.contractor_id.in_(changes)))
+    }
+    rows, scores, missing = [], {}, set()
+    for cid, change in changes.items():
+        row = stored.get(cid)
+        if row is None or row["overspend_count"] is None or row["delay_count"] is None:
+            missing.add(cid)
+            continue
+        for sign, values in change["projects"]:
+            completed, over, delay = _project_part(*values, row["computed_at"])
+            row["projects_total"] += sign
+            row["projects_completed"] += sign * completed
+            if over is not None:
+                row["overspend_sum"] += sign * over
+                row["overspend_count"] += sign
+            if delay is not None:
+                row["delay_sum"] += sign * delay
+                row["delay_count"] += sign
+        row["feedback_total"] += change["feedback"]
+        row["complaints"] += change["complaints"]
+        for when in change["updates"]:
+            row["updates_total"] += 1
+            if when is not None:
+                row["first_update_at"] = min(row["first_update_at"] or when, when)
+                row["last_update_at"] = max(row["last_update_at"] or when, when)
+        rows.append(_averages(row))
+        scores[cid] = performance(row, row["projects_total"] > row["projects_completed"], now)
+
+    if rows:
+        db.execute(
+            update(table)
+            .where(table.c.contractor_id == bindparam("_id"))
+            .values({c: bindparam(f"_{c}") for c in DELTA_COLUMNS}),
+            [{"_id": r["contractor_id"], **{f"_{c}": r[c] for c in DELTA_COLUMNS}} for r in rows],
+        )
+        contractors = Contractor.__table__
+        db.execute(
+            update(contractors).where(contractors.c.id == bindparam("_id")).values(performance=bindparam("_perf")),
+            [{"_id": cid, "_perf": perf} for cid, perf in scores.items()],
+        )
+    return missing
+
+
+def ensure_built(db: Session):
+    """First boot on an existing DB: populate the table once."""
+    if db.query(ContractorStats).first() is None and db.query(Contractor.id).first() is not None:
+        refresh(db)
+        db.commit()
+
+
+def leaderboard(db: Session, state_id=None, district_id=None, block_id=None, village_id=None, limit: int = 50):
+    """Contractors by performance; with a scope, only those with a project in it."""
+    stmt = (
+        select(Contractor, ContractorStats)
+        .join(ContractorStats, ContractorStats.contractor_id == Contractor.id)
+        .where(ContractorStats.projects_total > 0)
+    )
+    if any((state_id, district_id, block_id, village_id)):
+        in_scope = rollups.scope_projects(
+            select(Project.id).where(Project.contractor_id == Contractor.id),
+            state_id, district_id, block_id, village_id,
+        )
+        stmt = stmt.where(in_scope.exists())
+    stmt = stmt.order_by(
+        Contractor.performance.desc(), ContractorStats.projects_completed.desc(), Contractor.id
+    ).limit(limit)
+    return db.execute(stmt).all()
+
+
+# ----------------------------
+# Change hooks (incremental refresh)
+# ----------------------------
+def _values(state, names, old: bool):
+    """Attribute values before (old) or after this flush; None if one of them was never loaded."""
+    out = []
+    for name in names:
+        added, unchanged, deleted = state.attrs[name].history
+        if unchanged:
+            out.append(unchanged[0])
+        elif old and deleted:
+            out.append(deleted[0])
+        elif not old and added:
+            out.append(added[0])
+        else:
+            return None
+    return tuple(out)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_stats_changes(session, flush_context):
+    contractors = session.info.setdefault("stats_contractors", set())  # full refresh
+    projects = session.info.setdefault("stats_projects", set())        # full refresh of their contractors
+    deltas = session.info.setdefault("stats_deltas", [])
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Project):
+            state = inspect(obj)
+            if obj in session.new:
+                if obj.contractor_id:
+                    values = tuple(state.dict.get(a) for a in PART_INPUTS)  # absent => inserted as NULL
+                    deltas.append(("project", obj.contractor_id, None, values))
+                continue
+            if obj not in session.deleted and not any(state.attrs[a].history.has_changes() for a in STATS_INPUTS):
+                continue
+            old = _values(state, STATS_INPUTS, old=True)
+            new = _values(state, STATS_INPUTS, old=False)
+            if obj in session.deleted or old is None or new is None or old[0] != new[0]:
+                # Delete / re-assignment also moves the project's feedback: recompute both contractors
+                contractors.update(c for c in (obj.contractor_id, *state.attrs.contractor_id.history.deleted) if c)
+            elif new[0]:
+                pick = [STATS_INPUTS.index(a) for a in PART_INPUTS]
+                deltas.append(("project", new[0], [old[i] for i in pick], [new[i] for i in pick]))
+        elif isinstance(obj, Feedback):
+            if not obj.project_id:
+                continue
+            if obj in session.new:
+                complaint = (obj.rating is not None and obj.rating <= 3) or obj.is_flagged == 1
+                deltas.append(("feedback", obj.project_id, int(complaint)))
+            elif obj in session.deleted or session.is_modified(obj, include_collections=False):
+                projects.add(obj.project_id)
+        elif isinstance(obj, ContractorUpdate):
+            if obj in session.new:
+                if obj.contractor_id:
+                    deltas.append(("update", obj.contractor_id, _parse_submission(obj.submission_date)))
+            else:
+                state = inspect(obj)
+                contractors.update(c for c in (obj.contractor_id, *state.attrs.contractor_id.history.deleted) if c)
+        elif isinstance(obj, Contractor) and obj in session.deleted:
+            contractors.add(obj.id)
+
+
+def _changes(session, deltas, contractors: set) -> dict:
+    """Group flushed deltas per contractor (feedback resolved through its project)."""
+    owners = {}
+    feedback_projects = {d[1] for d in deltas if d[0] == "feedback"}
+    if feedback_projects:
+        owners = dict(session.execute(
+            select(Project.id, Project.contractor_id).where(Project.id.in_(feedback_projects))
+        ).all())
+    changes = {}
+    for kind, key, *payload in deltas:
+        cid = owners.get(key) if kind == "feedback" else key
+        if not cid or cid in contractors:
+            continue  # no contractor, or already fully recomputed
+        change = changes.setdefault(cid, _new_change())
+        if kind == "project":
+            old, new = payload
+            if old is not None:
+                change["projects"].append((-1, old))
+            change["projects"].append((1, new))
+        elif kind == "feedback":
+            change["feedback"] += 1
+            change["complaints"] += payload[0]
+        else:
+            change["updates"].append(payload[0])
+    return changes
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_stats(session):
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    contractors = session.info.pop("stats_contractors", None) or set()
+    projects = session.info.pop("stats_projects", None)
+    deltas = session.info.pop("stats_deltas", None)
+    if projects:
+        contractors.update(
+            c for c in session.scalars(select(Project.contractor_id).where(Project.id.in_(projects))) if c
+        )
+    if deltas:
+        contractors |= apply_deltas(session, _changes(session, deltas, contractors))
+    if contractors:
+        refresh(session, contractors)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_stats_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop("stats_contractors", None)
+        session.info.pop("stats_projects", None)
+        session.info.pop("stats_deltas", None)
+        return
+    # Savepoint rollback: which collected deltas it undid is unknown, recompute those contractors
+    for kind, key, *payload in session.info.pop("stats_deltas", None) or ():
+        if kind == "feedback":
+            session.info.setdefault("stats_projects", set()).add(key)
+        else:
+            session.info.setdefault("stats_contractors", set()).add(key)
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal, Base, engine
+
+    if sys.argv[1:] != ["rebuild"]:
+        print(__doc__)
+        sys.exit(2)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        n = refresh(db)
+        db.commit()
+        print(f"✔ Rebuilt stats for {n} contractors")
+    finally:
+        db.close()
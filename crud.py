@@ -1,6 +1,11 @@
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from models import State, District, Block, Village, Project, Contractor, Feedback, ContractorUpdate
 import schemas
+import rollups
+import pagination
+from ai import risk  # registers the risk change hooks
+import contractor_stats  # ...and the contractor stats ones
 
 
 # ----------------------------
@@ -25,13 +30,13 @@ def get_villages_by_block(db: Session, block_id: int):
 # ----------------------------
 # PROJECT QUERIES
 # ----------------------------
-def get_projects_by_village(db: Session, village_id: int):
-    return (
+def get_projects_by_village(db: Session, village_id: int, limit: int = pagination.DEFAULT_LIMIT, cursor: str = None):
+    query = (
         db.query(Project)
         .filter(Project.village_id == village_id)
         .outerjoin(Project.contractor)   # IMPORTANT JOIN
-        .all()
     )
+    return pagination.paginate(query, [(Project.id, False)], limit, cursor)
 
 
 def get_project(db: Session, project_id: int):
@@ -47,6 +52,7 @@ def create_project(db: Session, payload: schemas.ProjectCreate):
     # Fix: Convert Pydantic model to SQLAlchemy model
     db_project = Project(**payload.dict()) 
     db.add(db_project)
+    rollups.project_changed(db, None, rollups.snapshot(db_project))
     db.commit()
     db.refresh(db_project)
     return db_project
@@ -54,8 +60,12 @@ def create_project(db: Session, payload: schemas.ProjectCreate):
 
 def update_project(db: Session, project_id: int, data: dict):
     project = db.query(Project).get(project_id)
+    if hasattr(data, "dict"):
+        data = data.dict(exclude_unset=True)
+    before = rollups.snapshot(project)
     for k, v in data.items():
         setattr(project, k, v)
+    rollups.project_changed(db, before, rollups.snapshot(project))
     db.commit()
     db.refresh(project)
     return project
@@ -64,6 +74,7 @@ def update_project(db: Session, project_id: int, data: dict):
 def delete_project(db: Session, project_id: int):
     project = db.query(Project).get(project_id)
     if project:
+        rollups.project_changed(db, rollups.snapshot(project), None)
         db.delete(project)
         db.commit()
     return {"deleted": True}
@@ -74,6 +85,7 @@ def delete_project(db: Session, project_id: int):
 # ----------------------------
 def add_feedback(db: Session, feedback: Feedback):
     db.add(feedback)
+    rollups.feedback_added(db, feedback)
     db.commit()
     db.refresh(feedback)
     return feedback
@@ -83,15 +95,16 @@ def list_feedback(db: Session, project_id: int):
     return db.query(Feedback).filter(Feedback.project_id == project_id).all()
 
 
-def list_problematic_feedback(db: Session, village_id: int):
+def list_problematic_feedback(db: Session, village_id: int, limit: int = pagination.DEFAULT_LIMIT, cursor: str = None):
     from sqlalchemy import or_
-    return (
+    query = (
         db.query(Feedback, Project)
         .join(Project, Feedback.project_id == Project.id)
         .filter(Project.village_id == village_id)
         .filter(or_(Feedback.rating <= 3, Feedback.is_flagged == 1))
-        .all()
     )
+    # Newest complaints first; rows are (Feedback, Project)
+    return pagination.paginate(query, [(Feedback.id, True)], limit, cursor, key=lambda row: [row[0].id])
 
 
 # ----------------------------
@@ -104,94 +117,80 @@ def get_officer_dashboard_stats(
     block_id: int = None, 
     village_id: int = None
 ):
-    # Base query for Projects
-    p_query = db.query(Project).join(Village).join(Block).join(District)
-
-    if village_id:
-        p_query = p_query.filter(Project.village_id == village_id)
-    elif block_id:
-        p_query = p_query.filter(Village.block_id == block_id)
-    elif district_id:
-        p_query = p_query.filter(Block.district_id == district_id)
-    elif state_id:
-        p_query = p_query.filter(District.state_id == state_id)
-
-    total_projects = p_query.count()
-    completed_projects = p_query.filter(Project.status.ilike("completed")).count()
-
-    # Base query for Feedback (Complaints)
-    # Join path: Feedback -> Project -> Village -> Block -> District -> State
-    f_query = db.query(Feedback).join(Project).join(Village).join(Block).join(District)
-
-    if village_id:
-        f_query = f_query.filter(Project.village_id == village_id)
-    elif block_id:
-        f_query = f_query.filter(Village.block_id == block_id)
-    elif district_id:
-        f_query = f_query.filter(Block.district_id == district_id)
-    elif state_id:
-        f_query = f_query.filter(District.state_id == state_id)
-    
-    from sqlalchemy import or_
-    complaints = f_query.filter(
-        or_(
-            Feedback.rating <= 3, 
-            Feedback.is_flagged == 1
-        )
-    ).count()
-
-    return {
-        "total_projects": total_projects,
-        "completed_projects": completed_projects,
-        "complaints": complaints
-    }
+    # O(1): hierarchy_rollups row, kept in sync by every project/feedback write
+    return rollups.get_stats(db, state_id, district_id, block_id, village_id)
 
-from sqlalchemy.orm import Session
 from models import Project, Feedback
 
 
-def get_village_dashboard(db: Session, village_id: int):
-    projects = db.query(Project).filter(Project.village_id == village_id).all()
-
-    feedback_count = (
-        db.query(Feedback)
-        .join(Project)
-        .filter(Project.village_id == village_id, Feedback.rating <= 3)
-        .count()
+def get_village_dashboard(
+    db: Session,
+    village_id: int,
+    include_projects: bool = True,
+    limit: int = None,
+    offset: int = 0,
+):
+    # One grouped query: per-status counts + sums, complaints as a scalar subquery.
+    # Koi ORM object nahi banta summary ke liye.
+    complaints_sq = (
+        select(func.count(Feedback.id))
+        .join(Project, Feedback.project_id == Project.id)
+        .where(Project.village_id == village_id, Feedback.rating <= 3)
+        .scalar_subquery()
+    )
+    status = func.lower(func.coalesce(Project.status, ""))
+    rows = (
+        db.query(
+            status.label("status"),
+            func.count(Project.id),
+            func.coalesce(func.sum(Project.budget), 0),
+            func.coalesce(func.sum(Project.spent), 0),
+            func.coalesce(func.sum(Project.progress_percent), 0),
+            complaints_sq,
+        )
+        .filter(Project.village_id == village_id)
+        .group_by(status)
+        .all()
     )
 
-    if not projects:
-        return {
-            "total_projects": 0,
-            "completed_projects": 0,
-            "ongoing_projects": 0,
-            "delayed_projects": 0,
-            "total_budget": 0,
-            "total_spent": 0,
-            "avg_progress": 0,
-            "complaints": feedback_count,
-            "project_list": []
-        }
-
-    total = len(projects)
-    completed = len([p for p in projects if p.status.lower() == "completed"])
-    ongoing = len([p for p in projects if p.status.lower() == "ongoing"])
-    delayed = len([p for p in projects if p.status.lower() == "delayed"])
-
-    total_budget = sum(p.budget for p in projects)
-    total_spent = sum(p.spent for p in projects)
-    avg_progress = round(sum(p.progress_percent for p in projects) / total, 1)
+    counts = {}
+    total = 0
+    total_budget = 0
+    total_spent = 0
+    progress_sum = 0
+    # No projects => no rows, and complaints are 0 too (feedback hangs off projects)
+    complaints = 0
+    for st, n, budget, spent, progress, fb_count in rows:
+        counts[st] = n
+        total += n
+        total_budget += budget
+        total_spent += spent
+        progress_sum += progress
+        complaints = fb_count
+
+    project_list = []
+    if include_projects and total:
+        query = (
+            db.query(Project)
+            .filter(Project.village_id == village_id)
+            .order_by(Project.id)
+        )
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        project_list = query.all()
 
     return {
         "total_projects": total,
-        "completed_projects": completed,
-        "ongoing_projects": ongoing,
-        "delayed_projects": delayed,
+        "completed_projects": counts.get("completed", 0),
+        "ongoing_projects": counts.get("ongoing", 0),
+        "delayed_projects": counts.get("delayed", 0),
         "total_budget": total_budget,
         "total_spent": total_spent,
-        "avg_progress": avg_progress,
-        "complaints": feedback_count,
-        "project_list": projects
+        "avg_progress": round(progress_sum / total, 1) if total else 0,
+        "complaints": complaints,
+        "project_list": project_list
     }
 
 
@@ -208,18 +207,22 @@ def create_contractor_update(
     work_path: str = None
 ):
     # 1. Create Update Record
+    now = datetime.now()
     new_update = ContractorUpdate(
         **update_data.dict(),
         bill_image_path=bill_path,
         work_image_path=work_path,
-        submission_date=datetime.now().strftime("%Y-%m-%d %H:%M")
+        submission_date=now.strftime("%Y-%m-%d %H:%M")
     )
     db.add(new_update)
     
     # 2. Update Project Spent Amount Automatically
     project = db.query(Project).get(update_data.project_id)
     if project:
+        before = rollups.snapshot(project)
         project.spent += update_data.amount_spent
+        project.last_update_at = now  # alert scan reads this instead of contractor_updates
+        rollups.project_changed(db, before, rollups.snapshot(project))
     
     db.commit()
     db.refresh(new_update)
@@ -228,8 +231,8 @@ def create_contractor_update(
 
 from sqlalchemy.orm import joinedload
 
-def get_contractor_projects(db: Session, contractor_id: int):
-    return (
+def get_contractor_projects(db: Session, contractor_id: int, limit: int = pagination.DEFAULT_LIMIT, cursor: str = None):
+    query = (
         db.query(Project)
         .filter(Project.contractor_id == contractor_id)
         .options(
@@ -238,8 +241,8 @@ def get_contractor_projects(db: Session, contractor_id: int):
             .joinedload(Block.district)
             .joinedload(District.state)
         )
-        .all()
     )
+    return pagination.paginate(query, [(Project.id, False)], limit, cursor)
 
 
 def get_contractor_updates(db: Session, project_id: int):
@@ -250,17 +253,14 @@ def get_all_contractor_updates(
     state_id: int = None,
     district_id: int = None,
     block_id: int = None,
-    village_id: int = None
+    village_id: int = None,
+    limit: int = pagination.DEFAULT_LIMIT,
+    cursor: str = None
 ):
-    query = db.query(ContractorUpdate).join(Project).join(Village).join(Block).join(District)
-
-    if village_id:
-        query = query.filter(Project.village_id == village_id)
-    elif block_id:
-        query = query.filter(Village.block_id == block_id)
-    elif district_id:
-        query = query.filter(Block.district_id == district_id)
-    elif state_id:
-        query = query.filter(District.state_id == state_id)
-
-    return query.order_by(ContractorUpdate.id.desc()).limit(50).all()
+    # Joins only as far up the hierarchy as the filter needs
+    query = rollups.scope_projects(
+        db.query(ContractorUpdate).join(Project, ContractorUpdate.project_id == Project.id),
+        state_id, district_id, block_id, village_id,
+    )
+    # Newest first; pages instead of the old silent .limit(50)
+    return pagination.paginate(query, [(ContractorUpdate.id, True)], limit, cursor)
@@ -0,0 +1,71 @@
+"""
+Async forms of the crud.py functions, for `async def` routes on get_async_db.
+
+Har function crud.py wala hi hai (same naam, same arguments, bas db ab
+AsyncSession hai); andar woh AsyncSession.run_sync se chalta hai, yaani
+queries async driver (aiosqlite / asyncpg) pe jaati hain aur event loop
+block nahi hota, threadpool bhi nahi lagta. Business logic + rollups/risk
+hooks ek hi jagah (crud.py) rehte hain.
+
+ORM objects ko event loop pe lazy-load nahi kar sakte, isliye response
+schema `schema=` se pass karo: conversion usi run_sync ke andar hota hai.
+
+    projects = await crud_async.get_projects_by_village(db, village_id, schema=schemas.ProjectResponse)
+"""
+import functools
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+import pagination
+
+
+def _convert(result, schema):
+    if schema is None or result is None:
+        return result
+    if isinstance(result, pagination.Page):
+        return pagination.Page(_convert(result.items, schema), result.next_cursor)
+    if isinstance(result, list):
+        return [schema.model_validate(item, from_attributes=True) for item in result]
+    return schema.model_validate(result, from_attributes=True)
+
+
+async def run(db: AsyncSession, fn, *args, schema=None, **kwargs):
+    """Await any sync `fn(session, *args, **kwargs)` on the async session."""
+    return await db.run_sync(lambda session: _convert(fn(session, *args, **kwargs), schema))
+
+
+def asyncify(fn):
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, schema=None, **kwargs):
+        return await run(db, fn, *args, schema=schema, **kwargs)
+    return wrapper
+
+
+# Locations
+get_states = asyncify(crud.get_states)
+get_districts_by_state = asyncify(crud.get_districts_by_state)
+get_blocks_by_district = asyncify(crud.get_blocks_by_district)
+get_villages_by_block = asyncify(crud.get_villages_by_block)
+
+# Projects
+get_projects_by_village = asyncify(crud.get_projects_by_village)
+get_project = asyncify(crud.get_project)
+create_project = asyncify(crud.create_project)
+update_project = asyncify(crud.update_project)
+delete_project = asyncify(crud.delete_project)
+
+# Feedback
+add_feedback = asyncify(crud.add_feedback)
+list_feedback = asyncify(crud.list_feedback)
+list_problematic_feedback = asyncify(crud.list_problematic_feedback)
+
+# Dashboard
+get_officer_dashboard_stats = asyncify(crud.get_officer_dashboard_stats)
+get_village_dashboard = asyncify(crud.get_village_dashboard)
+
+# Contractors
+create_contractor_update = asyncify(crud.create_contractor_update)
+get_contractor_projects = asyncify(crud.get_contractor_projects)
+get_contractor_updates = asyncify(crud.get_contractor_updates)
+get_all_contractor_updates = asyncify(crud.get_all_contractor_updates)
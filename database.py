@@ -1,15 +1,128 @@
-from sqlalchemy import create_engine
+"""
+Engine setup. Profile env se chunta hai:
+
+    DATABASE_URL     default sqlite:///./database.db (postgresql://... => postgres profile)
+    DB_PROFILE       "sqlite" (tuned, default for sqlite URLs), "sqlite-legacy"
+                     (driver defaults, sirf benchmark comparison ke liye) or "postgres"
+
+SQLite profile har naye connection pe pragmas lagata hai: WAL (readers writers
+ko block nahi karte), synchronous=NORMAL (WAL me safe, har commit pe fsync
+nahi), busy_timeout (lock pe turant "database is locked" ke bajaye wait),
+mmap + bada page cache. Tunables:
+
+    SQLITE_BUSY_TIMEOUT_MS (5000)  SQLITE_MMAP_MB (256)  SQLITE_CACHE_MB (64)
+    SQLITE_SYNCHRONOUS (NORMAL)    DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT / DB_POOL_RECYCLE
+
+Async path (get_async_db): same database through an async driver, sqlite+aiosqlite
+locally aur postgresql+asyncpg production me (ASYNC_DATABASE_URL se override),
+same profile aur pragmas ke saath. Routers isi pe chalte hain, isliye driver
+zaroori hai (requirements.txt: sqlalchemy[asyncio] + aiosqlite; PostgreSQL pe asyncpg).
+
+Benchmark: python benchmarks/db_concurrency.py
+"""
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 # IMPORTANT: yahi file name use hoga => ./database.db
-SQLALCHEMY_DATABASE_URL = "sqlite:///./database.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
+
+PROFILES = ("sqlite", "sqlite-legacy", "postgres")
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def profile_for(url: str) -> str:
+    return os.getenv("DB_PROFILE") or ("sqlite" if url.startswith("sqlite") else "postgres")
+
+
+def sqlite_pragmas() -> dict:
+    return {
+        "journal_mode": "WAL",
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+        "mmap_size": _env_int("SQLITE_MMAP_MB", 256) * 1024 * 1024,
+        "cache_size": -_env_int("SQLITE_CACHE_MB", 64) * 1024,  # negative => KiB
+        "temp_store": "MEMORY",
+    }
+
+
+def _engine_kwargs(profile: str) -> dict:
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r} (use one of {', '.join(PROFILES)})")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-)
+    if profile == "sqlite-legacy":
+        kwargs = {"connect_args": {"check_same_thread": False}}
+    elif profile == "sqlite":
+        kwargs = {
+            # busy_timeout pragma below does the waiting; driver timeout matches it
+            "connect_args": {"check_same_thread": False, "timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000},
+            "pool_size": _env_int("DB_POOL_SIZE", 10),
+            "max_overflow": _env_int("DB_MAX_OVERFLOW", 20),
+            "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        }
+    else:
+        kwargs = {
+            "pool_size": _env_int("DB_POOL_SIZE", 10),
+            "max_overflow": _env_int("DB_MAX_OVERFLOW", 20),
+            "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+            "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+            "pool_pre_ping": True,
+        }
+    return kwargs
+
+
+def _apply_pragmas_on_connect(sync_engine):
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def make_engine(url: str = None, profile: str = None, **overrides):
+    """Engine for `url` configured by profile (see module docstring)."""
+    url = url or SQLALCHEMY_DATABASE_URL
+    profile = profile or profile_for(url)
+    eng = create_engine(url, **{**_engine_kwargs(profile), **overrides})
+    if profile == "sqlite":
+        _apply_pragmas_on_connect(eng)
+    return eng
+
+
+def async_url(url: str) -> str:
+    """sqlite:/// => sqlite+aiosqlite:///, postgresql:// => postgresql+asyncpg://."""
+    scheme, rest = url.split(":", 1)
+    if scheme == "sqlite":
+        return "sqlite+aiosqlite:" + rest
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return "postgresql+asyncpg:" + rest
+    return url  # already names an async driver
+
+
+def make_async_engine(url: str = None, profile: str = None, **overrides):
+    url = url or os.getenv("ASYNC_DATABASE_URL") or async_url(SQLALCHEMY_DATABASE_URL)
+    profile = profile or profile_for(url)
+    eng = create_async_engine(url, **{**_engine_kwargs(profile), **overrides})
+    if profile == "sqlite":
+        _apply_pragmas_on_connect(eng.sync_engine)
+    return eng
+
+
+engine = make_engine()
+async_engine = make_async_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
 
 Base = declarative_base()
 
@@ -20,3 +133,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Async dependency; use with crud_async (or db.run_sync) in async def routes."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,477 @@
+"""
+Village boundary geofencing.
+
+Pehle feedback photo ko sirf village centroid se 0.5 km ke circle me check
+karte the: badi panchayat me galat flag, aur yeh bhi pata nahi chalta tha ki
+photo asal me kis village ki hai. Ab village_boundaries table me GeoJSON se
+import kiye polygons (MultiPolygon + holes) rehte hain, unka ek in-memory grid
+index banta hai (har cell -> un villages ki list jinka bbox us cell ko chhoota
+hai), aur point-in-polygon ray casting se hota hai. Jis village ka polygon
+nahi hai uske liye purana centroid circle fallback rehta hai.
+
+Index "boundaries" DataVersion se invalidate hota hai (import usko bump karta
+hai), location_cache ki tarah. Async routes check_async() use karte hain:
+SQL async session pe, polygon JSON parse aur point-in-polygon threadpool me.
+
+Config (env):
+    GEOFENCE_RADIUS_KM   fallback circle radius when a village has no polygon (0.5)
+    GEOFENCE_CELL_DEG    grid cell size in degrees (0.05, ~5.5 km)
+
+Usage:
+    python geofence.py import boundaries.geojson [id_property]   # default property: village_id
+    python geofence.py validate [report.csv]                     # re-check all historical feedback
+"""
+import csv
+import json
+import math
+import os
+import sys
+import threading
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from models import DataVersion, Feedback, Project, Village, VillageBoundary
+
+RADIUS_KM = float(os.getenv("GEOFENCE_RADIUS_KM", "0.5"))
+CELL_DEG = float(os.getenv("GEOFENCE_CELL_DEG", "0.05"))
+VERSION_KEY = "boundaries"
+EARTH_KM = 6371.0
+BATCH = 1000
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_KM * math.asin(math.sqrt(a))
+
+
+# ----------------------------
+# Geometry
+# ----------------------------
+def polygons_from_geojson(geometry: dict):
+    """GeoJSON Polygon / MultiPolygon -> list of polygons, each a list of [lng, lat] rings."""
+    kind = (geometry or {}).get("type")
+    if kind == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif kind == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        raise ValueError(f"Unsupported geometry type: {kind}")
+    out = []
+    for poly in polygons:
+        rings = [[(float(p[0]), float(p[1])) for p in ring] for ring in poly]
+        rings = [r for r in rings if len(r) >= 3]
+        if rings:
+            out.append(rings)
+    if not out:
+        raise ValueError("Empty geometry")
+    return out
+
+
+def _ring_toggles(ring, x: float, y: float) -> bool:
+    # Ray casting: odd number of edge crossings to the right => toggle
+    inside = False
+    xj, yj = ring[-1]
+    for xi, yi in ring:
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        xj, yj = xi, yi
+    return inside
+
+
+def point_in_polygons(polygons, lat: float, lng: float) -> bool:
+    """Even-odd rule over every ring, so holes (and MultiPolygon parts) just work."""
+    inside = False
+    for rings in polygons:
+        for ring in rings:
+            if _ring_toggles(ring, lng, lat):
+                inside = not inside
+    return inside
+
+
+class Boundary:
+    __slots__ = ("village_id", "bbox", "polygons", "_edges")
+
+    def __init__(self, village_id: int, bbox, polygons):
+        self.village_id = village_id
+        self.bbox = bbox  # (min_lat, min_lng, max_lat, max_lng)
+        self.polygons = polygons
+        self._edges = None
+
+    def in_bbox(self, lat: float, lng: float) -> bool:
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+
+    def contains(self, lat: float, lng: float) -> bool:
+        return self.in_bbox(lat, lng) and point_in_polygons(self.polygons, lat, lng)
+
+    def edges(self):
+        """(x1, y1, x2, y2) NumPy arrays over every ring edge, for contains_many()."""
+        if self._edges is None:
+            import numpy as np
+
+            x1, y1, x2, y2 = [], [], [], []
+            for rings in self.polygons:
+                for ring in rings:
+                    prev = ring[-1]
+                    for cur in ring:
+                        x1.append(prev[0]); y1.append(prev[1])
+                        x2.append(cur[0]); y2.append(cur[1])
+                        prev = cur
+            self._edges = tuple(np.asarray(a, dtype=np.float64) for a in (x1, y1, x2, y2))
+        return self._edges
+
+    def contains_many(self, lats, lngs, max_cells: int = 4_000_000):
+        """Vectorized even-odd test for NumPy point arrays (points x edges, chunked)."""
+        import numpy as np
+
+        x1, y1, x2, y2 = self.edges()
+        out = np.zeros(len(lats), dtype=bool)
+        step = max(1, max_cells // max(len(x1), 1))
+        for s in range(0, len(lats), step):
+            py = lats[s:s + step, None]
+            px = lngs[s:s + step, None]
+            straddle = (y1 > py) != (y2 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cross = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+            out[s:s + step] = np.count_nonzero(straddle & (px < cross), axis=1) % 2 == 1
+        return out
+
+
+def _cell(lat: float, lng: float):
+    return (math.floor(lat / CELL_DEG), math.floor(lng / CELL_DEG))
+
+
+class BoundaryIndex:
+    """Uniform grid over bounding boxes: cell -> boundaries touching it."""
+
+    def __init__(self, version: int, boundaries):
+        self.version = version
+        self.by_village = {}
+        self.grid = {}
+        for b in boundaries:
+            self.by_village[b.village_id] = b
+            lat0, lng0 = _cell(b.bbox[0], b.bbox[1])
+            lat1, lng1 = _cell(b.bbox[2], b.bbox[3])
+            for cy in range(lat0, lat1 + 1):
+                for cx in range(lng0, lng1 + 1):
+                    self.grid.setdefault((cy, cx), []).append(b)
+
+    def __len__(self):
+        return len(self.by_village)
+
+    def contains(self, village_id: int, lat: float, lng: float):
+        """True/False, or None when the village has no polygon."""
+        b = self.by_village.get(village_id)
+        return None if b is None else b.contains(lat, lng)
+
+    def locate(self, lat: float, lng: float):
+        """village_id whose polygon contains the point, else None."""
+        for b in self.grid.get(_cell(lat, lng), ()):
+            if b.contains(lat, lng):
+                return b.village_id
+        return None
+
+    def locate_many(self, lats, lngs):
+        """NumPy version of locate(): int64 array of village ids (0 = none)."""
+        import numpy as np
+
+        found = np.zeros(len(lats), dtype=np.int64)
+        if not len(lats) or not self.grid:
+            return found
+        cy = np.floor(lats / CELL_DEG).astype(np.int64)
+        cx = np.floor(lngs / CELL_DEG).astype(np.int64)
+        # Group points by grid cell (one sort), then test only that cell's candidates
+        order = np.lexsort((cx, cy))
+        keys = np.stack((cy[order], cx[order]), axis=1)
+        starts = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        for run in np.split(order, starts):
+            candidates = self.grid.get((int(cy[run[0]]), int(cx[run[0]])))
+            if not candidates:
+                continue
+            for b in candidates:
+                todo = run[found[run] == 0]
+                if not len(todo):
+                    break
+                min_lat, min_lng, max_lat, max_lng = b.bbox
+                la, ln = lats[todo], lngs[todo]
+                box = (la >= min_lat) & (la <= max_lat) & (ln >= min_lng) & (ln <= max_lng)
+                if box.any():
+                    hit = todo[box][b.contains_many(la[box], ln[box])]
+                    found[hit] = b.village_id
+        return found
+
+
+# ----------------------------
+# Process-wide index (versioned like location_cache)
+# ----------------------------
+_index = None
+_load_lock = threading.Lock()
+
+
+def current_version(db: Session) -> int:
+    row = db.get(DataVersion, VERSION_KEY, populate_existing=True)
+    return row.version if row else 0
+
+
+def load_rows(db: Session) -> list:
+    """Raw boundary rows (SQL only; build() parses them)."""
+    return db.execute(select(
+        VillageBoundary.village_id,
+        VillageBoundary.min_lat, VillageBoundary.min_lng,
+        VillageBoundary.max_lat, VillageBoundary.max_lng,
+        VillageBoundary.geometry,
+    )).all()
+
+
+def build(version: int, rows) -> BoundaryIndex:
+    return BoundaryIndex(version, [
+        Boundary(vid, (a, b, c, d), [[[tuple(p) for p in ring] for ring in poly] for poly in json.loads(geom)])
+        for vid, a, b, c, d, geom in rows
+    ])
+
+
+def load(db: Session, version: int) -> BoundaryIndex:
+    return build(version, load_rows(db))
+
+
+def cached(version: int):
+    idx = _index
+    return idx if idx is not None and idx.version == version else None
+
+
+def install(version: int, rows) -> BoundaryIndex:
+    global _index
+    with _load_lock:
+        if _index is None or _index.version != version:
+            _index = build(version, rows)
+        return _index
+
+
+def get_index(db: Session) -> BoundaryIndex:
+    version = current_version(db)
+    return cached(version) or install(version, load_rows(db))
+
+
+async def get_index_async(db: AsyncSession) -> BoundaryIndex:
+    version = await db.run_sync(current_version)
+    idx = cached(version)
+    if idx is None:
+        rows = await db.run_sync(load_rows)
+        idx = await run_in_threadpool(install, version, rows)
+    return idx
+
+
+def bump_version(db: Session):
+    table = DataVersion.__table__
+    result = db.execute(
+        update(table).where(table.c.name == VERSION_KEY).values(version=table.c.version + 1)
+    )
+    if not result.rowcount:
+        db.execute(insert(table).values(name=VERSION_KEY, version=1))
+
+
+# ----------------------------
+# Feedback check
+# ----------------------------
+def classify(idx: BoundaryIndex, village_id: int, v_lat, v_lng, lat: float, lng: float):
+    """
+    No DB access: ("ok", None), ("far", distance_km) from the centroid fallback,
+    or ("outside", village_id_containing_the_point or None).
+    """
+    inside = idx.contains(village_id, lat, lng)
+    if inside is None:
+        # No polygon imported for this village: old centroid circle
+        if v_lat is None or v_lng is None:
+            return "ok", None
+        dist = haversine_km(lat, lng, v_lat, v_lng)
+        return ("far", dist) if dist > RADIUS_KM else ("ok", None)
+    if inside:
+        return "ok", None
+    return "outside", idx.locate(lat, lng)
+
+
+def reason(village_name: str, verdict, other=None):
+    """Flag text for a classify() verdict; `other` = (id, name) of the village found, if any."""
+    kind, detail = verdict
+    if kind == "far":
+        return f"Out of Bounds: Photo taken {detail:.2f}km away from {village_name}"
+    if kind == "outside":
+        where = f"inside {other[1]} (village #{other[0]})" if other else "not inside any known village"
+        return f"Out of Bounds: Photo taken outside {village_name} boundary, {where}"
+    return None
+
+
+def check(db: Session, village: Village, lat: float, lng: float):
+    """Flag reason if (lat, lng) is outside the village, else None."""
+    verdict = classify(get_index(db), village.id, village.latitude, village.longitude, lat, lng)
+    other = None
+    if verdict[0] == "outside" and verdict[1]:
+        found = db.get(Village, verdict[1])
+        other = (found.id, found.name) if found else None
+    return reason(village.name, verdict, other)
+
+
+def _village_row(db: Session, village_id: int):
+    return db.query(Village.id, Village.name, Village.latitude, Village.longitude).filter(Village.id == village_id).first()
+
+
+async def check_async(db: AsyncSession, village_id: int, lat: float, lng: float):
+    """check() for async routes: only the SQL runs on the session, the geometry in the threadpool."""
+    village = await db.run_sync(_village_row, village_id)
+    if village is None:
+        return None
+    idx = await get_index_async(db)
+    verdict = await run_in_threadpool(classify, idx, village.id, village.latitude, village.longitude, lat, lng)
+    other = None
+    if verdict[0] == "outside" and verdict[1]:
+        found = await db.run_sync(_village_row, verdict[1])
+        other = (found.id, found.name) if found else None
+    return reason(village.name, verdict, other)
+
+
+# ----------------------------
+# Import
+# ----------------------------
+def import_geojson(db: Session, path: str, id_property: str = "village_id"):
+    """Upsert village polygons from a FeatureCollection. Returns (imported, skipped)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    features = data.get("features", []) if data.get("type") == "FeatureCollection" else [data]
+    known = set(db.scalars(select(Village.id)))
+
+    rows, skipped = [], 0
+    for feat in features:
+        raw_id = (feat.get("properties") or {}).get(id_property, feat.get("id"))
+        try:
+            village_id = int(raw_id)
+            polygons = polygons_from_geojson(feat.get("geometry"))
+        except (TypeError, ValueError) as e:
+            print(f"Skip feature {raw_id!r}: {e}")
+            skipped += 1
+            continue
+        if village_id not in known:
+            print(f"Skip feature {raw_id!r}: no village #{village_id}")
+            skipped += 1
+            continue
+        lngs = [p[0] for rings in polygons for p in rings[0]]
+        lats = [p[1] for rings in polygons for p in rings[0]]
+        rows.append({
+            "village_id": village_id,
+            "min_lat": min(lats), "min_lng": min(lngs),
+            "max_lat": max(lats), "max_lng": max(lngs),
+            "geometry": json.dumps(polygons, separators=(",", ":")),
+        })
+
+    for i in range(0, len(rows), BATCH):
+        batch = rows[i:i + BATCH]
+        db.execute(delete(VillageBoundary).where(
+            VillageBoundary.village_id.in_([r["village_id"] for r in batch])
+        ))
+        db.execute(insert(VillageBoundary), batch)
+    bump_version(db)
+    db.commit()
+    return len(rows), skipped
+
+
+# ----------------------------
+# Batch re-validation of historical feedback
+# ----------------------------
+def haversine_many(lat1, lng1, lat2, lng2):
+    import numpy as np
+
+    lat1, lng1, lat2, lng2 = (np.radians(a) for a in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(a))
+
+
+def validate(db: Session, out=None):
+    """
+    Re-check every geotagged Feedback against the current boundaries.
+    Writes one CSV row per feedback to `out` (file object) if given;
+    returns {status: count}. Status: inside / outside (polygon), near / far
+    (centroid fallback), unknown (village has no polygon and no centroid).
+    """
+    import numpy as np
+
+    rows = db.execute(
+        select(Feedback.id, Feedback.latitude, Feedback.longitude,
+               Project.village_id, Village.latitude, Village.longitude)
+        .join(Project, Feedback.project_id == Project.id)
+        .outerjoin(Village, Project.village_id == Village.id)
+        .where(Feedback.latitude != None, Feedback.longitude != None)
+        .order_by(Feedback.id)
+    ).all()
+    nan = float("nan")
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    lat = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+    lng = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+    village = np.fromiter((r[3] or 0 for r in rows), dtype=np.int64, count=len(rows))
+    v_lat = np.fromiter((nan if r[4] is None else r[4] for r in rows), dtype=np.float64, count=len(rows))
+    v_lng = np.fromiter((nan if r[5] is None else r[5] for r in rows), dtype=np.float64, count=len(rows))
+
+    idx = get_index(db)
+    dist = haversine_many(lat, lng, v_lat, v_lng)
+    found = idx.locate_many(lat, lng)  # report column only: first match where polygons overlap
+    has_polygon = np.isin(village, np.fromiter(idx.by_village, dtype=np.int64, count=len(idx)))
+
+    # Same test as check(): each point against its own village's polygon, grouped by village
+    inside = np.zeros(len(rows), dtype=bool)
+    polygon_rows = np.flatnonzero(has_polygon)
+    order = polygon_rows[np.argsort(village[polygon_rows], kind="stable")]
+    for run in np.split(order, np.flatnonzero(np.diff(village[order])) + 1):
+        if not len(run):
+            continue
+        b = idx.by_village[int(village[run[0]])]
+        min_lat, min_lng, max_lat, max_lng = b.bbox
+        la, ln = lat[run], lng[run]
+        box = (la >= min_lat) & (la <= max_lat) & (ln >= min_lng) & (ln <= max_lng)
+        inside[run[box]] = b.contains_many(la[box], ln[box])
+
+    status = np.full(len(rows), "unknown", dtype=object)
+    fallback = ~has_polygon & ~np.isnan(dist)
+    status[fallback & (dist <= RADIUS_KM)] = "near"
+    status[fallback & (dist > RADIUS_KM)] = "far"
+    status[has_polygon & inside] = "inside"
+    status[has_polygon & ~inside] = "outside"
+
+    if out is not None:
+        writer = csv.writer(out)
+        writer.writerow(["feedback_id", "village_id", "found_village_id", "distance_km", "status"])
+        for i in range(len(rows)):
+            writer.writerow([
+                int(ids[i]), int(village[i]) or "", int(found[i]) or "",
+                "" if np.isnan(dist[i]) else f"{dist[i]:.3f}", status[i],
+            ])
+    labels, counts = np.unique(status.astype(str), return_counts=True) if len(rows) else ([], [])
+    return {str(k): int(v) for k, v in zip(labels, counts)}
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, Base, engine
+
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd not in ("import", "validate") or (cmd == "import" and len(sys.argv) < 3):
+        print(__doc__)
+        sys.exit(2)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if cmd == "import":
+            done, skipped = import_geojson(db, *sys.argv[2:4])
+            print(f"✔ Imported {done} village boundaries ({skipped} skipped)")
+        else:
+            report = sys.argv[2] if len(sys.argv) > 2 else None
+            if report:
+                with open(report, "w", newline="", encoding="utf-8") as f:
+                    counts = validate(db, f)
+                print(f"✔ Report written to {report}")
+            else:
+                counts = validate(db, sys.stdout)
+            print(", ".join(f"{k}: {v}" for k, v in sorted(counts.items())) or "No geotagged feedback")
+    finally:
+        db.close()
@@ -0,0 +1,155 @@
+"""
+CPU-bound image work for uploads, run on a bounded worker pool.
+
+async routes (jaise feedback.add_feedback) PIL decode / fake check / overlay
+seedha event loop pe nahi chalate; `await run_cpu(fn, ...)` se yahan ke pool
+pe bhejte hain, taaki ek badi photo baaki requests ko block na kare.
+
+Config (env):
+    IMAGE_POOL      "process" (default, scales with cores) or "thread"
+    IMAGE_WORKERS   pool size (default: CPU count)
+"""
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+import metrics
+
+POOL_KIND = os.getenv("IMAGE_POOL", "process")
+POOL_SIZE = int(os.getenv("IMAGE_WORKERS", "0")) or (os.cpu_count() or 2)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if POOL_KIND == "thread":
+                    _pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="image")
+                else:
+                    # spawn: the server already runs background threads, fork is unsafe then
+                    _pool = ProcessPoolExecutor(
+                        max_workers=POOL_SIZE, mp_context=multiprocessing.get_context("spawn")
+                    )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def run_cpu(fn, *args):
+    """Run a picklable top-level function on the image pool without blocking the loop."""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        return await loop.run_in_executor(get_pool(), fn, *args)
+    finally:
+        metrics.observe_image(fn.__name__, time.perf_counter() - started)
+
+
+# ----------------------------
+# Tasks (top-level so the process pool can pickle them)
+# ----------------------------
+@lru_cache(maxsize=1)
+def _overlay_font():
+    from PIL import ImageFont
+    try:
+        # Try standard fonts if available, else default
+        return ImageFont.truetype("arial.ttf", 20)
+    except Exception:
+        return ImageFont.load_default()
+
+
+def overlay_metadata(path: str, latitude: float = None, longitude: float = None):
+    """Stamp time (and GPS if given) on the image, overwriting it in place."""
+    from PIL import Image, ImageDraw
+
+    try:
+        img = Image.open(path)
+        draw = ImageDraw.Draw(img)
+
+        # Simple timestamp & location text
+        text = f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+        if latitude and longitude:
+            text += f"Lat: {latitude:.4f}, Long: {longitude:.4f}"
+
+        # Draw text (Top-left, Red color for visibility)
+        draw.text((10, 10), text, fill="red", font=_overlay_font())
+
+        # Overwrite original (explicit format: path may be an extension-less temp file)
+        img.save(path, format=img.format)
+    except Exception as e:
+        print(f"Overlay Failed: {e}")
+
+
+def process_feedback_image(path: str, latitude: float = None, longitude: float = None, check_fake: bool = True):
+    """
+    Perceptual hash + fake-image heuristics (both on the untouched original),
+    followed by the metadata overlay.
+    Returns {"phash": str | None, "fake": bool, "reason": str | None}.
+    """
+    from ai.fake_image import analyze_fake_image
+    from ai.similarity import dhash, to_hex
+
+    try:
+        phash = to_hex(dhash(path))
+    except Exception as e:
+        print(f"pHash Failed: {e}")
+        phash = None
+    fake, reason = (analyze_fake_image(path) if check_fake else (False, None))
+    overlay_metadata(path, latitude, longitude)
+    return {"phash": phash, "fake": fake, "reason": reason}
+
+
+# Derivative sizes: longest side in px, WebP quality
+DERIVATIVES = {
+    "thumb": (320, 70),
+    "medium": (1024, 80),
+}
+
+
+def make_derivative(src: str, dest: str, size: str):
+    """Downscaled WebP copy of src at dest (written atomically). Returns dest."""
+    from PIL import Image, ImageOps
+
+    max_side, quality = DERIVATIVES[size]
+    with Image.open(src) as img:
+        img = ImageOps.exif_transpose(img)  # phone photos: honour orientation before EXIF is dropped
+        img.draft("RGB", (max_side, max_side))  # JPEG: decode at reduced scale
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                img.save(out, format="WEBP", quality=quality, method=4)
+            os.replace(tmp, dest)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return dest
+
+
+def make_derivatives(src: str, dests: dict):
+    """{size: dest_path} -> generate every missing derivative (upload-time warm-up)."""
+    for size, dest in dests.items():
+        if not os.path.isfile(dest):
+            try:
+                make_derivative(src, dest, size)
+            except Exception as e:
+                print(f"Derivative {size} Failed: {e}")
@@ -0,0 +1,274 @@
+"""
+Bulk import of the LGD (Local Government Directory) location directory.
+
+Input me ek row per village hoti hai, poori hierarchy ke saath (LGD village
+directory export jaisa):
+
+    state_code,state_name,district_code,district_name,block_code,block_name,village_code,village_name[,latitude,longitude]
+
+CSV ya JSON Lines (.jsonl / .ndjson, har line ek object). Headers case aur
+spaces ignore karke match hote hain ("State Code" == state_code,
+"Sub-District Name (In English)" == block_name). File stream hoti hai, poori memory me
+nahi aati.
+
+Parent codes in-memory maps (lgd_code -> id) se resolve hote hain aur naye
+rows ko id yahin milti hai, isliye inserts bina RETURNING ke bade executemany
+batches me jaate hain, poora import ek transaction me. PostgreSQL pe har
+batch ke baad serial sequence max(id) tak aage kar dete hain (setval), warna
+app ke agle insert ko wahi id milti. Default mode sirf naye codes insert
+karta hai; --upsert existing rows ka name / parent / coordinates compare
+karke sirf jo alag hai wahi update karta hai. Directory se gayab rows
+delete nahi hote (projects unse jude ho sakte hain), aur bina lgd_code wale
+purane rows (seed_locations.py) ko import chhoota nahi.
+
+Usage:
+    python import_locations.py villages.csv [--upsert] [--dry-run] [--batch 5000]
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import time
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from models import Block, District, State, Village
+import location_cache
+import response_cache
+import rollups
+
+try:
+    import orjson
+except ImportError:  # optional, plain json works too
+    orjson = None
+
+BATCH = 5000
+
+# Accepted header spellings per field (after normalizing: lowercase, non-alphanumerics => "_", no "_in_english")
+FIELDS = {
+    "state_code": ("state_code", "state_lgd_code"),
+    "state_name": ("state_name",),
+    "district_code": ("district_code", "district_lgd_code"),
+    "district_name": ("district_name",),
+    "block_code": ("block_code", "block_lgd_code", "sub_district_code", "subdistrict_code"),
+    "block_name": ("block_name", "sub_district_name", "subdistrict_name"),
+    "village_code": ("village_code", "village_lgd_code"),
+    "village_name": ("village_name",),
+    "latitude": ("latitude", "lat"),
+    "longitude": ("longitude", "lng", "lon"),
+}
+OPTIONAL = ("latitude", "longitude")
+
+
+def _normalize(header: str) -> str:
+    name = re.sub(r"[^0-9a-z]+", "_", header.strip().lower()).strip("_")
+    return name[:-len("_in_english")] if name.endswith("_in_english") else name
+
+
+def _columns(headers) -> dict:
+    """field -> original header name; raises ValueError if a required field is missing."""
+    by_norm = {_normalize(h): h for h in headers}
+    found = {}
+    for field, spellings in FIELDS.items():
+        header = next((by_norm[s] for s in spellings if s in by_norm), None)
+        if header is None and field not in OPTIONAL:
+            raise ValueError(f"Missing column {field!r} (got: {', '.join(headers)})")
+        found[field] = header
+    return found
+
+
+def read_rows(path: str):
+    """Yield one dict per village row, keyed by FIELDS, from a CSV or JSON Lines file."""
+    if path.endswith((".jsonl", ".ndjson")):
+        loads = orjson.loads if orjson else json.loads
+        columns = None
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                obj = loads(line)
+                columns = columns or _columns(list(obj))
+                yield {field: obj.get(header) if header else None for field, header in columns.items()}
+    else:
+        # utf-8-sig: Excel exports start with a BOM
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            headers = next(reader)
+            index = {h: i for i, h in enumerate(headers)}
+            picks = [(field, index[h] if h else None) for field, h in _columns(headers).items()]
+            for values in reader:
+                yield {field: values[i] if i is not None and i < len(values) else None for field, i in picks}
+
+
+def _code(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _coord(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class _Level:
+    """lgd_code -> row map of one level plus its pending insert / update batches."""
+
+    def __init__(self, db: Session, model, parent_attr: str = None, coords: bool = False):
+        self.model = model
+        self.table = model.__table__
+        self.parent_attr = parent_attr
+        self.coords = coords
+        # value columns compared in upsert mode, same order as the tuples in self.known
+        self.value_cols = ["name"] + ([parent_attr] if parent_attr else []) + (["latitude", "longitude"] if coords else [])
+
+        cols = [self.table.c.id, self.table.c.lgd_code] + [self.table.c[c] for c in self.value_cols]
+        self.known = {
+            row[1]: (row[0], tuple(row[2:]))
+            for row in db.execute(select(*cols).where(self.table.c.lgd_code.isnot(None)))
+        }
+        self.next_id = (db.scalar(select(func.max(self.table.c.id))) or 0) + 1
+        self.inserts = []
+        self.updates = {}
+        self.inserted = self.updated = 0
+        self.moved = False
+
+    def resolve(self, code: int, values: tuple, upsert: bool) -> int:
+        current = self.known.get(code)
+        if current is None:
+            row_id = self.next_id
+            self.next_id += 1
+            self.inserts.append({"id": row_id, "lgd_code": code, **dict(zip(self.value_cols, values))})
+            self.known[code] = (row_id, values)
+            self.inserted += 1
+            return row_id
+
+        row_id, stored = current
+        if upsert and values != stored:
+            if self.coords:
+                # Missing coordinates in the input keep the stored ones
+                values = values[:-2] + tuple(v if v is not None else s for v, s in zip(values[-2:], stored[-2:]))
+            if values != stored:
+                if self.parent_attr and values[1] != stored[1]:
+                    self.moved = True
+                if row_id not in self.updates:
+                    self.updated += 1
+                self.updates[row_id] = {"_id": row_id, **{f"_{c}": v for c, v in zip(self.value_cols, values)}}
+                self.known[code] = (row_id, values)
+        return row_id
+
+    def flush_inserts(self, db: Session):
+        if self.inserts:
+            db.execute(insert(self.table), self.inserts)
+            self.inserts = []
+            if db.get_bind().dialect.name == "postgresql":
+                # Explicit ids never advance the serial sequence
+                db.execute(select(func.setval(
+                    func.pg_get_serial_sequence(self.table.name, "id"),
+                    select(func.max(self.table.c.id)).scalar_subquery(),
+                )))
+
+    def flush_updates(self, db: Session):
+        if self.updates:
+            stmt = (
+                update(self.table)
+                .where(self.table.c.id == bindparam("_id"))
+                .values({c: bindparam(f"_{c}") for c in self.value_cols})
+            )
+            db.execute(stmt, list(self.updates.values()))
+            self.updates = {}
+
+
+def import_locations(db: Session, path: str, upsert: bool = False, batch: int = BATCH) -> dict:
+    """
+    Stream `path` into the location tables (caller commits). Returns per-level counts;
+    result["moved"] means rows changed parent, so the officer rollups need rollups.rebuild().
+    """
+    started = time.perf_counter()
+    levels = {
+        "states": _Level(db, State),
+        "districts": _Level(db, District, "state_id"),
+        "blocks": _Level(db, Block, "district_id"),
+        "villages": _Level(db, Village, "block_id", coords=True),
+    }
+    ordered = list(levels.values())  # parents before children (FK order)
+    states, districts, blocks, villages = ordered
+
+    def flush():
+        for level in ordered:
+            level.flush_inserts(db)
+        for level in ordered:
+            level.flush_updates(db)
+
+    rows = skipped = 0
+    for row in read_rows(path):
+        codes = [_code(row[f"{level}_code"]) for level in ("state", "district", "block", "village")]
+        if None in codes or not all(row[f"{level}_name"] for level in ("state", "district", "block", "village")):
+            skipped += 1
+            continue
+        rows += 1
+        state_id = states.resolve(codes[0], (row["state_name"].strip(),), upsert)
+        district_id = districts.resolve(codes[1], (row["district_name"].strip(), state_id), upsert)
+        block_id = blocks.resolve(codes[2], (row["block_name"].strip(), district_id), upsert)
+        villages.resolve(
+            codes[3],
+            (row["village_name"].strip(), block_id, _coord(row["latitude"]), _coord(row["longitude"])),
+            upsert,
+        )
+        if any(len(level.inserts) >= batch or len(level.updates) >= batch for level in ordered):
+            flush()
+    flush()
+
+    changed = any(level.inserted or level.updated for level in ordered)
+    if any(level.updated for level in ordered):
+        response_cache.invalidate_all_on_commit(db)  # renamed / moved locations sit inside cached lists
+    if changed:
+        location_cache.bump_version(db)  # Core writes skip the ORM flush hook
+
+    result = {name: {"inserted": level.inserted, "updated": level.updated} for name, level in levels.items()}
+    result.update(
+        rows=rows, skipped=skipped, seconds=round(time.perf_counter() - started, 2),
+        moved=any(level.moved for level in ordered),
+    )
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+    import migrate
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV or JSON Lines village directory")
+    parser.add_argument("--upsert", action="store_true", help="also update existing codes whose data differs")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change, write nothing")
+    parser.add_argument("--batch", type=int, default=BATCH, help="rows per executemany")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.path):
+        parser.error(f"no such file: {args.path}")
+    migrate.check()
+    db = SessionLocal()
+    try:
+        result = import_locations(db, args.path, upsert=args.upsert, batch=args.batch)
+        if args.dry_run:
+            db.rollback()
+        elif result["moved"]:
+            rollups.rebuild(db)  # re-aggregates under the new parents, commits the import too
+        else:
+            db.commit()
+    except ValueError as e:
+        db.rollback()
+        print(f"✘ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    for name in ("states", "districts", "blocks", "villages"):
+        print(f"{name:10} +{result[name]['inserted']} inserted, {result[name]['updated']} updated")
+    print(f"{result['rows']} rows ({result['skipped']} skipped) in {result['seconds']}s" + (" [dry run]" if args.dry_run else ""))
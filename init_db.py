@@ -1,6 +1,9 @@
 from database import Base, engine
+import migrate
+import models  # noqa: F401
 
 print("⏳ Creating DB Schema...")
 Base.metadata.drop_all(bind=engine)
-Base.metadata.create_all(bind=engine)
+migrate.schema_migrations.drop(bind=engine, checkfirst=True)
+migrate.upgrade(engine)
 print("✔ Database Schema Created Successfully!")
@@ -0,0 +1,280 @@
+"""
+In-process cache for the State/District/Block/Village hierarchy.
+
+Poori hierarchy ek baar memory me load hoti hai (har level ke liye parent
+ke hisaab se sorted compact arrays) aur /locations/* endpoints wahi se serve
+hote hain. Invalidation "locations" DataVersion counter se hoti hai: koi bhi
+location write usko bump karta hai, aur har worker request pe sirf woh ek
+row (primary key) padhta hai, isliye multiple uvicorn workers bhi kabhi
+stale data nahi dikhate.
+
+Async routes get_snapshot_async() use karein: version aur rows async session
+pe padhe jaate hain, lekin ~650k villages ka sort/array build threadpool me
+hota hai, event loop pe nahi.
+"""
+import gzip
+import json
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from sqlalchemy import event, update, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from models import State, District, Block, Village, DataVersion
+
+try:
+    import orjson
+except ImportError:  # optional, plain json works too
+    orjson = None
+
+VERSION_KEY = "locations"
+LOCATION_MODELS = (State, District, Block, Village)
+LEVEL_ORDER = ("states", "districts", "blocks", "villages")
+
+
+class Level:
+    """One hierarchy level as parallel arrays sorted by (parent_id, id)."""
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda r: (r[2], r[0]))
+        self.ids = array("q", (r[0] for r in rows))
+        self.names = [r[1] for r in rows]
+        self.parents = array("q", (r[2] for r in rows))
+        # id -> position lookup (bisect), for breadcrumbs
+        order = sorted(range(len(rows)), key=self.ids.__getitem__)
+        self.sorted_ids = array("q", (self.ids[i] for i in order))
+        self.positions = array("q", order)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def find(self, id_: int):
+        """Position of id_ in this level, or None."""
+        i = bisect_left(self.sorted_ids, id_)
+        if i < len(self.sorted_ids) and self.sorted_ids[i] == id_:
+            return self.positions[i]
+        return None
+
+    def children(self, parent_id: int):
+        lo = bisect_left(self.parents, parent_id)
+        hi = bisect_right(self.parents, parent_id, lo)
+        return range(lo, hi)
+
+    def items(self, parent_id: int):
+        return [{"id": self.ids[i], "name": self.names[i]} for i in self.children(parent_id)]
+
+
+class HierarchySnapshot:
+    def __init__(self, version: int, states, districts, blocks, villages):
+        self.version = version
+        self.levels = {
+            "states": Level(states),
+            "districts": Level(districts),
+            "blocks": Level(blocks),
+            "villages": Level(villages),
+        }
+        self._payloads = {}
+        self._trees = {}
+        self._crumbs = {}
+        self._lock = threading.Lock()
+
+    def etag(self, kind: str, parent_id: int = 0) -> str:
+        return f'"loc-v{self.version}-{kind}-{parent_id}"'
+
+    def payload(self, kind: str, parent_id: int = 0) -> bytes:
+        """Serialized children list, memoized per (kind, parent) for this version."""
+        key = (kind, parent_id)
+        body = self._payloads.get(key)
+        if body is None:
+            body = json.dumps(
+                self.levels[kind].items(parent_id), ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+            with self._lock:
+                self._payloads[key] = body
+        return body
+
+    def columns(self, state_id: int = None):
+        """Columnar subtree: {level: {"id": [...], "name": [...], "parent": [...]}}."""
+        states = self.levels["states"]
+        if state_id is None:
+            picked = [range(len(states))]
+        else:
+            picked = [range(i, i + 1) for i, s_id in enumerate(states.ids) if s_id == state_id]
+
+        tree = {"version": self.version}
+        for depth, kind in enumerate(LEVEL_ORDER):
+            level = self.levels[kind]
+            if depth and state_id is not None:
+                # Children of everything picked one level up (each parent is one contiguous run)
+                parent_ids = tree[LEVEL_ORDER[depth - 1]]["id"]
+                picked = [level.children(p) for p in parent_ids]
+            elif depth:
+                picked = [range(len(level))]
+            ids, names, parents = [], [], []
+            for run in picked:
+                ids.extend(level.ids[run.start:run.stop])
+                names.extend(level.names[run.start:run.stop])
+                parents.extend(level.parents[run.start:run.stop])
+            tree[kind] = {"id": ids, "name": names} if depth == 0 else {"id": ids, "name": names, "parent": parents}
+        return tree
+
+    def _entry(self, kind: str, id_: int):
+        """(id, name, parent_id or None) of one row, or None."""
+        level = self.levels[kind]
+        pos = level.find(id_) if id_ else None
+        if pos is None:
+            return None
+        return level.ids[pos], level.names[pos], level.parents[pos] or None
+
+    def breadcrumb(self, village_id: int):
+        """
+        Village -> block -> district -> state as nested dicts (schemas.VillageNested shape),
+        from the snapshot arrays (no query); None for an unknown village. Memoized per village.
+        """
+        if village_id in self._crumbs:
+            return self._crumbs[village_id]
+        crumb = None
+        village = self._entry("villages", village_id)
+        if village:
+            block = self._entry("blocks", village[2])
+            district = self._entry("districts", block[2]) if block else None
+            state = self._entry("states", district[2]) if district else None
+            state = {"id": state[0], "name": state[1]} if state else None
+            district = {"id": district[0], "name": district[1], "state_id": district[2], "state": state} if district else None
+            block = {"id": block[0], "name": block[1], "district_id": block[2], "district": district} if block else None
+            crumb = {"id": village[0], "name": village[1], "block_id": village[2], "block": block}
+        with self._lock:
+            self._crumbs[village_id] = crumb
+        return crumb
+
+    def tree(self, state_id: int = None):
+        """
+        (json_bytes, gzip_bytes) for the subtree, built once per version and scope.
+        Callers pass only existing state ids (the cache has one entry per scope).
+        """
+        cached = self._trees.get(state_id)
+        if cached is None:
+            cols = self.columns(state_id)
+            if orjson is not None:
+                raw = orjson.dumps(cols)
+            else:
+                raw = json.dumps(cols, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            cached = (raw, gzip.compress(raw, compresslevel=6, mtime=0))
+            with self._lock:
+                self._trees[state_id] = cached
+        return cached
+
+
+_snapshot = None
+_load_lock = threading.Lock()
+
+
+def current_version(db: Session) -> int:
+    row = db.get(DataVersion, VERSION_KEY, populate_existing=True)
+    return row.version if row else 0
+
+
+def load_rows(db: Session):
+    """(states, districts, blocks, villages) as (id, name, parent_id) rows; SQL only."""
+    # States have no parent; 0 keeps the arrays homogeneous
+    return (
+        [(i, n, 0) for i, n in db.query(State.id, State.name)],
+        [(i, n, p or 0) for i, n, p in db.query(District.id, District.name, District.state_id)],
+        [(i, n, p or 0) for i, n, p in db.query(Block.id, Block.name, Block.district_id)],
+        [(i, n, p or 0) for i, n, p in db.query(Village.id, Village.name, Village.block_id)],
+    )
+
+
+def load(db: Session, version: int) -> HierarchySnapshot:
+    return HierarchySnapshot(version, *load_rows(db))
+
+
+def cached(version: int):
+    """This worker's snapshot if it is at `version`, else None."""
+    snap = _snapshot
+    return snap if snap is not None and snap.version == version else None
+
+
+def install(version: int, rows) -> HierarchySnapshot:
+    """Build the snapshot from load_rows() output (CPU work) unless another caller already did."""
+    global _snapshot
+    with _load_lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = HierarchySnapshot(version, *rows)
+        return _snapshot
+
+
+def get_snapshot(db: Session) -> HierarchySnapshot:
+    version = current_version(db)
+    return cached(version) or install(version, load_rows(db))
+
+
+async def get_snapshot_async(db: AsyncSession) -> HierarchySnapshot:
+    version = await db.run_sync(current_version)
+    snap = cached(version)
+    if snap is None:
+        rows = await db.run_sync(load_rows)
+        snap = await run_in_threadpool(install, version, rows)
+    return snap
+
+
+def breadcrumb(db: Session, village_id: int):
+    """
+    HierarchySnapshot.breadcrumb() of the current snapshot when this worker has it loaded
+    (never built here: async routes warm it with get_snapshot_async), else one small query.
+    """
+    snap = cached(current_version(db))
+    if snap is not None:
+        return snap.breadcrumb(village_id)
+    row = (
+        db.query(
+            Village.id, Village.name, Village.block_id, Block.name,
+            Block.district_id, District.name, District.state_id, State.name,
+        )
+        .outerjoin(Block, Village.block_id == Block.id)
+        .outerjoin(District, Block.district_id == District.id)
+        .outerjoin(State, District.state_id == State.id)
+        .filter(Village.id == village_id)
+        .first()
+    )
+    crumb = None
+    if row:
+        v_id, v_name, b_id, b_name, d_id, d_name, s_id, s_name = row
+        state = {"id": s_id, "name": s_name} if s_name is not None else None
+        district = {"id": d_id, "name": d_name, "state_id": s_id, "state": state} if d_name is not None else None
+        block = {"id": b_id, "name": b_name, "district_id": d_id, "district": district} if b_name is not None else None
+        crumb = {"id": v_id, "name": v_name, "block_id": b_id, "block": block}
+    return crumb
+
+
+def invalidate():
+    """Drop this worker's copy (others notice via the version counter)."""
+    global _snapshot
+    _snapshot = None
+
+
+def _bump(connection):
+    table = DataVersion.__table__
+    result = connection.execute(
+        update(table).where(table.c.name == VERSION_KEY).values(version=table.c.version + 1)
+    )
+    if not result.rowcount:
+        connection.execute(insert(table).values(name=VERSION_KEY, version=1))
+
+
+def bump_version(db: Session):
+    """Call after bulk/Core writes that bypass the ORM (caller commits)."""
+    _bump(db.connection())
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_location_write(session, flush_context):
+    # Any ORM insert/update/delete of a location row bumps the version in the same transaction
+    dirty = (o for o in session.dirty if session.is_modified(o, include_collections=False))
+    for obj in (*session.new, *dirty, *session.deleted):
+        if isinstance(obj, LOCATION_MODELS):
+            _bump(session.connection())
+            return
@@ -1,12 +1,24 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from database import Base, engine
+from database import engine, async_engine, SessionLocal
+import metrics
+import migrate
 import models  # models import zaroori hai
-from routers import locations, projects, feedback, dashboard, ai
+import response_cache
+import rollups
+import contractor_stats
+import imaging
+import uploads
+from routers import locations, projects, feedback, dashboard, ai, export
 
-# ✅ IMPORTANT: yahi tables create karega agar DB khali ho
-Base.metadata.create_all(bind=engine)
+# Schema deploy pe `python migrate.py` banata hai (StartApp.bat); yahan sirf check
+migrate.check(engine)
+
+# Officer stats rollups + contractor stats: purane DB pe pehli baar build karo
+with SessionLocal() as _db:
+    rollups.ensure_built(_db)
+    contractor_stats.ensure_built(_db)
 
 app = FastAPI(
     title="Bharat Panchayat Transparency - Backend",
@@ -19,23 +31,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # keyset pagination (pagination.py)
+)
+
+# Oversized uploads ko body parse hone se pehle hi 413
+app.add_middleware(
+    uploads.RequestSizeLimitMiddleware,
+    paths=("/feedback/add", "/contractors/update"),
 )
 
+# Sabse bahar: latency + per-request SQL count/time by route (GET /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
 # Routers mount
 app.include_router(locations.router)
 app.include_router(projects.router)
 app.include_router(feedback.router)
 app.include_router(dashboard.router)
 app.include_router(ai.router)
+app.include_router(export.router)
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    from ai.alerts import backfill_last_update
+    from ai import similarity
+    with SessionLocal() as db:
+        backfill_last_update(db)
+        similarity.index.sync(db)  # load the near-duplicate hamming index
+    ai.alert_dispatcher.start()
+    ai.alert_scheduler.start()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    ai.alert_scheduler.stop()
+    ai.alert_dispatcher.stop()
+    imaging.shutdown_pool()
 
 
 @app.get("/")
 def root():
     return {"message": "Bharat Panchayat Transparency API OK"}
 
-from fastapi.staticfiles import StaticFiles
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+@app.get("/cache/stats")
+def cache_stats():
+    # Response cache hit/miss counters of this worker (response_cache.py)
+    return response_cache.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    # Prometheus text format, figures of this worker (metrics.py)
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# /uploads/{key}: blob store keys (immutable cache) + legacy flat files
+from routers import media
+app.include_router(media.router)
 
 from routers import contractor
 app.include_router(contractor.router)
@@ -0,0 +1,252 @@
+"""
+Per-route request metrics in Prometheus text format (GET /metrics).
+
+MetricsMiddleware har HTTP request ke liye ek RequestStats contextvar me
+rakhta hai; engine event hooks (instrument_engine) us request ke har SQL
+statement ka count aur time usi me jodte hain. Sync routes threadpool me aur
+async routes greenlet me chalte hain, dono me contextvar wahi object dikhata
+hai. Request khatam hone par route template ("/projects/{project_id}", raw
+path nahi, taaki label count bounded rahe) ke label se histograms update
+hote hain:
+
+    http_request_duration_seconds{method,route,status}
+    db_statements_per_request{route}       db_seconds_per_request{route}
+    upload_bytes{route}                    (uploads.ingest)
+    image_processing_seconds{task}         (imaging.run_cpu, queue wait included)
+    db_background_statements_total / db_background_seconds_total   (scheduler, dispatcher, startup)
+
+Figures are per worker process, like /cache/stats.
+
+Slow-request log (opt-in):
+
+    METRICS_SLOW_REQUEST_MS   unset = off; requests at least this slow are
+                              printed with every SQL statement they ran
+    METRICS_SLOW_SQL_MAX      statements kept per request for that log (200)
+"""
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_slow_ms = os.getenv("METRICS_SLOW_REQUEST_MS")
+SLOW_REQUEST_SECONDS = float(_slow_ms) / 1000 if _slow_ms else None
+SLOW_SQL_MAX = int(os.getenv("METRICS_SLOW_SQL_MAX", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+BYTES_BUCKETS = tuple(kb * 1024 for kb in (16, 64, 256, 1024, 4096, 10240, 20480, 40960))
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values; thread-safe."""
+
+    def __init__(self, name: str, help: str, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self.series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        i = bisect_left(self.buckets, value)  # first bucket with le >= value
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = {k: list(v) for k, v in self.series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            labels = list(zip(self.labels, label_values))
+            running = 0
+            for le, n in zip([*map(_number, self.buckets), "+Inf"], series[:-1]):
+                running += n
+                lines.append(f"{self.name}_bucket{_labels(labels + [('le', le)])} {running}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(labels)} {running}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self.lock:
+            self.value += amount
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {_number(self.value)}"]
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency until the last response byte.",
+    LATENCY_BUCKETS, ("method", "route", "status"),
+)
+REQUEST_STATEMENTS = Histogram(
+    "db_statements_per_request", "SQL statements executed per request.", STATEMENT_BUCKETS, ("route",),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "db_seconds_per_request", "Time spent in SQL statements per request.", LATENCY_BUCKETS, ("route",),
+)
+UPLOAD_BYTES = Histogram("upload_bytes", "Size of each uploaded file.", BYTES_BUCKETS, ("route",))
+IMAGE_SECONDS = Histogram(
+    "image_processing_seconds", "Image pool task time, queue wait included.", LATENCY_BUCKETS, ("task",),
+)
+BACKGROUND_STATEMENTS = Counter("db_background_statements_total", "SQL statements run outside any request.")
+BACKGROUND_DB_SECONDS = Counter("db_background_seconds_total", "Time in SQL statements run outside any request.")
+SLOW_REQUESTS = Counter("http_slow_requests_total", "Requests over METRICS_SLOW_REQUEST_MS.")
+
+REGISTRY = [
+    REQUEST_SECONDS, REQUEST_STATEMENTS, REQUEST_DB_SECONDS, UPLOAD_BYTES, IMAGE_SECONDS,
+    BACKGROUND_STATEMENTS, BACKGROUND_DB_SECONDS, SLOW_REQUESTS,
+]
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------
+# Per-request state
+# ----------------------------
+class RequestStats:
+    def __init__(self, scope, capture_sql: bool = False):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.sql = [] if capture_sql else None  # (seconds, statement) for the slow log
+
+    @property
+    def route(self) -> str:
+        # Set by the router once matched; template, not the raw path
+        path = getattr(self.scope.get("route"), "path", None)
+        return path or "unmatched"
+
+
+_current = contextvars.ContextVar("metrics_request", default=None)
+
+
+def record_statement(statement: str, seconds: float):
+    stats = _current.get()
+    if stats is None:
+        BACKGROUND_STATEMENTS.inc()
+        BACKGROUND_DB_SECONDS.inc(seconds)
+        return
+    stats.statements += 1
+    stats.db_seconds += seconds
+    if stats.sql is not None and len(stats.sql) < SLOW_SQL_MAX:
+        stats.sql.append((seconds, statement))
+
+
+def observe_upload(size: int):
+    stats = _current.get()
+    UPLOAD_BYTES.observe(size, stats.route if stats else "background")
+
+
+def observe_image(task: str, seconds: float):
+    IMAGE_SECONDS.observe(seconds, task)
+
+
+def instrument_engine(engine):
+    """Count and time every statement on `engine` (pass async_engine.sync_engine for async)."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        record_statement(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        # after_cursor_execute never runs for a failed statement
+        conn = exception_context.connection
+        stack = conn.info.get("metrics_started") if conn is not None else None
+        if stack:
+            record_statement(exception_context.statement or "", time.perf_counter() - stack.pop())
+
+
+def _log_slow(scope, method: str, status: int, seconds: float, stats: RequestStats):
+    path = scope.get("path", "")
+    if scope.get("query_string"):
+        path += "?" + scope["query_string"].decode("latin-1")
+    lines = [
+        f"[slow request] {method} {path} ({stats.route}) -> {status} in {seconds * 1000:.1f} ms, "
+        f"{stats.statements} SQL statements ({stats.db_seconds * 1000:.1f} ms DB)"
+    ]
+    for sql_seconds, statement in stats.sql or ():
+        lines.append(f"  {sql_seconds * 1000:8.2f} ms  {' '.join(statement.split())[:500]}")
+    if stats.sql is not None and stats.statements > len(stats.sql):
+        lines.append(f"  ... {stats.statements - len(stats.sql)} more not captured (METRICS_SLOW_SQL_MAX)")
+    print("\n".join(lines))
+
+
+class MetricsMiddleware:
+    """Outermost ASGI middleware: request latency, status and per-request SQL figures by route."""
+
+    def __init__(self, app, exclude=("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope, capture_sql=SLOW_REQUEST_SECONDS is not None)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500  # unless the app manages to send a response
+        finished = None
+
+        async def timed_send(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                finished = time.perf_counter()  # background tasks run after this
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            seconds = (finished or time.perf_counter()) - started
+            route = stats.route
+            REQUEST_SECONDS.observe(seconds, scope["method"], route, str(status))
+            REQUEST_STATEMENTS.observe(stats.statements, route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, route)
+            if SLOW_REQUEST_SECONDS is not None and seconds >= SLOW_REQUEST_SECONDS:
+                SLOW_REQUESTS.inc()
+                _log_slow(scope, scope["method"], status, seconds, stats)
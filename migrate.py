@@ -0,0 +1,111 @@
+"""
+Versioned schema migrations.
+
+migrations/NNNN_name.py files me schema changes hain, har file me ek
+`upgrade(conn)`. Jo versions lag chuke hain woh schema_migrations table me
+likhe rehte hain; `python migrate.py` sirf pending wale order me chalata hai,
+har ek apne transaction me.
+
+Deploy pe chalao (StartApp.bat backend start karne se pehle chalata hai).
+App import pe schema nahi badalta: main.py sirf check() karta hai aur
+pending migrations hon to start nahi hota.
+
+Migrations idempotent likho (IF NOT EXISTS / checkfirst): SQLite DDL
+transaction ke bahar commit ho jaata hai. Har migration apna schema
+explicitly likhe, models.py import karke nahi: 0001 baseline bhi frozen
+tables hai, aur model change ka matlab nayi migration.
+
+Usage:
+    python migrate.py            # apply pending
+    python migrate.py status
+"""
+import importlib.util
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select
+
+from database import engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+# Kept out of Base.metadata so create_all()/drop_all() never touch it
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def available():
+    """[(version, name, path)] of every migration file, in order."""
+    found = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        m = _FILENAME.match(filename)
+        if m:
+            found.append((int(m.group(1)), m.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(found)
+
+
+def _load(version: int, path: str):
+    spec = importlib.util.spec_from_file_location(f"migrations_{version:04d}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def applied(bind=None) -> set:
+    bind = bind or engine
+    with bind.connect() as conn:
+        if not inspect(conn).has_table(schema_migrations.name):
+            return set()
+        return set(conn.scalars(select(schema_migrations.c.version)))
+
+
+def pending(bind=None):
+    done = applied(bind)
+    return [m for m in available() if m[0] not in done]
+
+
+def upgrade(bind=None) -> list:
+    """Apply pending migrations in order; returns [(version, name)] applied."""
+    bind = bind or engine
+    _meta.create_all(bind=bind)
+    done = []
+    for version, name, path in pending(bind):
+        module = _load(version, path)
+        with bind.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(insert(schema_migrations).values(version=version, name=name, applied_at=datetime.now()))
+        done.append((version, name))
+    return done
+
+
+def check(bind=None):
+    """Raise if the database is behind migrations/ (called at app startup)."""
+    missing = pending(bind)
+    if missing:
+        names = ", ".join(f"{v:04d}_{n}" for v, n, _ in missing)
+        raise RuntimeError(f"Database schema is out of date (pending: {names}). Run: python migrate.py")
+
+
+if __name__ == "__main__":
+    import sys
+
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if cmd == "status":
+        done = applied()
+        for version, name, _ in available():
+            print(f"{'applied' if version in done else 'pending':8} {version:04d}_{name}")
+    elif cmd == "upgrade":
+        ran = upgrade()
+        for version, name in ran:
+            print(f"✔ {version:04d}_{name}")
+        print(f"{len(ran)} migration(s) applied" if ran else "Schema up to date")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,173 @@
+"""
+Baseline: the schema main.py used to build at import, frozen here.
+
+Tables yahan explicitly likhe hain (models.py se nahi), taaki fresh DB pe
+bhi wahi purana shape bane aur baad ki migrations apne columns/indexes
+khud add karein: FK/lookup indexes 0002, lgd_code 0003. models.py badle to
+nayi migration likho, yeh file mat chhedo.
+
+Purane DB (migrations se pehle wala) pe sirf missing tables, missing
+(nullable) columns aur missing indexes banta hai, jaise create_all() +
+add_missing_columns() karte the.
+"""
+from sqlalchemy import (
+    Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text, inspect, text,
+)
+
+meta = MetaData()
+
+Table(
+    "states", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+)
+Table(
+    "districts", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("state_id", Integer, ForeignKey("states.id")),
+)
+Table(
+    "blocks", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("district_id", Integer, ForeignKey("districts.id")),
+)
+Table(
+    "villages", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("block_id", Integer, ForeignKey("blocks.id")),
+    Column("latitude", Float),
+    Column("longitude", Float),
+)
+Table(
+    "contractors", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("company", String),
+    Column("phone", String),
+    Column("performance", Float),
+    Column("pin", String),
+)
+Table(
+    "projects", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("description", String),
+    Column("village_id", Integer, ForeignKey("villages.id")),
+    Column("contractor_id", Integer, ForeignKey("contractors.id")),
+    Column("budget", Float),
+    Column("spent", Float),
+    Column("status", String),
+    Column("progress_percent", Float),
+    Column("risk_score", Float),
+    Column("risk_level", String),
+    Column("start_year", Integer),
+    Column("duration_months", Integer),
+    Column("last_update_at", DateTime),
+)
+Table(
+    "feedbacks", meta,
+    Column("id", Integer, primary_key=True),
+    Column("rating", Integer),
+    Column("comment", String),
+    Column("image_path", String),
+    Column("image_hash", String),
+    Column("image_phash", String),
+    Column("is_flagged", Integer),
+    Column("flag_reason", String),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("project_id", Integer, ForeignKey("projects.id")),
+)
+Table(
+    "contractor_updates", meta,
+    Column("id", Integer, primary_key=True),
+    Column("project_id", Integer, ForeignKey("projects.id")),
+    Column("contractor_id", Integer, ForeignKey("contractors.id")),
+    Column("amount_spent", Float),
+    Column("description", String),
+    Column("bill_image_path", String),
+    Column("work_image_path", String),
+    Column("expected_completion_date", String),
+    Column("submission_date", String),
+)
+Table(
+    "hierarchy_rollups", meta,
+    Column("level", String, primary_key=True),
+    Column("entity_id", Integer, primary_key=True),
+    Column("total_projects", Integer, nullable=False),
+    Column("completed_projects", Integer, nullable=False),
+    Column("complaints", Integer, nullable=False),
+)
+Table(
+    "data_versions", meta,
+    Column("name", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+Table(
+    "alert_outbox", meta,
+    Column("id", Integer, primary_key=True),
+    Column("phone", String, nullable=False),
+    Column("project_id", Integer, ForeignKey("projects.id")),
+    Column("message", String, nullable=False),
+    Column("dedupe_key", String),
+    Column("status", String, nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt_at", DateTime, nullable=False),
+    Column("claim_token", String),
+    Column("last_error", String),
+    Column("created_at", DateTime, nullable=False),
+    Column("sent_at", DateTime),
+    Index("ix_alert_outbox_phone", "phone"),
+    Index("ix_alert_outbox_due", "status", "next_attempt_at"),
+    Index("ix_alert_outbox_dedupe", "dedupe_key", "created_at"),
+)
+Table(
+    "blobs", meta,
+    Column("key", String, primary_key=True),
+    Column("size", Integer, nullable=False),
+    Column("refcount", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+Table(
+    "village_boundaries", meta,
+    Column("village_id", Integer, ForeignKey("villages.id"), primary_key=True),
+    Column("min_lat", Float, nullable=False),
+    Column("min_lng", Float, nullable=False),
+    Column("max_lat", Float, nullable=False),
+    Column("max_lng", Float, nullable=False),
+    Column("geometry", Text, nullable=False),
+)
+Table(
+    "contractor_stats", meta,
+    Column("contractor_id", Integer, ForeignKey("contractors.id", ondelete="CASCADE"), primary_key=True),
+    Column("projects_total", Integer, nullable=False),
+    Column("projects_completed", Integer, nullable=False),
+    Column("avg_overspend", Float, nullable=False),
+    Column("avg_delay_months", Float, nullable=False),
+    Column("feedback_total", Integer, nullable=False),
+    Column("complaints", Integer, nullable=False),
+    Column("complaint_rate", Float, nullable=False),
+    Column("updates_total", Integer, nullable=False),
+    Column("avg_update_gap_days", Float),
+    Column("last_update_at", DateTime),
+    Column("computed_at", DateTime, nullable=False),
+)
+
+
+def upgrade(conn):
+    insp = inspect(conn)
+    existing_tables = set(insp.get_table_names())
+    for table in meta.sorted_tables:
+        if table.name not in existing_tables:
+            table.create(bind=conn)  # with its indexes
+            continue
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in existing:
+                col_type = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}"))
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
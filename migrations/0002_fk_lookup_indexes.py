@@ -0,0 +1,31 @@
+"""
+Foreign-key and lookup indexes.
+
+Hierarchy filters (districts/blocks/villages parent ids, projects.village_id)
+aur per-project / per-contractor lookups ab index seek hain, table scan
+nahi. contractor_updates(project_id, id) per-project history ko bina sort
+ke newest-first deta hai. Names models.py wale hi hain (index=True /
+__table_args__), taaki migrated schema models se match kare. Kuch indexes
+purane DBs pe create_all() pehle hi bana chuka hai, isliye IF NOT EXISTS.
+"""
+from sqlalchemy import text
+
+INDEXES = [
+    ("ix_districts_state_id", "districts", "state_id"),
+    ("ix_blocks_district_id", "blocks", "district_id"),
+    ("ix_villages_block_id", "villages", "block_id"),
+    ("ix_projects_village_id", "projects", "village_id"),
+    ("ix_projects_contractor_id", "projects", "contractor_id"),
+    ("ix_projects_last_update_at", "projects", "last_update_at"),
+    ("ix_projects_status_last_update", "projects", "status, last_update_at"),
+    ("ix_feedbacks_project_id", "feedbacks", "project_id"),
+    ("ix_feedbacks_image_hash", "feedbacks", "image_hash"),
+    ("ix_contractor_updates_project_id_id", "contractor_updates", "project_id, id"),
+    ("ix_contractor_updates_contractor_id", "contractor_updates", "contractor_id"),
+    ("ix_contractors_performance", "contractors", "performance"),
+]
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
@@ -0,0 +1,17 @@
+"""
+LGD (Local Government Directory) codes on the location tables.
+
+import_locations.py parent codes se resolve karta hai aur upsert me rows ko
+code se match karta hai. Purane rows (seed_locations.py) ka code NULL rehta hai.
+"""
+from sqlalchemy import inspect, text
+
+TABLES = ("states", "districts", "blocks", "villages")
+
+
+def upgrade(conn):
+    insp = inspect(conn)
+    for table in TABLES:
+        if "lgd_code" not in {c["name"] for c in insp.get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN lgd_code INTEGER"))
+        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{table}_lgd_code ON {table} (lgd_code)"))
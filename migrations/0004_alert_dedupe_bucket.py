@@ -0,0 +1,18 @@
+"""
+Race-free alert dedupe.
+
+alert_outbox.dedupe_bucket (ALERT_DEDUPE_HOURS time slot) aur
+(dedupe_key, dedupe_bucket) pe unique index: har worker ka scheduler same
+alert queue kare to bhi ek slot me ek hi row bachti hai (ai/dispatch.enqueue).
+Purane rows ka bucket NULL rehta hai, woh index me takraate nahi.
+"""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    if "dedupe_bucket" not in {c["name"] for c in inspect(conn).get_columns("alert_outbox")}:
+        conn.execute(text("ALTER TABLE alert_outbox ADD COLUMN dedupe_bucket INTEGER"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_alert_outbox_dedupe_bucket "
+        "ON alert_outbox (dedupe_key, dedupe_bucket)"
+    ))
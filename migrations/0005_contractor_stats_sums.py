@@ -0,0 +1,25 @@
+"""
+contractor_stats ke averages ke peeche ke exact sums / counts.
+
+contractor_stats.py ab har write pe sirf us row ka delta lagata hai (poore
+contractor ka recompute nahi), uske liye rounded averages kaafi nahi. Purane
+rows me yeh columns NULL rehte hain; aise contractor ka pehla write (ya
+`python contractor_stats.py rebuild`) unhe full recompute se bhar deta hai.
+"""
+from sqlalchemy import DateTime, Float, Integer, inspect, text
+
+COLUMNS = [
+    ("overspend_sum", Float()),
+    ("overspend_count", Integer()),
+    ("delay_sum", Float()),
+    ("delay_count", Integer()),
+    ("first_update_at", DateTime()),
+]
+
+
+def upgrade(conn):
+    existing = {c["name"] for c in inspect(conn).get_columns("contractor_stats")}
+    for name, kind in COLUMNS:
+        if name not in existing:
+            # Dialect's own spelling (DATETIME on SQLite, TIMESTAMP WITHOUT TIME ZONE on PostgreSQL)
+            conn.execute(text(f"ALTER TABLE contractor_stats ADD COLUMN {name} {kind.compile(dialect=conn.dialect)}"))
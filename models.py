@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Index, Text
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -7,6 +7,7 @@ class State(Base):
     __tablename__ = "states"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
+    lgd_code = Column(Integer, unique=True, index=True, nullable=True)  # Local Government Directory code, see import_locations.py
     districts = relationship("District", back_populates="state")
 
 
@@ -14,7 +15,8 @@ class District(Base):
     __tablename__ = "districts"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    state_id = Column(Integer, ForeignKey("states.id"))
+    state_id = Column(Integer, ForeignKey("states.id"), index=True)
+    lgd_code = Column(Integer, unique=True, index=True, nullable=True)
     state = relationship("State", back_populates="districts")
     blocks = relationship("Block", back_populates="district")
 
@@ -23,7 +25,8 @@ class Block(Base):
     __tablename__ = "blocks"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    district_id = Column(Integer, ForeignKey("districts.id"))
+    district_id = Column(Integer, ForeignKey("districts.id"), index=True)
+    lgd_code = Column(Integer, unique=True, index=True, nullable=True)
     district = relationship("District", back_populates="blocks")
     villages = relationship("Village", back_populates="block")
 
@@ -32,7 +35,8 @@ class Village(Base):
     __tablename__ = "villages"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    block_id = Column(Integer, ForeignKey("blocks.id"))
+    block_id = Column(Integer, ForeignKey("blocks.id"), index=True)
+    lgd_code = Column(Integer, unique=True, index=True, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     block = relationship("Block", back_populates="villages")
@@ -46,7 +50,7 @@ class Contractor(Base):
     name = Column(String, nullable=False)
     company = Column(String, nullable=True)
     phone = Column(String, nullable=True)
-    performance = Column(Float, default=0.0)
+    performance = Column(Float, default=0.0, index=True)  # 0-5, see contractor_stats.py
     pin = Column(String, default="0000") # Security PIN
 
     projects = relationship("Project", back_populates="contractor")
@@ -59,8 +63,8 @@ class Project(Base):
     name = Column(String, nullable=False)
     description = Column(String)
 
-    village_id = Column(Integer, ForeignKey("villages.id"))
-    contractor_id = Column(Integer, ForeignKey("contractors.id"), nullable=True)
+    village_id = Column(Integer, ForeignKey("villages.id"), index=True)
+    contractor_id = Column(Integer, ForeignKey("contractors.id"), nullable=True, index=True)
 
     budget = Column(Float, default=0)
     spent = Column(Float, default=0)
@@ -72,6 +76,9 @@ class Project(Base):
     start_year = Column(Integer)
     duration_months = Column(Integer)
 
+    # Denormalized from contractor_updates (set by crud.create_contractor_update) for stale-project scans
+    last_update_at = Column(DateTime, nullable=True, index=True)
+
     village = relationship("Village", back_populates="projects")
     contractor = relationship(
     "Contractor",
@@ -82,6 +89,11 @@ class Project(Base):
     feedbacks = relationship("Feedback", back_populates="project")
     updates = relationship("ContractorUpdate", back_populates="project")
 
+    __table_args__ = (
+        # Alert scan: status == 'ongoing' AND last_update_at < cutoff
+        Index("ix_projects_status_last_update", "status", "last_update_at"),
+    )
+
 
 class Feedback(Base):
     __tablename__ = "feedbacks"
@@ -90,14 +102,15 @@ class Feedback(Base):
     comment = Column(String)
     image_path = Column(String, nullable=True)
 
-    image_hash = Column(String, nullable=True)     # For duplicate detection
+    image_hash = Column(String, nullable=True, index=True)     # For duplicate detection
+    image_phash = Column(String, nullable=True)    # 64-bit dHash (hex) for near-duplicates, see ai/similarity.py
     is_flagged = Column(Integer, default=0)        # 0=Clean, 1=Flagged (SQLite has no Boolean)
     flag_reason = Column(String, nullable=True)    # e.g. "Duplicate", "Fake"
 
     latitude = Column(Float, nullable=True)  # 🌍 Geo coordinates
     longitude = Column(Float, nullable=True)
 
-    project_id = Column(Integer, ForeignKey("projects.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)  # per-project risk evidence
     project = relationship("Project", back_populates="feedbacks")
 
 
@@ -106,7 +119,7 @@ class ContractorUpdate(Base):
     
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey("projects.id"))
-    contractor_id = Column(Integer, ForeignKey("contractors.id"))
+    contractor_id = Column(Integer, ForeignKey("contractors.id"), index=True)
     
     amount_spent = Column(Float, default=0)
     description = Column(String, nullable=True)
@@ -119,3 +132,102 @@ class ContractorUpdate(Base):
     
     project = relationship("Project", back_populates="updates")
     contractor = relationship("Contractor", back_populates="updates")
+
+    __table_args__ = (
+        # Per-project history newest first (project_id = ? ORDER BY id DESC) straight off the index
+        Index("ix_contractor_updates_project_id_id", "project_id", "id"),
+    )
+
+
+class HierarchyRollup(Base):
+    """Pre-aggregated officer stats per hierarchy node (level = village/block/district/state/all)."""
+    __tablename__ = "hierarchy_rollups"
+
+    level = Column(String, primary_key=True)
+    entity_id = Column(Integer, primary_key=True)  # 0 for level "all"
+    total_projects = Column(Integer, default=0, nullable=False)
+    completed_projects = Column(Integer, default=0, nullable=False)
+    complaints = Column(Integer, default=0, nullable=False)
+
+
+class DataVersion(Base):
+    """Monotonic version counters (e.g. "locations") shared by all workers."""
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+
+
+class AlertOutbox(Base):
+    """Queued alert messages; ai/dispatch.py worker delivers them (merged per phone)."""
+    __tablename__ = "alert_outbox"
+
+    id = Column(Integer, primary_key=True)
+    phone = Column(String, nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
+    message = Column(String, nullable=False)
+    dedupe_key = Column(String, nullable=True)
+    dedupe_bucket = Column(Integer, nullable=True)  # ALERT_DEDUPE_HOURS slot; cleared when failed
+
+    status = Column(String, default="pending", nullable=False)  # pending / sending / sent / failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False)
+    claim_token = Column(String, nullable=True)
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_alert_outbox_due", "status", "next_attempt_at"),
+        Index("ix_alert_outbox_dedupe", "dedupe_key", "created_at"),
+        Index("ix_alert_outbox_dedupe_bucket", "dedupe_key", "dedupe_bucket", unique=True),
+    )
+
+
+class Blob(Base):
+    """Content-addressed upload (see blobstore.py). key = sha256 hex + extension."""
+    __tablename__ = "blobs"
+
+    key = Column(String, primary_key=True)
+    size = Column(Integer, nullable=False)
+    refcount = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+
+class VillageBoundary(Base):
+    """Village boundary polygon imported from GeoJSON (see geofence.py)."""
+    __tablename__ = "village_boundaries"
+
+    village_id = Column(Integer, ForeignKey("villages.id"), primary_key=True)
+    # Bounding box (degrees) for cheap pre-filtering
+    min_lat = Column(Float, nullable=False)
+    min_lng = Column(Float, nullable=False)
+    max_lat = Column(Float, nullable=False)
+    max_lng = Column(Float, nullable=False)
+    # MultiPolygon coordinates as JSON: [[[ [lng, lat], ... ], hole, ...], ...]
+    geometry = Column(Text, nullable=False)
+
+
+class ContractorStats(Base):
+    """Per-contractor performance aggregates, kept current by contractor_stats.py."""
+    __tablename__ = "contractor_stats"
+
+    contractor_id = Column(Integer, ForeignKey("contractors.id", ondelete="CASCADE"), primary_key=True)
+    projects_total = Column(Integer, default=0, nullable=False)
+    projects_completed = Column(Integer, default=0, nullable=False)
+    avg_overspend = Column(Float, default=0.0, nullable=False)     # fraction over budget, 0.2 = 20%
+    avg_delay_months = Column(Float, default=0.0, nullable=False)
+    feedback_total = Column(Integer, default=0, nullable=False)
+    complaints = Column(Integer, default=0, nullable=False)
+    complaint_rate = Column(Float, default=0.0, nullable=False)
+    updates_total = Column(Integer, default=0, nullable=False)
+    avg_update_gap_days = Column(Float, nullable=True)
+    last_update_at = Column(DateTime, nullable=True)
+    computed_at = Column(DateTime, nullable=False)
+    # Exact sums behind the averages, for per-write deltas (NULL until the next full refresh)
+    overspend_sum = Column(Float, nullable=True)
+    overspend_count = Column(Integer, nullable=True)
+    delay_sum = Column(Float, nullable=True)
+    delay_count = Column(Integer, nullable=True)
+    first_update_at = Column(DateTime, nullable=True)
@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+OFFSET ke bajaye "last seen key ke baad wale rows" maangte hain:
+WHERE (id) > :last ORDER BY id LIMIT n. Index pe seedha seek hota hai, isliye
+page 1 aur page 10,000 dono same cost ke hain, aur beech me insert/delete hone
+se rows skip/duplicate nahi hote.
+
+Cursor opaque hai (last row ki key values ka base64 JSON); client use bas
+agli request me `cursor=` pe wapas bhejta hai. Response body list hi rehti
+hai, agla cursor `X-Next-Cursor` header me aata hai (last page pe header
+nahi hota).
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """FastAPI dependency: `page: PageParams = Depends()`."""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: Optional[str] = None
+
+
+def _plain(value):
+    return {"dt": value.isoformat()} if isinstance(value, datetime) else value
+
+
+def _typed(value):
+    return datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps([_plain(v) for v in values], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_typed(v) for v in json.loads(raw)]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _after(order, values):
+    # (a, b) after (va, vb) => a > va OR (a = va AND b > vb), per-column direction
+    clauses = []
+    for i, (column, desc) in enumerate(order):
+        step = column < values[i] if desc else column > values[i]
+        clauses.append(and_(*[c == v for (c, _), v in zip(order[:i], values[:i])], step))
+    return or_(*clauses)
+
+
+def paginate(query, order, limit: int = DEFAULT_LIMIT, cursor: str = None, key=None) -> Page:
+    """
+    Keyset page of an ORM Query.
+    order: [(column, descending), ...], last column unique (normally the id).
+    key: row -> key values, for queries returning tuples (default: attributes of the row).
+    """
+    if cursor:
+        query = query.filter(_after(order, decode_cursor(cursor, len(order))))
+    query = query.order_by(*[c.desc() if desc else c.asc() for c, desc in order])
+    rows = query.limit(limit + 1).all()  # one extra row tells whether another page exists
+
+    if len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    last = rows[-1]
+    values = key(last) if key else [getattr(last, c.key) for c, _ in order]
+    return Page(rows, encode_cursor(values))
+
+
+def respond(response: Response, page: Page) -> list:
+    """Put the next cursor in the header and return the items as the body."""
+    if page.next_cursor:
+        response.headers[HEADER] = page.next_cursor
+    return page.items
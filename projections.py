@@ -0,0 +1,114 @@
+"""
+Lean read path for project lists (/projects/by_village, /dashboard/village).
+
+ORM objects + eager contractor join + har project pe VillageNested chain +
+Pydantic validation ke bajaye: sirf maange gaye columns row tuples me aate
+hain, village breadcrumb village ke liye ek baar banta hai
+(location_cache.breadcrumb: loaded hierarchy snapshot se, query ke bina) aur
+dicts seedhe orjson se encode hote hain. Output shape schemas.ProjectResponse wala hi hai
+(docs me schemas.ProjectPartial, kyunki keys `fields=` pe depend karti hain).
+
+`fields=id,name,status` se sirf woh keys aati hain (aur sirf unke columns
+select hote hain; contractor join bhi tabhi).
+"""
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from models import Contractor, Project
+import location_cache
+import pagination
+import schemas
+
+try:
+    import orjson
+except ImportError:  # optional, plain json works too
+    orjson = None
+
+
+class FastJSONResponse(Response):
+    """Plain Response whose body is encoded by orjson when installed (stdlib json otherwise)."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+PROJECT_FIELDS = tuple(schemas.ProjectResponse.model_fields)  # default selection = full ProjectResponse
+SCALAR_COLUMNS = {name: getattr(Project, name) for name in schemas.ProjectBase.model_fields}
+CONTRACTOR_COLUMNS = (
+    Contractor.id.label("contractor__id"),
+    Contractor.name.label("contractor__name"),
+    Contractor.company.label("contractor__company"),
+)
+
+
+def parse_fields(fields: Optional[str]) -> list:
+    """`fields=` query value -> field names in request order (all of PROJECT_FIELDS when empty)."""
+    if not fields:
+        return list(PROJECT_FIELDS)
+    picked = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in picked if f not in PROJECT_FIELDS]
+    if unknown or not picked:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(PROJECT_FIELDS)})",
+        )
+    return picked
+
+
+def _query(db: Session, village_id: int, fields: list):
+    # id always comes first: keyset cursor + stable order
+    columns = [Project.id] + [SCALAR_COLUMNS[f] for f in fields if f in SCALAR_COLUMNS and f != "id"]
+    if "contractor" in fields:
+        columns += CONTRACTOR_COLUMNS
+    query = db.query(*columns).filter(Project.village_id == village_id)
+    if "contractor" in fields:
+        query = query.outerjoin(Contractor, Project.contractor_id == Contractor.id)
+    return query
+
+
+def _dicts(db: Session, village_id: int, rows, fields: list) -> list:
+    village = location_cache.breadcrumb(db, village_id) if "village" in fields and rows else None
+    out = []
+    for row in rows:
+        m = row._mapping
+        item = {}
+        for f in fields:
+            if f == "contractor":
+                cid = m["contractor__id"]
+                item[f] = {"id": cid, "name": m["contractor__name"], "company": m["contractor__company"]} if cid else None
+            elif f == "village":
+                item[f] = village
+            else:
+                item[f] = m[f]
+        out.append(item)
+    return out
+
+
+def project_page(db: Session, village_id: int, fields: list, limit: int = pagination.DEFAULT_LIMIT, cursor: str = None):
+    """Keyset Page of project dicts for one village (cf. crud.get_projects_by_village)."""
+    page = pagination.paginate(_query(db, village_id, fields), [(Project.id, False)], limit, cursor)
+    return pagination.Page(_dicts(db, village_id, page.items, fields), page.next_cursor)
+
+
+def page_headers(page: pagination.Page) -> dict:
+    """Next-cursor header for a page sent as a FastJSONResponse (cf. pagination.respond)."""
+    return {pagination.HEADER: page.next_cursor} if page.next_cursor else {}
+
+
+def project_list(db: Session, village_id: int, fields: list, limit: int = None, offset: int = 0) -> list:
+    """Project dicts for one village ordered by id, limit/offset like crud.get_village_dashboard."""
+    query = _query(db, village_id, fields).order_by(Project.id)
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return _dicts(db, village_id, query.all(), fields)
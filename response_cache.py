@@ -0,0 +1,326 @@
+"""
+Read-through cache for rendered JSON responses (village dashboard, officer
+stats, project lists).
+
+Key = endpoint + params + us waqt ke tag versions. Tags hierarchy scopes hain
+("village:12", "block:3", ..., "all:0"); koi write commit hote hi us village
+aur uske saare ancestors ke tag versions bump hote hain, isliye purani
+entries kabhi match nahi hoti aur LRU/TTL se nikal jaati hain. Read aur write
+ke beech ki race bhi safe hai: jo reader purana data padh raha tha woh purane
+version wali key me likhta hai, jise koi nahi maangta.
+
+Invalidation Session hooks se hoti hai (ai/risk.py jaisa pattern): kisi bhi
+commit me Project / Feedback / ContractorUpdate badle to unke villages (project
+move hua to purana village bhi). Contractor ya location rows badle, ya Core
+bulk writes (risk.rescore, rollups.rebuild), to sab kuch.
+
+Backend RESPONSE_CACHE se chunta hai (ALERT_SINK jaisa name[:arg]):
+
+    memory            default, per process (LRU + TTL, size bounded).
+                      Invalidation bhi sirf usi worker me hoti hai: multiple
+                      uvicorn workers pe doosre worker ka write yahan TTL tak
+                      nahi dikhta, isliye multi-worker deploy me redis lo
+    redis:<url>       shared by all workers, e.g. redis:redis://localhost:6379/0
+                      (Redis pe maxmemory-policy allkeys-lru rakho)
+    off               no caching
+
+Network wale backends (blocking = True, custom backends ka default bhi) ke
+calls respond() threadpool me karta hai, event loop pe nahi.
+
+    RESPONSE_CACHE_TTL (60 s)  RESPONSE_CACHE_MAX_ENTRIES (5000)  RESPONSE_CACHE_MAX_MB (64)
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Response
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from models import Block, Contractor, ContractorUpdate, District, Feedback, Project, State, Village
+import projections
+
+try:
+    import redis
+except ImportError:  # only for the redis backend
+    redis = None
+
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+MAX_BYTES = int(float(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+GLOBAL_TAG = "*"  # part of every key; bumped by invalidate_all()
+GLOBAL_MODELS = (Contractor, State, District, Block, Village)
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry expiry, bounded by entry count and total bytes."""
+    blocking = False  # dict + lock: cheap enough to call on the event loop
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.size = 0
+        self.tags = {}
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.size += len(value)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, value = self.entries.pop(key)
+        self.size -= len(value)
+
+    def tag_versions(self, tags) -> list:
+        return [self.tags.get(t, 0) for t in tags]
+
+    def bump(self, tags):
+        with self.lock:
+            for t in tags:
+                self.tags[t] = self.tags.get(t, 0) + 1
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "bytes": self.size, "evictions": self.evictions}
+
+
+class RedisBackend:
+    """Entries and tag versions in Redis, so every worker sees the same invalidations."""
+    blocking = True  # sync client: network round trips
+
+    def __init__(self, url: str, prefix: str = "respcache:"):
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE=redis needs the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.prefix = prefix
+
+    def get(self, key: str):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    def tag_versions(self, tags) -> list:
+        return [int(v or 0) for v in self.client.mget([self.prefix + "tag:" + t for t in tags])]
+
+    def bump(self, tags):
+        pipe = self.client.pipeline(transaction=False)
+        for t in tags:
+            pipe.incr(self.prefix + "tag:" + t)
+        pipe.execute()
+
+    def stats(self) -> dict:
+        return {}  # entry counts / evictions: Redis INFO
+
+
+BACKENDS = {
+    "memory": lambda arg: MemoryBackend(),
+    "redis": lambda arg: RedisBackend(arg),
+    "off": lambda arg: None,
+}
+
+
+def register_backend(name: str, factory):
+    """factory(arg: str | None) -> backend, selected with RESPONSE_CACHE=name[:arg]."""
+    BACKENDS[name] = factory
+
+
+def make_backend(spec: str = None):
+    spec = spec or os.getenv("RESPONSE_CACHE", "memory")
+    name, _, arg = spec.partition(":")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown RESPONSE_CACHE '{name}' (known: {', '.join(BACKENDS)})")
+    return BACKENDS[name](arg or None)
+
+
+backend = make_backend()
+_counters = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+_counter_lock = threading.Lock()
+
+
+def _count(name: str, n: int = 1):
+    with _counter_lock:
+        _counters[name] += n
+
+
+def stats() -> dict:
+    """Hit/miss counters of this process plus backend figures."""
+    counts = dict(_counters)
+    lookups = counts["hits"] + counts["misses"]
+    counts["hit_ratio"] = round(counts["hits"] / lookups, 3) if lookups else 0.0
+    if backend is not None:
+        counts.update(backend.stats())
+    return counts
+
+
+def scope_tag(level: str, entity_id: int) -> str:
+    return f"{level}:{entity_id or 0}"
+
+
+def _key(endpoint: str, params: dict, tags: list) -> str:
+    versions = backend.tag_versions([GLOBAL_TAG, *tags])
+    parts = [endpoint, json.dumps(params, sort_keys=True, separators=(",", ":"))]
+    parts += [f"{t}={v}" for t, v in zip([GLOBAL_TAG, *tags], versions)]
+    return "|".join(parts)
+
+
+def _pack(body: bytes, headers: dict) -> bytes:
+    return json.dumps(headers, separators=(",", ":")).encode("utf-8") + b"\n" + body
+
+
+def _unpack(value: bytes):
+    head, _, body = value.partition(b"\n")
+    return body, json.loads(head)
+
+
+def _lookup(endpoint: str, params: dict, tags: list):
+    key = _key(endpoint, params, tags)
+    return key, backend.get(key)
+
+
+async def _off_loop(fn, *args):
+    if getattr(backend, "blocking", True):
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+async def respond(endpoint: str, params: dict, tags: list, build):
+    """
+    JSON response for `endpoint` + `params`, from cache while none of `tags` changed.
+    build: async () -> (content, headers) computing the fresh response.
+    """
+    if backend is None:
+        content, headers = await build()
+        return projections.FastJSONResponse(content, headers=headers)
+
+    try:
+        key, cached = await _off_loop(_lookup, endpoint, params, tags)
+    except Exception:  # cache outage must not take the endpoint down
+        _count("errors")
+        key = cached = None
+    if cached is not None:
+        _count("hits")
+        body, headers = _unpack(cached)
+        return Response(content=body, media_type="application/json", headers={**headers, "X-Cache": "HIT"})
+
+    _count("misses")
+    content, headers = await build()
+    response = projections.FastJSONResponse(content, headers=headers)
+    if key is not None:
+        try:
+            await _off_loop(backend.set, key, _pack(response.body, headers or {}), TTL_SECONDS)
+        except Exception:
+            _count("errors")
+    response.headers["X-Cache"] = "MISS"
+    return response
+
+
+def invalidate(tags):
+    if backend is not None and tags:
+        try:
+            backend.bump(tags)
+        except Exception:  # entries still expire after TTL_SECONDS
+            _count("errors")
+            return
+        _count("invalidations", len(tags))
+
+
+def invalidate_all():
+    invalidate([GLOBAL_TAG])
+
+
+def invalidate_all_on_commit(db: Session):
+    """For Core / bulk writes the hooks cannot see; takes effect when `db` commits."""
+    db.info["cache_all"] = True
+
+
+def village_tags(db: Session, village_ids) -> set:
+    """Tags of these villages and all their ancestors (plus the whole-country scope)."""
+    village_ids = {v for v in village_ids if v}
+    if not village_ids:
+        return set()
+    tags = {scope_tag("all", 0)}
+    rows = db.execute(
+        select(Village.id, Village.block_id, Block.district_id, District.state_id)
+        .outerjoin(Block, Village.block_id == Block.id)
+        .outerjoin(District, Block.district_id == District.id)
+        .where(Village.id.in_(village_ids))
+    )
+    for v_id, b_id, d_id, s_id in rows:
+        tags.add(scope_tag("village", v_id))
+        for level, entity_id in (("block", b_id), ("district", d_id), ("state", s_id)):
+            if entity_id:
+                tags.add(scope_tag(level, entity_id))
+    return tags
+
+
+# ----------------------------
+# Change hooks (invalidate after commit)
+# ----------------------------
+@event.listens_for(Session, "after_flush")
+def _collect_cache_changes(session, flush_context):
+    villages = session.info.setdefault("cache_villages", set())
+    projects = session.info.setdefault("cache_projects", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Project):
+            # A moved project leaves its old village's lists too
+            villages.update(v for v in (obj.village_id, *inspect(obj).attrs.village_id.history.deleted) if v)
+        elif isinstance(obj, (Feedback, ContractorUpdate)):
+            if obj.project_id:
+                projects.add(obj.project_id)
+        elif isinstance(obj, GLOBAL_MODELS) and obj not in session.new:
+            # Renamed / removed contractor or location: shown inside many cached lists
+            session.info["cache_all"] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _resolve_cache_tags(session):
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    villages = session.info.pop("cache_villages", None) or set()
+    projects = session.info.pop("cache_projects", None)
+    if projects:
+        villages.update(v for v in session.scalars(select(Project.village_id).where(Project.id.in_(projects))) if v)
+    if villages:
+        # Ancestors resolved now: no SQL can run in after_commit
+        session.info["cache_tags"] = village_tags(session, villages)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    tags = session.info.pop("cache_tags", None)
+    if session.info.pop("cache_all", False):
+        invalidate_all()
+    elif tags:
+        invalidate(tags)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_cache_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        for key in ("cache_villages", "cache_projects", "cache_tags", "cache_all"):
+            session.info.pop(key, None)
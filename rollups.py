@@ -0,0 +1,267 @@
+"""
+Officer stats rollups.
+
+hierarchy_rollups me har village/block/district/state (aur "all") ke liye
+total / completed / complaint counters rakhe jaate hain. crud + routers apne
+write ke SAME transaction me yahan deltas apply karte hain, isliye
+/dashboard/officer/stats sirf ek primary-key lookup hai.
+
+Usage:
+    python rollups.py verify    # recompute from scratch, report drift
+    python rollups.py rebuild   # recompute from scratch, overwrite table
+"""
+from collections import namedtuple, defaultdict
+
+from sqlalchemy import update, func, or_, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import District, Block, Village, Project, Feedback, HierarchyRollup
+import response_cache
+
+COUNTERS = ("total_projects", "completed_projects", "complaints")
+
+# What a project contributes to the rollups
+ProjectSnapshot = namedtuple("ProjectSnapshot", "project_id village_id completed")
+
+
+def is_completed(status) -> bool:
+    return (status or "").lower() == "completed"
+
+
+def is_complaint(feedback) -> bool:
+    return (feedback.rating is not None and feedback.rating <= 3) or feedback.is_flagged == 1
+
+
+def snapshot(project):
+    if project is None:
+        return None
+    return ProjectSnapshot(project.id, project.village_id, is_completed(project.status))
+
+
+# ----------------------------
+# Hierarchy helpers
+# ----------------------------
+def ancestors(db: Session, village_id: int):
+    """[(level, id), ...] for a village up to "all". Empty if the chain is broken."""
+    if village_id is None:
+        return []
+    row = (
+        db.query(Village.id, Village.block_id, Block.district_id, District.state_id)
+        .join(Block, Village.block_id == Block.id)
+        .join(District, Block.district_id == District.id)
+        .filter(Village.id == village_id)
+        .first()
+    )
+    if not row:
+        return []
+    v_id, b_id, d_id, s_id = row
+    return [("village", v_id), ("block", b_id), ("district", d_id), ("state", s_id), ("all", 0)]
+
+
+def scope_key(state_id=None, district_id=None, block_id=None, village_id=None):
+    # Same precedence as the old join/filter chain: most specific wins
+    if village_id:
+        return "village", village_id
+    if block_id:
+        return "block", block_id
+    if district_id:
+        return "district", district_id
+    if state_id:
+        return "state", state_id
+    return "all", 0
+
+
+def scope_projects(stmt, state_id=None, district_id=None, block_id=None, village_id=None):
+    """Filter a statement over Project to one hierarchy scope (joins only as far up as needed)."""
+    level, entity_id = scope_key(state_id, district_id, block_id, village_id)
+    if level == "village":
+        return stmt.where(Project.village_id == entity_id)
+    if level == "all":
+        return stmt
+    stmt = stmt.join(Village, Project.village_id == Village.id)
+    if level == "block":
+        return stmt.where(Village.block_id == entity_id)
+    stmt = stmt.join(Block, Village.block_id == Block.id)
+    if level == "district":
+        return stmt.where(Block.district_id == entity_id)
+    return stmt.join(District, Block.district_id == District.id).where(District.state_id == entity_id)
+
+
+# ----------------------------
+# Incremental updates (caller commits)
+# ----------------------------
+def _bump(db: Session, level: str, entity_id: int, deltas: dict):
+    values = {k: getattr(HierarchyRollup, k) + v for k, v in deltas.items()}
+    stmt = (
+        update(HierarchyRollup)
+        .where(HierarchyRollup.level == level, HierarchyRollup.entity_id == entity_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(stmt).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            row = HierarchyRollup(level=level, entity_id=entity_id, **{k: 0 for k in COUNTERS})
+            for k, v in deltas.items():
+                setattr(row, k, v)
+            db.add(row)
+    except IntegrityError:
+        # Kisi aur ne row bana di beech me
+        db.execute(stmt)
+
+
+def apply_delta(db: Session, village_id: int, total=0, completed=0, complaints=0):
+    deltas = {
+        k: v for k, v in
+        (("total_projects", total), ("completed_projects", completed), ("complaints", complaints))
+        if v
+    }
+    if not deltas:
+        return
+    for level, entity_id in ancestors(db, village_id):
+        _bump(db, level, entity_id, deltas)
+
+
+def _project_complaints(db: Session, project_id: int) -> int:
+    return (
+        db.query(func.count(Feedback.id))
+        .filter(Feedback.project_id == project_id)
+        .filter(or_(Feedback.rating <= 3, Feedback.is_flagged == 1))
+        .scalar()
+    )
+
+
+def project_changed(db: Session, before, after):
+    """Apply the difference between two ProjectSnapshots (None = not present)."""
+    if before == after:
+        return
+    moved = before and after and before.village_id != after.village_id
+    complaints = 0
+    if before and (after is None or moved):
+        complaints = _project_complaints(db, before.project_id)
+        apply_delta(db, before.village_id, -1, -int(before.completed), -complaints)
+    if after and (before is None or moved):
+        # A new project has no feedback yet; a moved one brings its complaints along
+        apply_delta(db, after.village_id, 1, int(after.completed), complaints if moved else 0)
+    if before and after and not moved and before.completed != after.completed:
+        apply_delta(db, after.village_id, completed=1 if after.completed else -1)
+
+
+def feedback_added(db: Session, feedback):
+    if not is_complaint(feedback):
+        return
+    village_id = (
+        db.query(Project.village_id).filter(Project.id == feedback.project_id).scalar()
+    )
+    apply_delta(db, village_id, complaints=1)
+
+
+# ----------------------------
+# Reads
+# ----------------------------
+def get_stats(db: Session, state_id=None, district_id=None, block_id=None, village_id=None):
+    level, entity_id = scope_key(state_id, district_id, block_id, village_id)
+    row = db.get(HierarchyRollup, (level, entity_id))
+    return {k: getattr(row, k) if row else 0 for k in COUNTERS}
+
+
+# ----------------------------
+# Rebuild / verify
+# ----------------------------
+def compute_from_scratch(db: Session):
+    """{(level, id): {counter: value}} recomputed from the base tables."""
+    chain = {
+        v_id: (b_id, d_id, s_id)
+        for v_id, b_id, d_id, s_id in (
+            db.query(Village.id, Village.block_id, Block.district_id, District.state_id)
+            .join(Block, Village.block_id == Block.id)
+            .join(District, Block.district_id == District.id)
+        )
+    }
+    result = defaultdict(lambda: {k: 0 for k in COUNTERS})
+
+    def add(village_id, counter, n):
+        if village_id not in chain or not n:
+            return
+        b_id, d_id, s_id = chain[village_id]
+        for key in (("village", village_id), ("block", b_id), ("district", d_id), ("state", s_id), ("all", 0)):
+            result[key][counter] += n
+
+    completed = case((func.lower(Project.status) == "completed", 1), else_=0)
+    for v_id, total, done in (
+        db.query(Project.village_id, func.count(Project.id), func.sum(completed))
+        .group_by(Project.village_id)
+    ):
+        add(v_id, "total_projects", total)
+        add(v_id, "completed_projects", int(done or 0))
+
+    for v_id, n in (
+        db.query(Project.village_id, func.count(Feedback.id))
+        .join(Project, Feedback.project_id == Project.id)
+        .filter(or_(Feedback.rating <= 3, Feedback.is_flagged == 1))
+        .group_by(Project.village_id)
+    ):
+        add(v_id, "complaints", n)
+
+    return dict(result)
+
+
+def verify(db: Session):
+    """List of (level, id, stored, expected) for every row that drifted."""
+    expected = compute_from_scratch(db)
+    stored = {
+        (r.level, r.entity_id): {k: getattr(r, k) for k in COUNTERS}
+        for r in db.query(HierarchyRollup)
+    }
+    zero = {k: 0 for k in COUNTERS}
+    drift = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: (k[0], k[1])):
+        want = expected.get(key, zero)
+        have = stored.get(key, zero)
+        if want != have:
+            drift.append((key[0], key[1], have, want))
+    return drift
+
+
+def rebuild(db: Session):
+    expected = compute_from_scratch(db)
+    db.query(HierarchyRollup).delete()
+    db.bulk_insert_mappings(
+        HierarchyRollup,
+        [{"level": level, "entity_id": entity_id, **counts} for (level, entity_id), counts in expected.items()],
+    )
+    response_cache.invalidate_all_on_commit(db)
+    db.commit()
+    return len(expected)
+
+
+def ensure_built(db: Session):
+    """First boot on an existing DB: populate the table once."""
+    if db.query(HierarchyRollup).first() is None and db.query(Project.id).first() is not None:
+        rebuild(db)
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal, Base, engine
+
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if cmd not in ("verify", "rebuild"):
+        print(__doc__)
+        sys.exit(2)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        drift = verify(db)
+        for level, entity_id, have, want in drift:
+            print(f"DRIFT {level}:{entity_id} stored={have} expected={want}")
+        print(f"{len(drift)} drifted row(s)")
+        if cmd == "rebuild":
+            print(f"✔ Rebuilt {rebuild(db)} rollup rows")
+        elif drift:
+            sys.exit(1)
+    finally:
+        db.close()
@@ -1,10 +1,18 @@
 from fastapi import APIRouter, HTTPException
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
+from typing import Optional
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, SessionLocal
 from models import Contractor, Project, ContractorUpdate
 from datetime import datetime, timedelta
+from ai.alerts import AlertScheduler
+from ai.dispatch import DispatchWorker
+from ai import risk
+from ai.fake_image import analyze_fake_image  # re-exported for existing callers
+
+alert_dispatcher = DispatchWorker(SessionLocal)
+alert_scheduler = AlertScheduler(SessionLocal, dispatcher=alert_dispatcher)
 
 router = APIRouter(prefix="/ai", tags=["AI Risk Prediction"])
 
@@ -13,6 +21,12 @@ class RiskRequest(BaseModel):
     progress_percent: float
     budget: float
     spent: float
+    # Optional evidence (same inputs the stored Project.risk_score uses)
+    start_year: Optional[int] = None
+    duration_months: Optional[int] = None
+    completed: bool = False
+    negative_feedback: int = 0
+    flagged_images: int = 0
 
 
 @router.post("/risk")
@@ -26,27 +40,13 @@ def compute_risk(payload: RiskRequest):
         if budget <= 0:
             raise HTTPException(status_code=400, detail="Invalid budget")
 
-        spent_ratio = spent / budget
-
-        risk_score = 50
-
-        if spent_ratio > (progress / 100) + 0.1:
-            risk_score += 25  # overspending > 10% deviation
-
-        if progress < 50 and spent_ratio > 0.8:
-            risk_score += 25  # heavy risk
-        
-        # Reward for efficiency (Low Risk)
-        if spent_ratio < (progress / 100) - 0.05:
-            risk_score -= 20   # Under budget / efficient
-
-        risk_score = min(max(risk_score, 0), 100)
-
-        level = (
-            "Low" if risk_score <= 40 else
-            "Medium" if risk_score <= 70 else
-            "High"
+        # Same engine as the stored / batch scores (ai/risk.py)
+        risk_score, level, reasons = risk.project_score(
+            budget, spent, progress,
+            payload.start_year, payload.duration_months, payload.completed,
+            payload.negative_feedback, payload.flagged_images,
         )
+        spent_ratio = spent / budget
 
         return {
             "risk_score": risk_score,
@@ -54,6 +54,7 @@ def compute_risk(payload: RiskRequest):
             "details": {
                 "spent_ratio": round(spent_ratio, 2),
                 "progress": progress,
+                "reasons": reasons,
             }
         }
 
@@ -61,114 +62,23 @@ def compute_risk(payload: RiskRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def analyze_fake_image(image_path: str):
-    """
-    Heuristic check for potential manipulation.
-    """
-    from PIL import Image, ExifTags
-    import os
-
-    flags = []
-    
-    try:
-        img = Image.open(image_path)
-        
-        # 1. Metadata Strip Check
-        # Most modern phones leave EXIF data. AI/Edited images often strip it.
-        exif_data = img._getexif()
-        if not exif_data:
-            flags.append("Missing EXIF Metadata (Possible Edit/AI)")
-        
-        # 2. Dimensions Check
-        # AI generators often use standard squares (1024x1024, 512x512)
-        w, h = img.size
-        if w == h and w in [512, 1024]:
-             flags.append(f"Suspicious Dimensions ({w}x{h})")
-
-        # 3. Software Signature
-        if exif_data:
-            for tag_id, value in exif_data.items():
-                tag = ExifTags.TAGS.get(tag_id, tag_id)
-                if tag == "Software":
-                    if "adobe" in str(value).lower() or "gimp" in str(value).lower():
-                        flags.append(f"Edited with {value}")
-
-        if flags:
-            return True, ", ".join(flags)
-        
-        return False, None
-
-    except Exception as e:
-        print(f"AI Check Failed: {e}")
-        return False, None
-
-
-
-def send_alert_sms(phone: str, message: str):
-    """
-    Simulates sending an SMS.
-    In production, this would use Twilio, SNS, or Fast2SMS.
-    """
-    if not phone:
-        return "No phone number linked."
-    
-    # SIMULATION
-    print(f"--------[SMS ALERT]--------")
-    print(f"To: {phone}")
-    print(f"Message: {message}")
-    print(f"---------------------------")
-    return "Sent"
+@router.post("/risk/batch")
+def compute_risk_batch(
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """Rescore every project in scope and store risk_score / risk_level."""
+    result = risk.rescore(db, state_id, district_id, block_id, village_id)
+    db.commit()
+    return result
 
 
 @router.get("/alerts")
-def check_alerts(db: Session = Depends(get_db)):
+def check_alerts():
     """
-    Identify contractors who haven't submitted updates for > 30 days.
+    Latest stale-contractor alerts from the background scan (see ai/alerts.py).
     """
-    alerts = []
-    
-    # Get all ongoing projects with contractors
-    projects = db.query(Project).filter(Project.contractor_id != None, Project.status == "ongoing").all()
-    
-    now = datetime.now()
-    
-    for p in projects:
-        # Get last update
-        last_update = db.query(ContractorUpdate)\
-            .filter(ContractorUpdate.project_id == p.id)\
-            .order_by(ContractorUpdate.id.desc())\
-            .first()
-            
-        contractor_name = p.contractor.name if p.contractor else "Unknown"
-        contractor_phone = p.contractor.phone if p.contractor else None
-        
-        # Helper to construct alert and possibly send SMS
-        def add_alert(msg, days):
-            # Send SMS
-            sms_status = send_alert_sms(contractor_phone, f"URGENT: {msg} for Project {p.name}")
-            
-            alerts.append({
-                "contractor": contractor_name,
-                "project": p.name,
-                "message": msg,
-                "days_overdue": days,
-                "sms_status": sms_status
-            })
-
-        if not last_update:
-            # Check project start date if no updates... simplified logic
-            add_alert("No updates submitted yet.", "N/A")
-            continue
-
-        try:
-            # Parse date "YYYY-MM-DD HH:MM"
-            submitted_at = datetime.strptime(last_update.submission_date, "%Y-%m-%d %H:%M")
-            delta = now - submitted_at
-            
-            if delta.days > 30:
-                add_alert(f"Last update was {delta.days} days ago.", delta.days)
-
-        except:
-             pass # Date parsing error or something
-             
-    return alerts
+    return alert_scheduler.latest()
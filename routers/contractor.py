@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, Form, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, Query, Response, UploadFile, File
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, get_db
 from models import Contractor, Project
+import contractor_stats
+import crud_async
+import pagination
+import schemas
 
 router = APIRouter(prefix="/contractors", tags=["Contractors"])
 
@@ -14,8 +19,30 @@ def add_contractor(name: str, company: str = "", phone: str = "", db: Session =
     return c
 
 @router.get("/list")
-def list_contractors(db: Session = Depends(get_db)):
-    return db.query(Contractor).all()
+async def list_contractors(
+    response: Response, page: pagination.PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    return pagination.respond(response, await crud_async.run(
+        db, lambda s: pagination.paginate(s.query(Contractor), [(Contractor.id, False)], page.limit, page.cursor)
+    ))
+
+@router.get("/leaderboard", response_model=list[schemas.LeaderboardEntry])
+async def contractor_leaderboard(
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Precomputed contractor_stats only, no per-request aggregation
+    def entries(session):
+        rows = contractor_stats.leaderboard(session, state_id, district_id, block_id, village_id, limit)
+        return [
+            schemas.LeaderboardEntry(rank=i, contractor=c, performance=c.performance or 0.0, stats=s)
+            for i, (c, s) in enumerate(rows, start=1)
+        ]
+    return await crud_async.run(db, entries)
 
 @router.put("/{contractor_id}/pin")
 def set_contractor_pin(contractor_id: int, pin: str = Form(...), db: Session = Depends(get_db)):
@@ -48,20 +75,28 @@ def assign_contractor(project_id: int, contractor_id: int, db: Session = Depends
 # ---------------------
 # NEW ENDPOINTS
 # ---------------------
-import shutil
 import os
-import crud
+import blobstore
 import schemas
+import uploads
+from routers import media
 
 UPLOAD_DIR = "uploads"
 
 @router.get("/projects/{contractor_id}")
-def get_my_projects(contractor_id: int, db: Session = Depends(get_db)):
-    return crud.get_contractor_projects(db, contractor_id)
+async def get_my_projects(
+    contractor_id: int,
+    response: Response,
+    page: pagination.PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return pagination.respond(
+        response, await crud_async.get_contractor_projects(db, contractor_id, page.limit, page.cursor)
+    )
 
 
 @router.post("/update")
-def submit_update(
+async def submit_update(
     project_id: int = Form(...),
     contractor_id: int = Form(...),
     amount_spent: float = Form(...),
@@ -69,20 +104,13 @@ def submit_update(
     expected_completion_date: str = Form(None),
     bill_image: UploadFile = File(None),
     work_image: UploadFile = File(None),
-    db: Session = Depends(get_db)
+    background: BackgroundTasks = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     bill_path = None
     work_path = None
-
-    if bill_image:
-        bill_path = f"bill_{project_id}_{contractor_id}_{bill_image.filename}"
-        with open(f"{UPLOAD_DIR}/{bill_path}", "wb") as buffer:
-            shutil.copyfileobj(bill_image.file, buffer)
-
-    if work_image:
-        work_path = f"work_{project_id}_{contractor_id}_{work_image.filename}"
-        with open(f"{UPLOAD_DIR}/{work_path}", "wb") as buffer:
-            shutil.copyfileobj(work_image.file, buffer)
+    budget = uploads.UploadBudget()  # bill + work photo share one request cap
+    ingested = []
 
     update_data = schemas.ContractorUpdateCreate(
         project_id=project_id,
@@ -92,18 +120,44 @@ def submit_update(
         expected_completion_date=expected_completion_date
     )
 
-    return crud.create_contractor_update(db, update_data, bill_path, work_path)
+    try:
+        # Stored content-addressed; bill_path/work_path hold the blob keys
+        if bill_image:
+            ingested.append(await uploads.ingest(bill_image, blobstore.TMP_DIR, budget))
+            bill_path = await blobstore.store(db, ingested[-1])
+
+        if work_image:
+            ingested.append(await uploads.ingest(work_image, blobstore.TMP_DIR, budget))
+            work_path = await blobstore.store(db, ingested[-1])
+
+        update = await crud_async.create_contractor_update(db, update_data, bill_path, work_path)
+    except BaseException:
+        # One transaction: a failed work photo / insert also undoes the bill's refcount,
+        # and the rollback hook removes a file nobody else references
+        await db.rollback()
+        raise
+    finally:
+        for upload in ingested:
+            uploads.discard(upload)  # no-op once stored
+    for key in (bill_path, work_path):
+        if key:
+            background.add_task(media.warm_derivatives, key)
+    return update
 
 
 @router.get("/updates/all")
-def get_all_updates(
+async def get_all_updates(
     state_id: int = None,
     district_id: int = None,
     block_id: int = None,
     village_id: int = None,
-    db: Session = Depends(get_db)
+    response: Response = None,
+    page: pagination.PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.get_all_contractor_updates(db, state_id, district_id, block_id, village_id)
+    return pagination.respond(response, await crud_async.get_all_contractor_updates(
+        db, state_id, district_id, block_id, village_id, page.limit, page.cursor
+    ))
 
 @router.delete("/{contractor_id}")
 def delete_contractor(contractor_id: int, db: Session = Depends(get_db)):
@@ -111,8 +165,13 @@ def delete_contractor(contractor_id: int, db: Session = Depends(get_db)):
     if c:
         # Unlink from projects
         db.query(Project).filter(Project.contractor_id == contractor_id).update({"contractor_id": None})
-        # Delete updates
+        # Delete updates (and release their stored photos)
         from models import ContractorUpdate
+        photos = db.query(ContractorUpdate.bill_image_path, ContractorUpdate.work_image_path)\
+            .filter(ContractorUpdate.contractor_id == contractor_id).all()
+        for bill, work in photos:
+            blobstore.release(db, bill)
+            blobstore.release(db, work)
         db.query(ContractorUpdate).filter(ContractorUpdate.contractor_id == contractor_id).delete()
         
         db.delete(c)
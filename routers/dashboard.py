@@ -1,23 +1,60 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud
+import crud_async
+import location_cache
+import projections
+import response_cache
+import rollups
 import schemas
-from database import get_db
+from database import get_async_db
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/village/{village_id}", response_model=schemas.DashboardVillageResponse)
-def get_dashboard(village_id: int, db: Session = Depends(get_db)):
-    return crud.get_village_dashboard(db, village_id)
+async def get_dashboard(
+    village_id: int,
+    include_projects: bool = True,
+    limit: int = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    fields: str = Query(None, description="Project keys for project_list, e.g. id,name,status"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    picked = projections.parse_fields(fields)
+
+    def dashboard(session):
+        # Summary is one grouped query; the list goes through the column projection
+        stats = crud.get_village_dashboard(session, village_id, include_projects=False)
+        if include_projects and stats["total_projects"]:
+            stats["project_list"] = projections.project_list(session, village_id, picked, limit, offset)
+        return stats
+
+    async def build():
+        if include_projects and "village" in picked:
+            await location_cache.get_snapshot_async(db)  # breadcrumb cache lives on it, built off the loop
+        return await crud_async.run(db, dashboard), None
+
+    params = {"village_id": village_id, "include_projects": include_projects, "limit": limit, "offset": offset, "fields": picked}
+    return await response_cache.respond(
+        "dashboard.village", params, [response_cache.scope_tag("village", village_id)], build
+    )
 
 
 @router.get("/officer/stats", response_model=schemas.OfficerStatsResponse)
-def get_officer_stats(
+async def get_officer_stats(
     state_id: int = None,
     district_id: int = None,
     block_id: int = None,
     village_id: int = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.get_officer_dashboard_stats(db, state_id, district_id, block_id, village_id)
+    level, entity_id = rollups.scope_key(state_id, district_id, block_id, village_id)
+
+    async def build():
+        return await crud_async.get_officer_dashboard_stats(db, state_id, district_id, block_id, village_id), None
+
+    return await response_cache.respond(
+        "dashboard.officer_stats", {"level": level, "id": entity_id},
+        [response_cache.scope_tag(level, entity_id)], build,
+    )
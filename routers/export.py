@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+import audit_export
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None,
+):
+    # Streams batch by batch (audit_export.py): flat memory however big the scope
+    if dataset not in audit_export.DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset (use one of {', '.join(audit_export.DATASETS)})")
+    scope = {"state_id": state_id, "district_id": district_id, "block_id": block_id, "village_id": village_id}
+    try:
+        chunks = audit_export.stream(dataset, format, **scope)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    name = audit_export.filename(dataset, format, **scope)
+    return StreamingResponse(
+        chunks,
+        media_type=audit_export.FORMATS[format][0],
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, Response, UploadFile, File, Form
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import crud
-from database import get_db
-from models import Feedback
+from sqlalchemy.ext.asyncio import AsyncSession
+import blobstore
+import crud_async
+import geofence
+import imaging
+import pagination
+import rollups
+import uploads
+from ai import similarity
+from routers import media
+from database import get_async_db
+from models import Feedback, Project
 from schemas import ProblematicFeedbackResponse
 import os, shutil
 from typing import List
@@ -13,6 +23,41 @@ UPLOAD_DIR = "uploads/"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def _find_duplicate(db: Session, image_hash: str):
+    return db.query(Feedback).filter(Feedback.image_hash == image_hash).first()
+
+
+def _project_village_id(db: Session, project_id: int):
+    return db.query(Project.village_id).filter(Project.id == project_id).scalar()
+
+
+async def _geofence_reason(db: AsyncSession, project_id: int, latitude: float, longitude: float):
+    """Flag reason if the photo was taken outside the project's village, else None."""
+    village_id = await crud_async.run(db, _project_village_id, project_id)
+    if village_id:
+        return await geofence.check_async(db, village_id, latitude, longitude)
+    return None
+
+
+def _closest(rows, phash: str):
+    similarity.index.load(rows)
+    return similarity.index.closest(phash)
+
+
+async def _near_duplicate(db: AsyncSession, phash: str):
+    # Photos other workers inserted: fetched on the session, indexed + searched in the threadpool
+    rows = await crud_async.run(db, similarity.index.pending)
+    return await run_in_threadpool(_closest, rows, phash)
+
+
+def _save_feedback(db: Session, fb: Feedback):
+    db.add(fb)
+    rollups.feedback_added(db, fb)
+    db.commit()
+    db.refresh(fb)
+    return fb
+
+
 @router.post("/add/{project_id}")
 async def add_feedback(
     project_id: int,
@@ -21,114 +66,100 @@ async def add_feedback(
     latitude: float = Form(None),
     longitude: float = Form(None),
     image: UploadFile = File(None),
-    db: Session = Depends(get_db)
+    background: BackgroundTasks = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    image_path = None
+    # Event loop pe sirf await: DB async driver pe, file hashing threadpool me, PIL kaam image pool me
+    ingested = None
     image_hash = None
+    image_phash = None
+    match = None
     is_flagged = 0
     flag_reason = None
 
     if image:
-        # Pre-process Step: Hash Calculation
-        import hashlib
-        from PIL import Image, ImageDraw, ImageFont
-        from datetime import datetime
-        from routers.ai import analyze_fake_image
-
-        contents = await image.read()
-        image_hash = hashlib.sha256(contents).hexdigest()
+        # Pre-process Step: stream to disk, sha256 computed on the way (no full read into memory)
+        ingested = await uploads.ingest(image, blobstore.TMP_DIR, uploads.UploadBudget())
+        image_hash = ingested.sha256
 
         # Check Duplicate
-        existing = db.query(Feedback).filter(Feedback.image_hash == image_hash).first()
+        existing = await crud_async.run(db, _find_duplicate, image_hash)
         if existing:
             is_flagged = 1
             flag_reason = "Duplicate Photo Detected"
 
-        # Save File
-        save_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(save_location, "wb") as buffer:
-            buffer.write(contents)
-        image_path = image.filename
+        # Processed in place on the temp file; stored in the blob store on save
+        save_location = ingested.temp_path
+
+        # AI Fake Detection (if not already duplicate) + Metadata Overlay
+        result = await imaging.run_cpu(
+            imaging.process_feedback_image, save_location, latitude, longitude, not is_flagged
+        )
+        image_phash = result["phash"]
 
-        # AI Fake Detection (if not already duplicate)
-        if not is_flagged:
-            fake_detected, reason = analyze_fake_image(save_location)
-            if fake_detected:
+        # Near-duplicate (re-compressed / cropped re-upload) via the hamming index
+        if not is_flagged and image_phash:
+            match = await _near_duplicate(db, image_phash)
+            if match:
                 is_flagged = 1
-                flag_reason = f"AI Flag: {reason}"
+                flag_reason = (
+                    f"Near-Duplicate Photo: matches feedback #{match['feedback_id']} "
+                    f"(project #{match['project_id']}, distance {match['distance']})"
+                )
+
+        if not is_flagged and result["fake"]:
+            is_flagged = 1
+            flag_reason = f"AI Flag: {result['reason']}"
 
         # 🌍 GEOFENCING CHECK (User Request)
         if not is_flagged and latitude and longitude:
-            project = db.query(Project).get(project_id)
-            if project and project.village and project.village.latitude:
-                from math import radians, cos, sin, asin, sqrt
-                
-                def haversine(lon1, lat1, lon2, lat2):
-                    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-                    dlon = lon2 - lon1 
-                    dlat = lat2 - lat1 
-                    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-                    c = 2 * asin(sqrt(a)) 
-                    r = 6371 # Radius of earth in km. Use 3956 for miles
-                    return c * r
-
-                v_lat = project.village.latitude
-                v_lng = project.village.longitude
-                dist = haversine(longitude, latitude, v_lng, v_lat)
-                
-                # If further than 0.5km (500 meters) from village center
-                if dist > 0.5:
-                    is_flagged = 1
-                    flag_reason = f"Out of Bounds: Photo taken {dist:.2f}km away from {project.village.name}"
-
-        # Metadata Overlay
-        try:
-            img = Image.open(save_location)
-            draw = ImageDraw.Draw(img)
-            
-            # Simple timestamp & location text
-            text = f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
-            if latitude and longitude:
-                text += f"Lat: {latitude:.4f}, Long: {longitude:.4f}"
-            
-            # Draw text (Top-left, Red color for visibility)
-            # Find a font or use default
-            try:
-                # Try standard fonts if available, else default
-                font = ImageFont.truetype("arial.ttf", 20)
-            except:
-                font = ImageFont.load_default()
-
-            draw.text((10, 10), text, fill="red", font=font)
-            
-            # Overwrite original
-            img.save(save_location)
-        
-        except Exception as e:
-            print(f"Overlay Failed: {e}")
+            reason = await _geofence_reason(db, project_id, latitude, longitude)
+            if reason:
+                is_flagged = 1
+                flag_reason = reason
 
     fb = Feedback(
         project_id=project_id,
         rating=rating,
         comment=comment,
-        image_path=image_path,
         latitude=latitude,
         longitude=longitude,
         image_hash=image_hash,
+        image_phash=image_phash,
         is_flagged=is_flagged,
         flag_reason=flag_reason
     )
 
-    db.add(fb)
-    db.commit()
-    db.refresh(fb)
+    try:
+        # Keyed on the uploaded bytes, not the overlaid file (its timestamp differs on every
+        # upload), so identical uploads share one blob: the first overlaid copy
+        if ingested:
+            fb.image_path = await blobstore.store_file(db, ingested.temp_path, ingested.filename, image_hash)
+        fb = await crud_async.run(db, _save_feedback, fb)
+    finally:
+        if ingested:
+            uploads.discard(ingested)  # no-op once stored
+
+    if fb.image_phash:
+        await run_in_threadpool(similarity.index.add, fb.id, fb.project_id, fb.image_phash)
 
-    return {"success": True, "feedback": fb}
+    if fb.image_path:
+        # Thumbnail/medium WebP after the response goes out
+        background.add_task(media.warm_derivatives, fb.image_path)
+
+    return {"success": True, "feedback": fb, "match": match}
 
 
 @router.get("/problematic/{village_id}", response_model=List[ProblematicFeedbackResponse])
-def get_problematic_feedbacks(village_id: int, db: Session = Depends(get_db)):
-    results = crud.list_problematic_feedback(db, village_id)
+async def get_problematic_feedbacks(
+    village_id: int,
+    http_response: Response,
+    page: pagination.PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    results = pagination.respond(
+        http_response, await crud_async.list_problematic_feedback(db, village_id, page.limit, page.cursor)
+    )
     response = []
     for feedback, project in results:
         # Pydantic requires dict or object matching schema
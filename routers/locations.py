@@ -1,28 +1,87 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
-import crud
-import schemas
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from database import get_async_db
+import location_cache
 
 router = APIRouter(prefix="/locations", tags=["Locations"])
 
 
+def _not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """Accept-Encoding allows gzip: explicitly or via "*", with q > 0 ("gzip;q=0" refuses it)."""
+    weights = {}
+    for item in request.headers.get("accept-encoding", "").lower().split(","):
+        coding, *params = [p.strip() for p in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding] = q
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+async def _snapshot(db: AsyncSession):
+    # One primary-key read of the version row per request (full load only when it changed,
+    # built in the threadpool)
+    return await location_cache.get_snapshot_async(db)
+
+
+async def _cached(request: Request, db: AsyncSession, kind: str, parent_id: int = 0):
+    # Served from the in-memory hierarchy; ETag changes only when the data version does
+    snap = await _snapshot(db)
+    etag = snap.etag(kind, parent_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snap.payload(kind, parent_id), media_type="application/json", headers=headers)
+
+
+@router.get("/tree")
+async def location_tree(request: Request, state_id: int = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Whole hierarchy (or one state's subtree) in one round trip, as parallel
+    id/name/parent arrays per level. Pre-serialized + gzipped once per version.
+    """
+    snap = await _snapshot(db)
+    if state_id is not None and snap.levels["states"].find(state_id) is None:
+        # Cached per scope: only real states get an entry
+        raise HTTPException(status_code=404, detail="State not found")
+    # Built (JSON + gzip) once per version; keep that CPU work off the event loop
+    raw, gz = await run_in_threadpool(snap.tree, state_id)
+    use_gzip = _accepts_gzip(request)
+    # Different bytes per encoding => different strong ETag
+    etag = snap.etag("tree-gz" if use_gzip else "tree", state_id or 0)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=gz, media_type="application/json", headers=headers)
+    return Response(content=raw, media_type="application/json", headers=headers)
+
+
 @router.get("/states")
-def list_states(db: Session = Depends(get_db)):
-     states = crud.get_states(db)
-     return [{"id": s.id, "name": s.name} for s in states]
+async def list_states(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await _cached(request, db, "states")
 
 @router.get("/districts/{state_id}")
-def list_districts(state_id: int, db: Session = Depends(get_db)):
-    districts = crud.get_districts_by_state(db, state_id)
-    return [{"id": d.id, "name": d.name} for d in districts]
+async def list_districts(state_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await _cached(request, db, "districts", state_id)
 
 @router.get("/blocks/{district_id}")
-def list_blocks(district_id: int, db: Session = Depends(get_db)):
-    blocks = crud.get_blocks_by_district(db, district_id)
-    return [{"id": b.id, "name": b.name} for b in blocks]
+async def list_blocks(district_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await _cached(request, db, "blocks", district_id)
 
 @router.get("/villages/{block_id}")
-def list_villages(block_id: int, db: Session = Depends(get_db)):
-    villages = crud.get_villages_by_block(db, block_id)
-    return [{"id": v.id, "name": v.name} for v in villages]
\ No newline at end of file
+async def list_villages(block_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await _cached(request, db, "villages", block_id)
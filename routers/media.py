@@ -0,0 +1,71 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+import blobstore
+import imaging
+
+router = APIRouter(prefix="/uploads", tags=["Media"])
+
+# Blob key content se bana hai => file kabhi badlegi nahi
+IMMUTABLE = "public, max-age=31536000, immutable"
+LEGACY = "public, max-age=3600"
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    # Whole comma-separated tokens (weak comparison), like locations._not_modified
+    if_none_match = request.headers.get("if-none-match", "")
+    tokens = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tokens or if_none_match.strip() == "*"
+
+
+def _serve(request: Request, path: str, key: str, variant: str = ""):
+    # FileResponse handles Range / If-Range itself
+    if blobstore.is_key(key):
+        etag = f'"{key[:64]}{variant}"'
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE}
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(path, headers=headers)
+
+    # Legacy flat file: Starlette's own mtime/size ETag
+    return FileResponse(path, headers={"Cache-Control": LEGACY})
+
+
+async def warm_derivatives(key: str):
+    """Upload-time generation of every size (run as a BackgroundTask after the response)."""
+    src = blobstore.resolve(key)
+    if src:
+        await imaging.run_cpu(
+            imaging.make_derivatives, src, blobstore.derivative_paths(key, imaging.DERIVATIVES)
+        )
+
+
+@router.get("/{key}")
+def get_upload(key: str, request: Request):
+    path = blobstore.resolve(key)
+    if not path:
+        raise HTTPException(status_code=404, detail="File not found")
+    return _serve(request, path, key)
+
+
+@router.get("/{key}/{size}")
+async def get_upload_resized(key: str, size: str, request: Request):
+    """WebP derivative ("thumb" / "medium"), generated on first request and cached on disk."""
+    if size not in imaging.DERIVATIVES:
+        raise HTTPException(status_code=404, detail=f"Unknown size (use {', '.join(imaging.DERIVATIVES)})")
+    src = blobstore.resolve(key)
+    if not src:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    dest = blobstore.derivative_path(key, size)
+    stale = not os.path.isfile(dest) or (
+        # Legacy files can be overwritten in place; blobs never change
+        not blobstore.is_key(key) and os.path.getmtime(src) > os.path.getmtime(dest)
+    )
+    if stale:
+        try:
+            await imaging.run_cpu(imaging.make_derivative, src, dest, size)
+        except Exception:
+            raise HTTPException(status_code=415, detail="Not a decodable image")
+    return _serve(request, dest, key, f"-{size}")
@@ -1,35 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
-import crud
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+import crud_async
+import location_cache
+import pagination
+import projections
+import response_cache
 import schemas
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 
-@router.get("/by_village/{village_id}", response_model=list[schemas.ProjectResponse])
-def projects_by_village(village_id: int, db: Session = Depends(get_db)):
-    return crud.get_projects_by_village(db, village_id)
+@router.get("/by_village/{village_id}", response_model=list[schemas.ProjectPartial])
+async def projects_by_village(
+    village_id: int,
+    fields: str = Query(None, description="Comma-separated subset of the project keys, e.g. id,name,status"),
+    page: pagination.PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Column projection + orjson: no ORM objects, no per-row Pydantic validation
+    picked = projections.parse_fields(fields)
+
+    async def build():
+        if "village" in picked:
+            await location_cache.get_snapshot_async(db)  # breadcrumb cache lives on it, built off the loop
+        result = await crud_async.run(db, projections.project_page, village_id, picked, page.limit, page.cursor)
+        return result.items, projections.page_headers(result)
+
+    params = {"village_id": village_id, "fields": picked, "limit": page.limit, "cursor": page.cursor}
+    return await response_cache.respond(
+        "projects.by_village", params, [response_cache.scope_tag("village", village_id)], build
+    )
 
 
 @router.get("/{project_id}", response_model=schemas.ProjectResponse)
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = crud.get_project(db, project_id)
+async def get_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    project = await crud_async.get_project(db, project_id, schema=schemas.ProjectResponse)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
 
 @router.post("/add", response_model=schemas.ProjectResponse)
-def create_project(payload: schemas.ProjectCreate, db: Session = Depends(get_db)):
-    return crud.create_project(db, payload)
+async def create_project(payload: schemas.ProjectCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_project(db, payload, schema=schemas.ProjectResponse)
 
 
 @router.put("/update/{project_id}", response_model=schemas.ProjectResponse)
-def update_project(project_id: int, payload: schemas.ProjectUpdate, db: Session = Depends(get_db)):
-    return crud.update_project(db, project_id, payload)
+async def update_project(project_id: int, payload: schemas.ProjectUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.update_project(db, project_id, payload, schema=schemas.ProjectResponse)
 
 
 @router.delete("/delete/{project_id}")
-def delete_project(project_id: int, db: Session = Depends(get_db)):
-    return crud.delete_project(db, project_id)
+async def delete_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.delete_project(db, project_id)
@@ -67,16 +67,16 @@ class ProjectCreate(BaseModel):
 
 
 class ProjectUpdate(BaseModel):
-    name: Optional[str]
+    name: Optional[str] = None
     contractor_id: Optional[int] = None
-    description: Optional[str]
-    status: Optional[str]
-    budget: Optional[float]
-    spent: Optional[float]
-    progress_percent: Optional[float]
-    start_year: Optional[int]
-    duration_months: Optional[int]
-    risk_level: Optional[str]
+    description: Optional[str] = None
+    status: Optional[str] = None
+    budget: Optional[float] = None
+    spent: Optional[float] = None
+    progress_percent: Optional[float] = None
+    start_year: Optional[int] = None
+    duration_months: Optional[int] = None
+    risk_level: Optional[str] = None
 
 # ----------------------------
 # Contractor Schema
@@ -101,6 +101,24 @@ class ProjectResponse(ProjectBase):
     village: Optional[VillageNested] = None
 
 
+class ProjectPartial(BaseModel):
+    """ProjectResponse limited to the `fields=` keys (projections.py): any key may be absent."""
+    id: Optional[int] = None
+    village_id: Optional[int] = None
+    contractor_id: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    budget: Optional[float] = None
+    spent: Optional[float] = None
+    progress_percent: Optional[float] = None
+    start_year: Optional[int] = None
+    duration_months: Optional[int] = None
+    risk_level: Optional[str] = None
+    contractor: Optional[ContractorBase] = None
+    village: Optional[VillageNested] = None
+
+
 
 # ----------------------------
 # Feedback Schemas
@@ -140,7 +158,7 @@ class DashboardVillageResponse(BaseModel):
     total_spent: float
     avg_progress: float
     complaints: int  # 🔥 ADDED
-    project_list: List[ProjectResponse]
+    project_list: List[ProjectPartial] = []  # empty when include_projects=false
 
 
 class OfficerStatsResponse(BaseModel):
@@ -175,3 +193,26 @@ class ContractorUpdateCreate(BaseModel):
 
 class ContractorUpdateResponse(ContractorUpdateBase):
     pass
+
+
+# ----------------------------
+# Contractor Leaderboard
+# ----------------------------
+class ContractorStatsBase(ORMBase):
+    projects_total: int
+    projects_completed: int
+    avg_overspend: float
+    avg_delay_months: float
+    feedback_total: int
+    complaints: int
+    complaint_rate: float
+    updates_total: int
+    avg_update_gap_days: Optional[float] = None
+    last_update_at: Optional[datetime] = None
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    contractor: ContractorBase
+    performance: float
+    stats: ContractorStatsBase
@@ -1,5 +1,6 @@
 from database import SessionLocal, Base, engine
 from models import State, District, Block, Village, Project, Contractor
+import location_cache  # ORM location writes bump the hierarchy cache version
 
 # Create tables if they don't exist
 Base.metadata.create_all(bind=engine)
@@ -18,6 +19,7 @@ if db.query(State).count() > 0:
     db.query(Block).delete()
     db.query(District).delete()
     db.query(State).delete()
+    location_cache.bump_version(db)  # bulk deletes skip the ORM flush hook
     db.commit()
 
 print("Seeding location data...")
@@ -134,6 +136,10 @@ if v_mhow:
 
 db.add_all(projects)
 db.commit()
+
+# Projects were bulk-deleted/re-added above, so recompute the officer rollups
+import rollups
+rollups.rebuild(db)
 db.close()
 
 print("Database expanded and re-seeded successfully!")
@@ -23,6 +23,29 @@ async function apiCall(path, options = {}) {
   }
 }
 
+// List endpoints are keyset-paginated: follow X-Next-Cursor until the last page
+async function apiCallAllPages(path, limit = 500) {
+  const items = [];
+  let cursor = null;
+  try {
+    do {
+      const sep = path.includes("?") ? "&" : "?";
+      const page = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await fetch(`${API}${path}${sep}limit=${limit}${page}`);
+      if (!res.ok) {
+        console.warn("API Error:", res.status, res.statusText);
+        return null;
+      }
+      items.push(...(await res.json()));
+      cursor = res.headers.get("X-Next-Cursor");
+    } while (cursor);
+    return items;
+  } catch (err) {
+    console.error("API Fetch Failed:", path, err);
+    return null;
+  }
+}
+
 // Locations
 export const fetchStates = async () => {
   const res = await apiCall("/locations/states");
@@ -46,8 +69,23 @@ export const fetchVillages = async (id) => {
   return res;
 };
 
+// Whole state subtree in one request (columnar: parallel id/name/parent arrays)
+export const fetchLocationTree = (stateId) =>
+  apiCall(stateId ? `/locations/tree?state_id=${stateId}` : "/locations/tree");
+
+// [{id, name}] of one tree level whose parent is parentId
+export const treeChildren = (level, parentId) => {
+  if (!level) return [];
+  const out = [];
+  const pid = Number(parentId);
+  for (let i = 0; i < level.id.length; i++) {
+    if (level.parent[i] === pid) out.push({ id: level.id[i], name: level.name[i] });
+  }
+  return out;
+};
+
 // Projects + Dashboard
-export const fetchProjectsByVillage = (id) => apiCall(`/projects/by_village/${id}`);
+export const fetchProjectsByVillage = (id) => apiCallAllPages(`/projects/by_village/${id}`);
 export const fetchProjectDetail = (id) => apiCall(`/projects/${id}`);
 export const fetchVillageDashboard = (id) => apiCall(`/dashboard/village/${id}`);
 
@@ -93,6 +131,12 @@ export const computeRisk = (payload) =>
     body: JSON.stringify(payload),
   });
 
+// Rescore every project in a scope, e.g. { state_id: 1 }
+export const computeRiskBatch = (scope = {}) =>
+  apiCall(`/ai/risk/batch?${new URLSearchParams(scope)}`, {
+    method: "POST",
+  });
+
 export async function submitFeedbackWithFile(projectId, formData) {
   const res = await fetch(`${API}/feedback/add/${projectId}`, {
     method: "POST",
@@ -101,12 +145,10 @@ export async function submitFeedbackWithFile(projectId, formData) {
   return res.json();
 }
 
-export async function fetchProblematicFeedbacks(villageId) {
-  const res = await fetch(`${API}/feedback/problematic/${villageId}`);
-  return res.json();
-}
+export const fetchProblematicFeedbacks = (villageId) =>
+  apiCallAllPages(`/feedback/problematic/${villageId}`);
 
-export const fetchContractors = () => apiCall("/contractors/list");
+export const fetchContractors = () => apiCallAllPages("/contractors/list");
 
 export const addContractor = (payload) =>
   apiCall("/contractors/add?" + new URLSearchParams(payload), {
@@ -118,7 +160,7 @@ export const assignContractor = (projectId, contractorId) =>
     method: "PUT",
   });
 
-export const fetchContractorProjects = (id) => apiCall(`/contractors/projects/${id}`);
+export const fetchContractorProjects = (id) => apiCallAllPages(`/contractors/projects/${id}`);
 
 export const submitContractorUpdate = (formData) =>
   fetch(`${API}/contractors/update`, {
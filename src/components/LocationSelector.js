@@ -93,10 +93,11 @@
 // }
 
 import React, { useEffect, useState } from "react";
-import { fetchStates, fetchDistricts, fetchBlocks, fetchVillages } from "../api";
+import { fetchStates, fetchLocationTree, treeChildren } from "../api";
 
 export default function LocationSelector({ onVillageSelected }) {
   const [states, setStates] = useState([]);
+  const [tree, setTree] = useState(null);
   const [districts, setDistricts] = useState([]);
   const [blocks, setBlocks] = useState([]);
   const [villages, setVillages] = useState([]);
@@ -110,20 +111,23 @@ export default function LocationSelector({ onVillageSelected }) {
     fetchStates().then((res) => setStates(res ?? []));
   }, []);
 
+  // One round trip per state; district/block/village lists are derived locally
   useEffect(() => {
-    if (stateId) fetchDistricts(stateId).then((res) => setDistricts(res ?? []));
-    else setDistricts([]);
+    setTree(null);
+    if (stateId) fetchLocationTree(stateId).then((res) => setTree(res));
   }, [stateId]);
 
   useEffect(() => {
-    if (districtId) fetchBlocks(districtId).then((res) => setBlocks(res ?? []));
-    else setBlocks([]);
-  }, [districtId]);
+    setDistricts(stateId ? treeChildren(tree?.districts, stateId) : []);
+  }, [tree, stateId]);
 
   useEffect(() => {
-    if (blockId) fetchVillages(blockId).then((res) => setVillages(res ?? []));
-    else setVillages([]);
-  }, [blockId]);
+    setBlocks(districtId ? treeChildren(tree?.blocks, districtId) : []);
+  }, [tree, districtId]);
+
+  useEffect(() => {
+    setVillages(blockId ? treeChildren(tree?.villages, blockId) : []);
+  }, [tree, blockId]);
 
   const handleStateChange = (val) => {
     setStateId(val);
@@ -403,7 +403,7 @@ export default function OfficerPanel({ setRole }) {
                           {fb.image_path && (
                             <div className="w-full md:w-56 h-56 flex-shrink-0 relative">
                               <img
-                                src={`http://localhost:8000/uploads/${fb.image_path}`}
+                                src={`http://localhost:8000/uploads/${fb.image_path}/thumb`}
                                 alt="Complaint"
                                 className="w-full h-full object-cover rounded-[32px] border border-white/20 shadow-lg grayscale group-hover:grayscale-0 transition-all duration-500"
                               />
@@ -514,13 +514,13 @@ export default function OfficerPanel({ setRole }) {
                           <div className="grid grid-cols-2 gap-4 mt-auto">
                             {u.work_image_path && (
                               <div className="group relative rounded-3xl overflow-hidden border border-white shadow-lg h-32">
-                                <img src={`http://localhost:8000/uploads/${u.work_image_path}`} className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110" alt="Work" />
+                                <img src={`http://localhost:8000/uploads/${u.work_image_path}/thumb`} className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110" alt="Work" />
                                 <div className="absolute inset-0 bg-black/20 flex items-end p-3"><span className="text-[9px] font-black text-white uppercase tracking-widest">Execution</span></div>
                               </div>
                             )}
                             {u.bill_image_path && (
                               <div className="group relative rounded-3xl overflow-hidden border border-white shadow-lg h-32">
-                                <img src={`http://localhost:8000/uploads/${u.bill_image_path}`} className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110" alt="Bill" />
+                                <img src={`http://localhost:8000/uploads/${u.bill_image_path}/thumb`} className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110" alt="Bill" />
                                 <div className="absolute inset-0 bg-black/20 flex items-end p-3"><span className="text-[9px] font-black text-white uppercase tracking-widest">Invoicing</span></div>
                               </div>
                             )}
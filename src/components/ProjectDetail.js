@@ -203,7 +203,7 @@ export default function ProjectDetail({ projectId }) {
                 {fb.image_path && (
                   <div className="w-full md:w-48 overflow-hidden rounded-xl border border-gray-200">
                     <img
-                      src={`http://127.0.0.1:8000/uploads/${fb.image_path}`}
+                      src={`http://127.0.0.1:8000/uploads/${fb.image_path}/thumb`}
                       className="w-full h-auto object-cover"
                       alt="Proof"
                     />
@@ -0,0 +1,39 @@
+"""
+Test setup: throwaway SQLite database aur BLOB_ROOT, app modules import hone
+se pehle hi env me set (engine aur blob paths import time pe bante hain).
+
+    python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="panchayat-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp, "test.db")
+os.environ["BLOB_ROOT"] = os.path.join(_tmp, "blobs")
+os.environ["RESPONSE_CACHE"] = "memory"
+
+from database import Base, SessionLocal, engine  # noqa: E402
+import models  # noqa: E402,F401
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import uuid
+
+from database import AsyncSessionLocal
+from models import Blob
+import blobstore
+
+import pytest
+
+
+def _temp_file(content: bytes) -> str:
+    os.makedirs(blobstore.TMP_DIR, exist_ok=True)
+    path = os.path.join(blobstore.TMP_DIR, uuid.uuid4().hex)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def _refcount(db, key):
+    blob = db.get(Blob, key, populate_existing=True)
+    return blob.refcount if blob else None
+
+
+@pytest.fixture
+def content():
+    return uuid.uuid4().bytes * 64  # unique per test: keys never collide across tests
+
+
+def test_same_content_stored_once(db, content):
+    key = blobstore.put_file(db, _temp_file(content), "a.jpg")
+    assert blobstore.put_file(db, _temp_file(content), "b.jpg") == key
+    db.commit()
+
+    assert _refcount(db, key) == 2
+    with open(blobstore.blob_path(key), "rb") as f:
+        assert f.read() == content
+
+
+def test_file_removed_with_last_reference(db, content):
+    key = blobstore.put_file(db, _temp_file(content), "a.jpg")
+    blobstore.put_file(db, _temp_file(content), "a.jpg")
+    db.commit()
+
+    blobstore.release(db, key)
+    db.commit()
+    assert _refcount(db, key) == 1
+    assert os.path.isfile(blobstore.blob_path(key))
+
+    blobstore.release(db, key)
+    db.commit()
+    assert _refcount(db, key) is None
+    assert not os.path.exists(blobstore.blob_path(key))
+
+
+def test_rolled_back_release_keeps_file(db, content):
+    key = blobstore.put_file(db, _temp_file(content), "a.jpg")
+    db.commit()
+
+    blobstore.release(db, key)
+    db.rollback()
+
+    assert _refcount(db, key) == 1
+    assert os.path.isfile(blobstore.blob_path(key))
+
+
+def test_rolled_back_put_removes_placed_file(db, content):
+    key = blobstore.put_file(db, _temp_file(content), "a.jpg")
+    assert os.path.isfile(blobstore.blob_path(key))
+    db.rollback()
+
+    assert _refcount(db, key) is None
+    assert not os.path.exists(blobstore.blob_path(key))
+
+
+def test_rolled_back_put_keeps_committed_file(db, content):
+    key = blobstore.put_file(db, _temp_file(content), "a.jpg")
+    db.commit()
+
+    blobstore.put_file(db, _temp_file(content), "a.jpg")
+    db.rollback()
+
+    assert _refcount(db, key) == 1
+    assert os.path.isfile(blobstore.blob_path(key))
+
+
+def test_async_store(db, content):
+    async def store_twice():
+        async with AsyncSessionLocal() as session:
+            keys = [await blobstore.store_file(session, _temp_file(content), "a.png") for _ in range(2)]
+            await session.commit()
+        return keys
+
+    first, second = asyncio.run(store_twice())
+    assert first == second
+    assert _refcount(db, first) == 2
+    assert os.path.isfile(blobstore.blob_path(first))
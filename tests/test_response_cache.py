@@ -0,0 +1,91 @@
+from models import Block, District, Feedback, Project, State, Village
+import response_cache
+
+import pytest
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    fresh = response_cache.MemoryBackend()
+    monkeypatch.setattr(response_cache, "backend", fresh)
+    return fresh
+
+
+@pytest.fixture
+def places(db):
+    state = State(name="S")
+    db.add(state)
+    db.flush()
+    district = District(name="D", state_id=state.id)
+    db.add(district)
+    db.flush()
+    block = Block(name="B", district_id=district.id)
+    db.add(block)
+    db.flush()
+    village = Village(name="V", block_id=block.id)
+    other = Village(name="W", block_id=block.id)
+    db.add_all([village, other])
+    db.flush()
+    project = Project(name="Road", village_id=village.id, budget=100)
+    db.add(project)
+    db.commit()
+    return {
+        "village": village.id, "other": other.id, "block": block.id,
+        "district": district.id, "state": state.id, "project": project.id,
+    }
+
+
+def _tags(places):
+    return [
+        response_cache.scope_tag("village", places["village"]),
+        response_cache.scope_tag("block", places["block"]),
+        response_cache.scope_tag("district", places["district"]),
+        response_cache.scope_tag("state", places["state"]),
+        response_cache.scope_tag("all", 0),
+    ]
+
+
+def test_write_bumps_village_and_ancestors(db, backend, places):
+    tags = _tags(places)
+    other = response_cache.scope_tag("village", places["other"])
+    before = backend.tag_versions([*tags, other, response_cache.GLOBAL_TAG])
+
+    db.add(Feedback(rating=1, comment="bad", project_id=places["project"]))
+    db.commit()
+
+    after = backend.tag_versions([*tags, other, response_cache.GLOBAL_TAG])
+    assert after[:5] == [v + 1 for v in before[:5]]
+    assert after[5:] == before[5:]  # sibling village and global scope untouched
+
+
+def test_moved_project_bumps_old_village_too(db, backend, places):
+    old, new = (response_cache.scope_tag("village", places[k]) for k in ("village", "other"))
+    before = backend.tag_versions([old, new])
+
+    db.get(Project, places["project"]).village_id = places["other"]
+    db.commit()
+
+    assert backend.tag_versions([old, new]) == [v + 1 for v in before]
+
+
+def test_rollback_bumps_nothing(db, backend, places):
+    tags = [*_tags(places), response_cache.GLOBAL_TAG]
+    before = backend.tag_versions(tags)
+
+    db.add(Feedback(rating=1, comment="bad", project_id=places["project"]))
+    db.flush()
+    db.rollback()
+    db.commit()  # an empty commit after the rollback must not replay its changes
+
+    assert backend.tag_versions(tags) == before
+
+
+def test_stale_entry_not_served_after_write(db, backend, places):
+    tags = _tags(places)[:1]
+    key = response_cache._key("/village", {"id": places["village"]}, tags)
+    backend.set(key, b"old", 60)
+
+    db.add(Feedback(rating=5, comment="ok", project_id=places["project"]))
+    db.commit()
+
+    assert response_cache._key("/village", {"id": places["village"]}, tags) != key
@@ -0,0 +1,160 @@
+"""
+Streaming upload ingestion shared by the feedback and contractor routers.
+
+UploadFile ko ek saath memory me read nahi karte: CHUNK_SIZE ke tukdon me
+same directory ki temp file me likhte hain, saath saath sha256 (aur koi bhi
+extra digest) update karte hain, size limit cross hote hi 413 dete hain, aur
+end me os.replace se atomically final naam pe rename karte hain. Peak memory
+per upload = kuch chunks, file size kitna bhi ho.
+
+Config (env):
+    UPLOAD_MAX_FILE_MB      per-file cap (20)
+    UPLOAD_MAX_REQUEST_MB   per-request cap across all files (40)
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+
+CHUNK_SIZE = 1024 * 1024
+MAX_FILE_BYTES = int(float(os.getenv("UPLOAD_MAX_FILE_MB", "20")) * 1024 * 1024)
+MAX_REQUEST_BYTES = int(float(os.getenv("UPLOAD_MAX_REQUEST_MB", "40")) * 1024 * 1024)
+
+
+@dataclass
+class IngestedFile:
+    temp_path: str
+    filename: str
+    size: int
+    digests: dict = field(default_factory=dict)
+    path: str = None  # set once committed
+
+    @property
+    def sha256(self) -> str:
+        return self.digests["sha256"]
+
+
+class UploadBudget:
+    """Per-request byte budget shared by every file in one request."""
+
+    def __init__(self, max_bytes: int = MAX_REQUEST_BYTES):
+        self.remaining = max_bytes
+
+    def consume(self, n: int):
+        self.remaining -= n
+        if self.remaining < 0:
+            raise HTTPException(status_code=413, detail="Request upload size limit exceeded")
+
+
+def safe_name(filename: str) -> str:
+    # Client ka filename kabhi path nahi banna chahiye ("../../main.py")
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    return name or "upload"
+
+
+def _discard(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def ingest(
+    upload: UploadFile,
+    dest_dir: str,
+    budget: UploadBudget = None,
+    digests=("sha256",),
+    max_bytes: int = MAX_FILE_BYTES,
+) -> IngestedFile:
+    """Stream `upload` into a temp file in dest_dir, hashing and size-checking as it goes."""
+    os.makedirs(dest_dir, exist_ok=True)
+    hashers = {name: hashlib.new(name) for name in digests}
+    fd, temp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".part")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large (max {max_bytes // (1024 * 1024)} MB)",
+                    )
+                if budget:
+                    budget.consume(len(chunk))
+                for h in hashers.values():
+                    h.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        _discard(temp_path)
+        raise
+    metrics.observe_upload(size)
+    return IngestedFile(
+        temp_path=temp_path,
+        filename=safe_name(upload.filename),
+        size=size,
+        digests={name: h.hexdigest() for name, h in hashers.items()},
+    )
+
+
+def commit(ingested: IngestedFile, dest_path: str) -> str:
+    """Atomically move the temp file to dest_path (same filesystem => rename)."""
+    os.replace(ingested.temp_path, dest_path)
+    ingested.path = dest_path
+    return dest_path
+
+
+def discard(ingested: IngestedFile):
+    _discard(ingested.temp_path)
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Rejects oversized upload requests before the multipart body is parsed:
+    by Content-Length when given, else by counting streamed body bytes.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES, paths=()):
+        self.app = app
+        # Multipart framing adds a little on top of the files themselves
+        self.max_bytes = max_bytes + 64 * 1024
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail="Request upload size limit exceeded")
+            return message
+
+        return await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send):
+        body = b'{"detail":"Request upload size limit exceeded"}'
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})